@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import re
 from logging.config import fileConfig
 
 from alembic import context
@@ -28,6 +29,20 @@ def get_url() -> str:
 
 target_metadata = Base.metadata
 
+# Monthly/default partitions are created by migrations and the maintenance job
+# (app/services/partition_maintenance.py), not declared as models
+_PARTITION_NAME = re.compile(r"_(p\d{6}|default)$")
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    if type_ == "table" and reflected and compare_to is None and _PARTITION_NAME.search(name or ""):
+        return False
+    if type_ == "index" and reflected and compare_to is None:
+        table = getattr(obj, "table", None)
+        if table is not None and _PARTITION_NAME.search(table.name):
+            return False
+    return True
+
 
 def run_migrations_offline() -> None:
     url = get_url()
@@ -37,6 +52,7 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
         compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -58,6 +74,7 @@ def run_migrations_online() -> None:
             connection=connection,
             target_metadata=target_metadata,
             compare_type=True,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,34 @@
+"""add sufficient statistics to snapshot statistics
+
+Revision ID: 0a9d3e7c4b15
+Revises: f2c6a4e81b07
+Create Date: 2026-10-18 15:31:47.209114
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = '0a9d3e7c4b15'
+down_revision = 'f2c6a4e81b07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("snapshot_statistics", sa.Column("value_count", sa.Integer(), nullable=True))
+    op.add_column("snapshot_statistics", sa.Column("value_sum", sa.Float(), nullable=True))
+    op.add_column("snapshot_statistics", sa.Column("m2", sa.Float(), nullable=True))
+    op.add_column("snapshot_statistics", sa.Column("m3", sa.Float(), nullable=True))
+    op.add_column("snapshot_statistics", sa.Column("m4", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("snapshot_statistics", "m4")
+    op.drop_column("snapshot_statistics", "m3")
+    op.drop_column("snapshot_statistics", "m2")
+    op.drop_column("snapshot_statistics", "value_sum")
+    op.drop_column("snapshot_statistics", "value_count")
@@ -0,0 +1,28 @@
+"""add duplicate rows to dataset snapshots
+
+Revision ID: 1b7e5c9a2d36
+Revises: 0a9d3e7c4b15
+Create Date: 2026-10-18 16:48:03.915527
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = '1b7e5c9a2d36'
+down_revision = '0a9d3e7c4b15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("dataset_snapshots", sa.Column("duplicate_row_count", sa.Integer(), nullable=True))
+    op.add_column("dataset_snapshots", sa.Column("duplicate_row_ratio", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("dataset_snapshots", "duplicate_row_ratio")
+    op.drop_column("dataset_snapshots", "duplicate_row_count")
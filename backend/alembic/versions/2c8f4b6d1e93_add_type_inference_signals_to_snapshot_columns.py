@@ -0,0 +1,42 @@
+"""add type inference signals to snapshot columns
+
+Revision ID: 2c8f4b6d1e93
+Revises: 1b7e5c9a2d36
+Create Date: 2026-10-18 23:24:11.402871
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+
+revision = '2c8f4b6d1e93'
+down_revision = '1b7e5c9a2d36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("snapshot_columns", sa.Column("text_value_count", sa.Integer(), nullable=True))
+    op.add_column("snapshot_columns", sa.Column("numeric_parse_count", sa.Integer(), nullable=True))
+    op.add_column("snapshot_columns", sa.Column("numeric_parse_ratio", sa.Float(), nullable=True))
+    op.add_column("snapshot_columns", sa.Column("date_parse_count", sa.Integer(), nullable=True))
+    op.add_column("snapshot_columns", sa.Column("date_parse_ratio", sa.Float(), nullable=True))
+    op.add_column("snapshot_columns", sa.Column("future_date_count", sa.Integer(), nullable=True))
+    op.add_column(
+        "snapshot_columns",
+        sa.Column("date_format_counts", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("snapshot_columns", "date_format_counts")
+    op.drop_column("snapshot_columns", "future_date_count")
+    op.drop_column("snapshot_columns", "date_parse_ratio")
+    op.drop_column("snapshot_columns", "date_parse_count")
+    op.drop_column("snapshot_columns", "numeric_parse_ratio")
+    op.drop_column("snapshot_columns", "numeric_parse_count")
+    op.drop_column("snapshot_columns", "text_value_count")
@@ -0,0 +1,35 @@
+"""add distribution summaries for drift
+
+Revision ID: 3d9a7e2f5c48
+Revises: 2c8f4b6d1e93
+Create Date: 2026-10-18 23:52:37.118204
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+
+revision = '3d9a7e2f5c48'
+down_revision = '2c8f4b6d1e93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "snapshot_statistics",
+        sa.Column("histogram", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+    op.add_column(
+        "snapshot_columns",
+        sa.Column("top_values", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("snapshot_columns", "top_values")
+    op.drop_column("snapshot_statistics", "histogram")
@@ -0,0 +1,34 @@
+"""add fingerprint to dataset insights
+
+Revision ID: 4e1b8c3a7d52
+Revises: 3d9a7e2f5c48
+Create Date: 2026-10-19 00:12:45.330918
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = '4e1b8c3a7d52'
+down_revision = '3d9a7e2f5c48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("dataset_insights", sa.Column("column_name", sa.String(length=255), nullable=True))
+    op.add_column("dataset_insights", sa.Column("fingerprint", sa.String(length=64), nullable=True))
+    op.add_column(
+        "dataset_insights",
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    op.execute("UPDATE dataset_insights SET updated_at = created_at")
+
+
+def downgrade() -> None:
+    op.drop_column("dataset_insights", "updated_at")
+    op.drop_column("dataset_insights", "fingerprint")
+    op.drop_column("dataset_insights", "column_name")
@@ -0,0 +1,124 @@
+"""add signal watermarks to datasets
+
+Revision ID: 5f2a8d1c6e94
+Revises: 4e1b8c3a7d52
+Create Date: 2026-10-19 10:41:17.502364
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = '5f2a8d1c6e94'
+down_revision = '4e1b8c3a7d52'
+branch_labels = None
+depends_on = None
+
+
+# (table, event, transition table) for every write that changes risk inputs
+SIGNAL_TRIGGERS = (
+    ("dataset_snapshots", "INSERT", "NEW"),
+    ("dataset_insights", "INSERT", "NEW"),
+    ("dataset_insights", "UPDATE", "NEW"),
+    ("dataset_insights", "DELETE", "OLD"),
+    ("alert_events", "INSERT", "NEW"),
+)
+
+
+def upgrade() -> None:
+    op.add_column("datasets", sa.Column("last_signal_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("datasets", sa.Column("last_risk_at", sa.DateTime(timezone=True), nullable=True))
+
+    # Backfill from exactly the tables SIGNAL_TRIGGERS keeps current afterwards
+    op.execute(
+        """
+        UPDATE datasets d SET last_signal_at = s.ts
+        FROM (
+            SELECT dataset_id, max(ts) AS ts FROM (
+                SELECT dataset_id, created_at AS ts FROM dataset_snapshots
+                UNION ALL SELECT dataset_id, updated_at FROM dataset_insights
+                UNION ALL SELECT dataset_id, created_at FROM alert_events
+            ) signals
+            GROUP BY dataset_id
+        ) s
+        WHERE d.id = s.dataset_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE datasets d SET last_risk_at = r.ts
+        FROM (
+            SELECT dataset_id, max(created_at) AS ts FROM dataset_risk_history GROUP BY dataset_id
+        ) r
+        WHERE d.id = r.dataset_id
+        """
+    )
+
+    # Statement-level triggers: one UPDATE per statement, however many rows it wrote.
+    # clock_timestamp() rather than now() so a long transaction stamps its write time.
+    op.execute(
+        """
+        CREATE FUNCTION datasets_touch_last_signal() RETURNS trigger AS $$
+        BEGIN
+            UPDATE datasets SET last_signal_at = clock_timestamp()
+            WHERE id IN (SELECT DISTINCT dataset_id FROM changed_rows);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION datasets_touch_last_risk() RETURNS trigger AS $$
+        BEGIN
+            UPDATE datasets d SET last_risk_at = GREATEST(d.last_risk_at, r.ts)
+            FROM (
+                SELECT dataset_id, max(created_at) AS ts FROM changed_rows GROUP BY dataset_id
+            ) r
+            WHERE d.id = r.dataset_id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table, event, transition in SIGNAL_TRIGGERS:
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_{event.lower()}_signal
+            AFTER {event} ON {table}
+            REFERENCING {transition} TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION datasets_touch_last_signal()
+            """
+        )
+    op.execute(
+        """
+        CREATE TRIGGER dataset_risk_history_insert_risk
+        AFTER INSERT ON dataset_risk_history
+        REFERENCING NEW TABLE AS changed_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION datasets_touch_last_risk()
+        """
+    )
+
+    # Scheduler tick: only datasets with signals newer than their last tracked risk.
+    op.create_index(
+        "ix_datasets_risk_dirty",
+        "datasets",
+        ["last_signal_at"],
+        postgresql_where=sa.text(
+            "row_count > 0 AND (last_risk_at IS NULL OR last_signal_at > last_risk_at)"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_datasets_risk_dirty", table_name="datasets")
+    op.execute("DROP TRIGGER IF EXISTS dataset_risk_history_insert_risk ON dataset_risk_history")
+    for table, event, _ in SIGNAL_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_{event.lower()}_signal ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS datasets_touch_last_risk()")
+    op.execute("DROP FUNCTION IF EXISTS datasets_touch_last_signal()")
+    op.drop_column("datasets", "last_risk_at")
+    op.drop_column("datasets", "last_signal_at")
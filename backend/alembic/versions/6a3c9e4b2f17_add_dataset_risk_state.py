@@ -0,0 +1,73 @@
+"""add dataset risk state
+
+Revision ID: 6a3c9e4b2f17
+Revises: 7b4d2f8e1a63
+Create Date: 2026-10-19 13:05:52.184730
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+
+revision = '6a3c9e4b2f17'
+down_revision = '7b4d2f8e1a63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "dataset_risk_state",
+        sa.Column(
+            "dataset_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("datasets.id", ondelete="CASCADE"),
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("risk_score", sa.Integer(), nullable=True),
+        sa.Column("risk_level", sa.String(length=20), nullable=True),
+        sa.Column("breakdown_hash", sa.String(length=64), nullable=True),
+        sa.Column("smoothed_score", sa.Integer(), nullable=True),
+        sa.Column("prev_smoothed_score", sa.Integer(), nullable=True),
+        sa.Column("alpha", sa.Float(), nullable=True),
+        sa.Column("delta_score", sa.Float(), nullable=True),
+        sa.Column("accel_score", sa.Float(), nullable=True),
+        sa.Column("tracked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_spike_alert_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_accel_alert_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+    # Seed from the latest two history rows and the latest tracking alerts.
+    # breakdown_hash stays NULL, so the first track after upgrade always records.
+    op.execute(
+        """
+        WITH ranked AS (
+            SELECT h.*, row_number() OVER (PARTITION BY dataset_id ORDER BY created_at DESC) AS rn
+            FROM dataset_risk_history h
+        )
+        INSERT INTO dataset_risk_state (
+            dataset_id, version, risk_score, risk_level, smoothed_score, prev_smoothed_score,
+            alpha, delta_score, accel_score, tracked_at, last_spike_alert_at, last_accel_alert_at
+        )
+        SELECT
+            cur.dataset_id, 1, cur.risk_score, cur.risk_level, cur.smoothed_score, prev.smoothed_score,
+            cur.alpha, cur.delta_score, cur.accel_score, cur.created_at,
+            (SELECT max(a.created_at) FROM alert_events a
+             WHERE a.dataset_id = cur.dataset_id AND a.title = 'Risk spike detected'),
+            (SELECT max(a.created_at) FROM alert_events a
+             WHERE a.dataset_id = cur.dataset_id AND a.title = 'Risk acceleration detected')
+        FROM ranked cur
+        LEFT JOIN ranked prev ON prev.dataset_id = cur.dataset_id AND prev.rn = 2
+        WHERE cur.rn = 1
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("dataset_risk_state")
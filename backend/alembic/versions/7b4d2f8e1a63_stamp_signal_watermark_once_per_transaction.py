@@ -0,0 +1,88 @@
+"""stamp signal watermark once per transaction
+
+Revision ID: 7b4d2f8e1a63
+Revises: 5f2a8d1c6e94
+Create Date: 2026-10-19 10:58:42.640115
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = '7b4d2f8e1a63'
+down_revision = '5f2a8d1c6e94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Transaction that last stamped last_signal_at; later statements of the
+    # same transaction skip the datasets row instead of re-updating it
+    op.add_column("datasets", sa.Column("last_signal_txid", sa.BigInteger(), nullable=True))
+
+    # Row-by-row executemany fires the statement triggers once per row; updating
+    # the same datasets row again and again in one transaction grows its
+    # version chain and turns a bulk insert quadratic. Stamp each dataset once
+    # per transaction, never moving the watermark backwards, and skip no-op
+    # last_risk_at updates.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION datasets_touch_last_signal() RETURNS trigger AS $$
+        BEGIN
+            UPDATE datasets
+            SET last_signal_at = GREATEST(last_signal_at, clock_timestamp()),
+                last_signal_txid = txid_current()
+            WHERE id IN (SELECT DISTINCT dataset_id FROM changed_rows)
+              AND last_signal_txid IS DISTINCT FROM txid_current();
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION datasets_touch_last_risk() RETURNS trigger AS $$
+        BEGIN
+            UPDATE datasets d SET last_risk_at = r.ts
+            FROM (
+                SELECT dataset_id, max(created_at) AS ts FROM changed_rows GROUP BY dataset_id
+            ) r
+            WHERE d.id = r.dataset_id
+              AND (d.last_risk_at IS NULL OR d.last_risk_at < r.ts);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION datasets_touch_last_signal() RETURNS trigger AS $$
+        BEGIN
+            UPDATE datasets SET last_signal_at = clock_timestamp()
+            WHERE id IN (SELECT DISTINCT dataset_id FROM changed_rows);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION datasets_touch_last_risk() RETURNS trigger AS $$
+        BEGIN
+            UPDATE datasets d SET last_risk_at = GREATEST(d.last_risk_at, r.ts)
+            FROM (
+                SELECT dataset_id, max(created_at) AS ts FROM changed_rows GROUP BY dataset_id
+            ) r
+            WHERE d.id = r.dataset_id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.drop_column("datasets", "last_signal_txid")
@@ -0,0 +1,224 @@
+"""partition event tables by month
+
+Revision ID: 8e5a1c7d3b90
+Revises: 6a3c9e4b2f17
+Create Date: 2026-10-20 09:14:36.281907
+
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+
+revision = '8e5a1c7d3b90'
+down_revision = '6a3c9e4b2f17'
+branch_labels = None
+depends_on = None
+
+
+# Partitions created ahead of the current month; the maintenance job keeps this up
+MONTHS_AHEAD = 3
+
+# Added by this revision, not recreated on downgrade
+NEW_INDEXES = {"ix_alert_events_dataset_id_created_at"}
+
+# Statement-level watermark triggers from 5f2a8d1c6e94 on the tables rebuilt here
+TRIGGERS = {
+    "dataset_risk_history": (
+        ("dataset_risk_history_insert_risk", "INSERT", "NEW", "datasets_touch_last_risk"),
+    ),
+    "alert_events": (
+        ("alert_events_insert_signal", "INSERT", "NEW", "datasets_touch_last_signal"),
+    ),
+    "dataset_anomaly_events": (),
+}
+
+# (name, columns) of the secondary indexes on each table
+INDEXES = {
+    "dataset_risk_history": (
+        ("ix_dataset_risk_history_dataset_id", ["dataset_id"]),
+        ("ix_dataset_risk_history_dataset_id_created_at", ["dataset_id", "created_at"]),
+    ),
+    "alert_events": (
+        ("ix_alert_events_dataset_id", ["dataset_id"]),
+        ("ix_alert_events_rule_id", ["rule_id"]),
+        ("ix_alert_events_dataset_id_created_at", ["dataset_id", "created_at"]),
+    ),
+    "dataset_anomaly_events": (
+        ("ix_dataset_anomaly_events_dataset_created", ["dataset_id", sa.text("created_at DESC")]),
+        ("ix_dataset_anomaly_events_dataset_metric_created", ["dataset_id", "metric", sa.text("created_at DESC")]),
+    ),
+}
+
+
+def _columns(table: str) -> list[sa.Column]:
+    dataset_fk = sa.ForeignKey("datasets.id", ondelete="CASCADE")
+    created_at = sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False)
+    if table == "dataset_risk_history":
+        return [
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("dataset_id", postgresql.UUID(as_uuid=True), dataset_fk, nullable=False),
+            sa.Column("risk_score", sa.Integer(), nullable=False),
+            sa.Column("risk_level", sa.String(length=20), nullable=False),
+            sa.Column("breakdown", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+            created_at,
+            sa.Column("smoothed_score", sa.Integer(), nullable=True),
+            sa.Column("alpha", sa.Float(), nullable=True),
+            sa.Column("delta_score", sa.Float(), nullable=True),
+            sa.Column("accel_score", sa.Float(), nullable=True),
+        ]
+    if table == "alert_events":
+        return [
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("dataset_id", postgresql.UUID(as_uuid=True), dataset_fk, nullable=False),
+            sa.Column(
+                "rule_id",
+                postgresql.UUID(as_uuid=True),
+                sa.ForeignKey("alert_rules.id", ondelete="SET NULL"),
+                nullable=True,
+            ),
+            sa.Column("severity", sa.String(length=20), nullable=False),
+            sa.Column("title", sa.String(length=200), nullable=False),
+            sa.Column("message", sa.String(length=2000), nullable=False),
+            sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+            created_at,
+        ]
+    return [
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("dataset_id", postgresql.UUID(as_uuid=True), dataset_fk, nullable=False),
+        sa.Column("metric", sa.String(length=50), nullable=False),
+        sa.Column("value", sa.Float(), nullable=False),
+        sa.Column("rolling_mean", sa.Float(), nullable=True),
+        sa.Column("rolling_std", sa.Float(), nullable=True),
+        sa.Column("z_score", sa.Float(), nullable=True),
+        sa.Column("window", sa.Integer(), nullable=False),
+        sa.Column("threshold", sa.Float(), nullable=False),
+        sa.Column("direction", sa.String(length=10), nullable=True),
+        created_at,
+    ]
+
+
+def _add_months(d: date, n: int) -> date:
+    m = d.month - 1 + n
+    return date(d.year + m // 12, m % 12 + 1, 1)
+
+
+def _create_triggers(table: str) -> None:
+    for name, event, transition, function in TRIGGERS[table]:
+        op.execute(
+            f"""
+            CREATE TRIGGER {name}
+            AFTER {event} ON {table}
+            REFERENCING {transition} TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+            """
+        )
+
+
+def _rename_to_legacy(table: str) -> str:
+    legacy = f"{table}_legacy"
+    for name, _ in INDEXES[table]:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.rename_table(table, legacy)
+    op.execute(f"ALTER INDEX {table}_pkey RENAME TO {legacy}_pkey")
+    return legacy
+
+
+def _partition_table(table: str) -> None:
+    bind = op.get_bind()
+    legacy = _rename_to_legacy(table)
+
+    op.create_table(
+        table,
+        *_columns(table),
+        sa.PrimaryKeyConstraint("id", "created_at", name=f"{table}_pkey"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+
+    oldest = bind.execute(sa.text(f"SELECT min(created_at) FROM {legacy}")).scalar()
+    this_month = datetime.now(timezone.utc).date().replace(day=1)
+    month = (oldest.astimezone(timezone.utc).date().replace(day=1) if oldest else this_month)
+    month = min(month, this_month)
+    last = _add_months(this_month, MONTHS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+        )
+        month = upper
+    # Catches rows outside every monthly range so an overdue maintenance job never fails inserts
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+    cols = ", ".join(f'"{c.name}"' for c in _columns(table))
+    op.execute(f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {legacy}")
+    op.drop_table(legacy)
+
+    for name, columns in INDEXES[table]:
+        op.create_index(name, table, columns, unique=False)
+    _create_triggers(table)
+
+
+def _unpartition_table(table: str) -> None:
+    legacy = _rename_to_legacy(table)
+    op.create_table(
+        table,
+        *_columns(table),
+        sa.PrimaryKeyConstraint("id", name=f"{table}_pkey"),
+    )
+    cols = ", ".join(f'"{c.name}"' for c in _columns(table))
+    op.execute(f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {legacy}")
+    op.drop_table(legacy)
+
+    for name, columns in INDEXES[table]:
+        if name not in NEW_INDEXES:
+            op.create_index(name, table, columns, unique=False)
+    _create_triggers(table)
+
+
+def _create_rollup_table(table: str) -> None:
+    op.create_table(
+        table,
+        sa.Column(
+            "dataset_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("datasets.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+        sa.Column("risk_min", sa.Integer(), nullable=False),
+        sa.Column("risk_max", sa.Integer(), nullable=False),
+        sa.Column("risk_sum", sa.BigInteger(), nullable=False),
+        sa.Column("smoothed_min", sa.Integer(), nullable=True),
+        sa.Column("smoothed_max", sa.Integer(), nullable=True),
+        sa.Column("smoothed_sum", sa.BigInteger(), nullable=True),
+        sa.Column("smoothed_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("risk_last", sa.Integer(), nullable=False),
+        sa.Column("risk_level_last", sa.String(length=20), nullable=False),
+        sa.Column("smoothed_last", sa.Integer(), nullable=True),
+        sa.Column("delta_last", sa.Float(), nullable=True),
+        sa.Column("accel_last", sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint("dataset_id", "bucket_start"),
+    )
+
+
+def upgrade() -> None:
+    for table in TRIGGERS:
+        _partition_table(table)
+    _create_rollup_table("dataset_risk_history_hourly")
+    _create_rollup_table("dataset_risk_history_daily")
+
+
+def downgrade() -> None:
+    # Rolled-up history cannot be turned back into raw rows; only the rollups are lost
+    op.drop_table("dataset_risk_history_daily")
+    op.drop_table("dataset_risk_history_hourly")
+    for table in TRIGGERS:
+        _unpartition_table(table)
@@ -0,0 +1,48 @@
+"""add dataset anomaly baselines
+
+Revision ID: 9f6b2d4e8c15
+Revises: 8e5a1c7d3b90
+Create Date: 2026-10-20 14:02:51.736420
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+
+revision = '9f6b2d4e8c15'
+down_revision = '8e5a1c7d3b90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Rows are seeded lazily from history the first time a window is detected on
+    op.create_table(
+        "dataset_anomaly_baselines",
+        sa.Column(
+            "dataset_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("datasets.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("metric", sa.String(length=50), nullable=False),
+        sa.Column("window_size", sa.Integer(), nullable=False),
+        sa.Column("ring", postgresql.ARRAY(sa.Float()), nullable=False),
+        sa.Column("head", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("value_sum", sa.Float(), nullable=False),
+        sa.Column("value_sumsq", sa.Float(), nullable=False),
+        sa.Column("latest_value", sa.Float(), nullable=False),
+        sa.Column("latest_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_event_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("dataset_id", "metric", "window_size"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("dataset_anomaly_baselines")
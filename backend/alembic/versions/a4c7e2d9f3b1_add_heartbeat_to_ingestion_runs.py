@@ -0,0 +1,28 @@
+"""add heartbeat to ingestion runs
+
+Revision ID: a4c7e2d9f3b1
+Revises: 9f6b2d4e8c15
+Create Date: 2026-10-21 10:37:12.904518
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = 'a4c7e2d9f3b1'
+down_revision = '9f6b2d4e8c15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("ingestion_runs", sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True))
+    # Runs claimed before this revision count as alive since their claim
+    op.execute("UPDATE ingestion_runs SET heartbeat_at = claimed_at WHERE status = 'profiling'")
+
+
+def downgrade() -> None:
+    op.drop_column("ingestion_runs", "heartbeat_at")
@@ -0,0 +1,42 @@
+"""add ingestion run queue fields
+
+Revision ID: b3e1c7a9d2f4
+Revises: 8c2ae4fa5671
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+
+revision = 'b3e1c7a9d2f4'
+down_revision = '8c2ae4fa5671'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("ingestion_runs", sa.Column("source_file", sa.String(length=500), nullable=True))
+    op.add_column("ingestion_runs", sa.Column("spool_path", sa.String(length=1000), nullable=True))
+    op.add_column("ingestion_runs", sa.Column("options", postgresql.JSONB(), nullable=True))
+    op.add_column("ingestion_runs", sa.Column("claimed_at", sa.DateTime(timezone=True), nullable=True))
+
+    # Worker claim path: oldest queued runs first, only rows that still have a spooled file.
+    op.create_index(
+        "ix_ingestion_runs_queue",
+        "ingestion_runs",
+        ["status", "created_at"],
+        postgresql_where=sa.text("spool_path IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ingestion_runs_queue", table_name="ingestion_runs")
+    op.drop_column("ingestion_runs", "claimed_at")
+    op.drop_column("ingestion_runs", "options")
+    op.drop_column("ingestion_runs", "spool_path")
+    op.drop_column("ingestion_runs", "source_file")
@@ -0,0 +1,101 @@
+"""add signal sequence to datasets
+
+Revision ID: b8e3f5a2c6d4
+Revises: a4c7e2d9f3b1
+Create Date: 2026-10-21 15:12:48.217364
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = 'b8e3f5a2c6d4'
+down_revision = 'a4c7e2d9f3b1'
+branch_labels = None
+depends_on = None
+
+
+DIRTY_WHERE = "row_count > 0 AND (risk_seq IS NULL OR signal_seq > risk_seq)"
+OLD_DIRTY_WHERE = "row_count > 0 AND (last_risk_at IS NULL OR last_signal_at > last_risk_at)"
+
+
+def upgrade() -> None:
+    # last_signal_at is taken at the writer's first statement but only becomes
+    # visible at its commit, so a scorer that read its inputs in between could
+    # stamp a later last_risk_at and hide the write. A counter bumped by the
+    # same trigger has no clock: whatever a scorer read before its inputs is
+    # lower than any write it did not see.
+    op.add_column(
+        "datasets",
+        sa.Column("signal_seq", sa.BigInteger(), server_default="0", nullable=False),
+    )
+    op.add_column("datasets", sa.Column("risk_seq", sa.BigInteger(), nullable=True))
+
+    # Keep today's dirty set: clean datasets are tracked up to their sequence,
+    # dirty ones stay behind it, never-tracked ones stay NULL.
+    op.execute("UPDATE datasets SET signal_seq = 1 WHERE last_signal_at IS NOT NULL")
+    op.execute(
+        """
+        UPDATE datasets
+        SET risk_seq = CASE
+            WHEN last_signal_at IS NOT NULL AND last_signal_at > last_risk_at THEN 0
+            ELSE signal_seq
+        END
+        WHERE last_risk_at IS NOT NULL
+        """
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION datasets_touch_last_signal() RETURNS trigger AS $$
+        BEGIN
+            UPDATE datasets
+            SET last_signal_at = GREATEST(last_signal_at, clock_timestamp()),
+                last_signal_txid = txid_current(),
+                signal_seq = signal_seq + 1
+            WHERE id IN (SELECT DISTINCT dataset_id FROM changed_rows)
+              AND last_signal_txid IS DISTINCT FROM txid_current();
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+    op.drop_index("ix_datasets_risk_dirty", table_name="datasets")
+    op.create_index(
+        "ix_datasets_risk_dirty",
+        "datasets",
+        ["last_signal_at"],
+        unique=False,
+        postgresql_where=sa.text(DIRTY_WHERE),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_datasets_risk_dirty", table_name="datasets")
+    op.create_index(
+        "ix_datasets_risk_dirty",
+        "datasets",
+        ["last_signal_at"],
+        unique=False,
+        postgresql_where=sa.text(OLD_DIRTY_WHERE),
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION datasets_touch_last_signal() RETURNS trigger AS $$
+        BEGIN
+            UPDATE datasets
+            SET last_signal_at = GREATEST(last_signal_at, clock_timestamp()),
+                last_signal_txid = txid_current()
+            WHERE id IN (SELECT DISTINCT dataset_id FROM changed_rows)
+              AND last_signal_txid IS DISTINCT FROM txid_current();
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.drop_column("datasets", "risk_seq")
+    op.drop_column("datasets", "signal_seq")
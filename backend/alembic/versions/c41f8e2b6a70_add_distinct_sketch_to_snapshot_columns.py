@@ -0,0 +1,39 @@
+"""add distinct sketch to snapshot columns
+
+Revision ID: c41f8e2b6a70
+Revises: b3e1c7a9d2f4
+Create Date: 2026-10-18 11:02:57.340611
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = 'c41f8e2b6a70'
+down_revision = 'b3e1c7a9d2f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "snapshot_columns",
+        sa.Column(
+            "distinct_is_approximate",
+            sa.Boolean(),
+            server_default=sa.text("false"),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "snapshot_columns",
+        sa.Column("distinct_sketch", sa.LargeBinary(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("snapshot_columns", "distinct_sketch")
+    op.drop_column("snapshot_columns", "distinct_is_approximate")
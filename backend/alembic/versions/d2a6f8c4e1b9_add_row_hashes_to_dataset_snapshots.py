@@ -0,0 +1,29 @@
+"""add row hashes to dataset snapshots
+
+Revision ID: d2a6f8c4e1b9
+Revises: b8e3f5a2c6d4
+Create Date: 2026-10-21 16:40:05.581902
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = 'd2a6f8c4e1b9'
+down_revision = 'b8e3f5a2c6d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "dataset_snapshots",
+        sa.Column("row_hashes", sa.LargeBinary(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("dataset_snapshots", "row_hashes")
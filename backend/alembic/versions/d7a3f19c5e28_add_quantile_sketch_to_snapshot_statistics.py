@@ -0,0 +1,35 @@
+"""add quantile sketch to snapshot statistics
+
+Revision ID: d7a3f19c5e28
+Revises: c41f8e2b6a70
+Create Date: 2026-10-18 12:14:08.519203
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = 'd7a3f19c5e28'
+down_revision = 'c41f8e2b6a70'
+branch_labels = None
+depends_on = None
+
+_PERCENTILES = ("p01", "p05", "p50", "p95", "p99")
+
+
+def upgrade() -> None:
+    for name in _PERCENTILES:
+        op.add_column("snapshot_statistics", sa.Column(name, sa.Float(), nullable=True))
+    op.add_column(
+        "snapshot_statistics",
+        sa.Column("quantile_sketch", sa.LargeBinary(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("snapshot_statistics", "quantile_sketch")
+    for name in reversed(_PERCENTILES):
+        op.drop_column("snapshot_statistics", name)
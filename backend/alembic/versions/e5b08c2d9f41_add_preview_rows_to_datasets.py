@@ -0,0 +1,26 @@
+"""add preview rows to datasets
+
+Revision ID: e5b08c2d9f41
+Revises: d7a3f19c5e28
+Create Date: 2026-10-18 13:26:41.072318
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+revision = 'e5b08c2d9f41'
+down_revision = 'd7a3f19c5e28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("datasets", sa.Column("preview_rows", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("datasets", "preview_rows")
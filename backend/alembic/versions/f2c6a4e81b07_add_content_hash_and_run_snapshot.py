@@ -0,0 +1,42 @@
+"""add content hash to snapshots and snapshot reference to runs
+
+Revision ID: f2c6a4e81b07
+Revises: e5b08c2d9f41
+Create Date: 2026-10-18 14:05:12.664870
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+
+revision = 'f2c6a4e81b07'
+down_revision = 'e5b08c2d9f41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("dataset_snapshots", sa.Column("content_sha256", sa.String(length=64), nullable=True))
+
+    op.add_column(
+        "ingestion_runs",
+        sa.Column("snapshot_id", postgresql.UUID(as_uuid=True), nullable=True),
+    )
+    op.create_foreign_key(
+        "fk_ingestion_runs_snapshot_id",
+        "ingestion_runs",
+        "dataset_snapshots",
+        ["snapshot_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("fk_ingestion_runs_snapshot_id", "ingestion_runs", type_="foreignkey")
+    op.drop_column("ingestion_runs", "snapshot_id")
+    op.drop_column("dataset_snapshots", "content_sha256")
@@ -13,6 +13,7 @@ from app.models.alert_rule import AlertRule
 from app.models.user import User
 from app.schemas.alerts import AlertEventCreate, AlertEventOut, AlertRuleCreate, AlertRuleOut
 from app.services.dataset_access import get_owned_dataset
+from app.services.risk_cache import invalidate_dataset_risk
 
 router = APIRouter(prefix="/datasets/{dataset_id}/alerts", tags=["alerts"])
 
@@ -92,5 +93,6 @@ def create_event(
     )
     db.add(ev)
     db.commit()
+    invalidate_dataset_risk(dataset_id)
     db.refresh(ev)
     return ev
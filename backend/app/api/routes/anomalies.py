@@ -7,6 +7,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user
+from app.core.config import get_settings
 from app.db.session import get_db
 from app.models.dataset_anomaly_event import DatasetAnomalyEvent
 from app.models.user import User
@@ -20,7 +21,7 @@ router = APIRouter(prefix="/datasets/{dataset_id}/anomalies", tags=["anomalies"]
 def detect_anomaly(
     dataset_id: UUID,
     metric: str = Query(default="risk_score"),
-    window: int = Query(default=20, ge=5, le=200),
+    window: int = Query(default=20, ge=5, le=get_settings().anomaly_window_max),
     z: float = Query(default=3.0, gt=0.0, lt=20.0),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
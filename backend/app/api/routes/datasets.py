@@ -7,6 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session, joinedload
 
 from app.api.deps import get_current_user
+from app.core.config import get_settings
 from app.db.session import get_db
 from app.models import Dataset, DatasetColumn
 from app.models.dataset_preview import DatasetPreview
@@ -57,7 +58,7 @@ def get_dataset(
 @router.get("/{dataset_id}/preview", response_model=DatasetPreviewOut)
 def get_dataset_preview(
     dataset_id: uuid.UUID,
-    limit: int = Query(50, ge=1, le=200),
+    limit: int = Query(50, ge=1, le=get_settings().preview_rows_max),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> DatasetPreviewOut:
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user
+from app.db.session import get_db
+from app.models.user import User
+from app.services.dataset_access import get_owned_dataset
+from app.services.drift_engine import compute_dataset_drift
+
+router = APIRouter(prefix="/datasets", tags=["drift"])
+
+
+@router.get("/{dataset_id}/drift")
+def get_dataset_drift(
+    dataset_id: UUID,
+    reference_snapshot_id: Optional[UUID] = Query(
+        default=None, description="Snapshot to compare against (default: the previous one)"
+    ),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    get_owned_dataset(db, dataset_id, current_user.id)
+    report = compute_dataset_drift(db, dataset_id, reference_snapshot_id=reference_snapshot_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Reference snapshot not found")
+    return report.to_dict()
@@ -1,282 +1,215 @@
 from __future__ import annotations
 
+import importlib.util
 import uuid
 from datetime import datetime, timezone
-from io import BytesIO
+from pathlib import Path
+import shutil
 from typing import Any
 import time
 import logging
-import math
 
-import pandas as pd
-from pandas.api.types import is_numeric_dtype
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Response, UploadFile
 from sqlalchemy.orm import Session
 from app.api.deps import get_current_user
-from app.models import (
-    Dataset,
-    DatasetSnapshot,
-    IngestionRun,
-    SnapshotColumn,
-    SnapshotStatistics,
-)
-from app.models.dataset_preview import DatasetPreview
+from app.core.config import get_settings
+from app.models import Dataset, DatasetSnapshot, IngestionRun
 from app.models.user import User
-from app.services.alert_engine import evaluate_dataset_rules
 from app.services.dataset_access import get_owned_dataset
+from app.services.ingestion_pipeline import (
+    IngestionInputError,
+    ParsedUpload,
+    create_snapshot,
+    evaluate_rules_after_ingest,
+    find_duplicate_snapshot,
+    mark_run_completed,
+    mark_run_failed,
+    merge_previous_snapshot,
+    parse_arrow_upload,
+    parse_csv_upload,
+    persist_column_profiles,
+    sha256_fileobj,
+    upload_size,
+)
+from app.services.ingest_executor import run_in_ingest_pool
+from app.services.preview import preview_row_limit
+from app.services.risk_cache import invalidate_dataset_risk
 
 from app.db.session import get_db
 
 logger = logging.getLogger("insightsentinel")
 
 router = APIRouter(prefix="/ingest", tags=["ingest"])
-PREVIEW_ROWS = 50
 
 
-def _safe_float(x: Any) -> float | None:
-    """Convert numpy/pandas scalars to plain float, returning None for NaN/inf."""
-    if x is None:
-        return None
-    try:
-        v = float(x)
-        if math.isnan(v) or math.isinf(v):
-            return None
-        return v
-    except Exception:
-        return None
+def _resolve_dataset(
+    db: Session,
+    dataset_id: uuid.UUID | None,
+    dataset_name: str | None,
+    description: str,
+    current_user: User,
+    preview_rows: int | None = None,
+) -> Dataset:
+    if preview_rows is not None and not (1 <= preview_rows <= get_settings().preview_rows_max):
+        raise HTTPException(
+            status_code=400,
+            detail=f"preview_rows must be between 1 and {get_settings().preview_rows_max}",
+        )
 
+    # STEP 1: resolve monitored dataset mode
+    if dataset_id is not None:
+        dataset = get_owned_dataset(db, dataset_id, current_user.id)
+        if preview_rows is not None:
+            dataset.preview_rows = preview_rows
+        return dataset
+
+    dataset_name_clean = (dataset_name or "").strip()
+    if not dataset_name_clean:
+        raise HTTPException(
+            status_code=400,
+            detail="Either dataset_id or dataset_name is required",
+        )
 
-def _compute_numeric_stats(s: pd.Series) -> dict[str, Any] | None:
-    """
-    Compute mean/std/min/max + IQR outliers for a numeric series.
-    Returns None if not enough numeric data.
-    """
-    # Drop NaNs
-    x = s.dropna()
-    if x.empty:
-        return None
-
-    # Need at least 2 points for std; for outliers IQR works better with >= 4
-    mean_v = _safe_float(x.mean())
-    std_v = _safe_float(x.std(ddof=1)) if len(x) >= 2 else None
-    min_v = _safe_float(x.min())
-    max_v = _safe_float(x.max())
-    skew_v = _safe_float(x.skew()) if len(x) >= 3 else None
-    kurt_v = _safe_float(x.kurt()) if len(x) >= 4 else None
-
-    outlier_count = None
-    outlier_ratio = None
-
-    if len(x) >= 4:
-        q1 = _safe_float(x.quantile(0.25))
-        q3 = _safe_float(x.quantile(0.75))
-        if q1 is not None and q3 is not None:
-            iqr = q3 - q1
-            # If iqr == 0, all values essentially same -> no outliers
-            if iqr > 0:
-                lower = q1 - 1.5 * iqr
-                upper = q3 + 1.5 * iqr
-                oc = int(((x < lower) | (x > upper)).sum())
-                outlier_count = oc
-                outlier_ratio = _safe_float(oc / len(x)) if len(x) > 0 else None
-            else:
-                outlier_count = 0
-                outlier_ratio = 0.0
+    dataset = Dataset(
+        id=uuid.uuid4(),  # client-side id: flushed together with the snapshot/run
+        name=dataset_name_clean,
+        description=description,
+        row_count=0,
+        column_count=0,
+        preview_rows=preview_rows,
+        owner_id=current_user.id,
+    )
+    db.add(dataset)
+    return dataset
 
-    return {
-        "mean": mean_v,
-        "std": std_v,
-        "min": min_v,
-        "max": max_v,
-        "outlier_count": outlier_count,
-        "outlier_ratio": outlier_ratio,
-        "skewness": skew_v,
-        "kurtosis": kurt_v,
-    }
 
+def _spool_upload(file: UploadFile, name: str) -> Path:
+    """Copy an upload into the shared spool dir in 1 MiB blocks."""
+    spool_dir = Path(get_settings().ingest_spool_dir)
+    spool_dir.mkdir(parents=True, exist_ok=True)
 
-@router.post("/csv")
-async def ingest_csv(
-    dataset_name: str | None = Form(None),
-    dataset_id: uuid.UUID | None = Form(None),
-    description: str = Form(""),
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> dict[str, Any]:
-    started_wall = datetime.now(timezone.utc)
-    started_mono = time.monotonic()
+    spool_path = spool_dir / name
+    with open(spool_path, "wb") as out:
+        shutil.copyfileobj(file.file, out, length=1024 * 1024)
+    return spool_path
 
-    raw = await file.read()
-    if not raw:
-        raise HTTPException(status_code=400, detail="Empty file")
 
-    try:
-        df = pd.read_csv(BytesIO(raw))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid CSV: {type(e).__name__}: {e}")
-
-    if df.shape[1] == 0:
-        raise HTTPException(status_code=400, detail="CSV has no columns")
+def _enqueue_upload(
+    db: Session,
+    dataset: Dataset,
+    file: UploadFile,
+    fmt: str,
+    options: dict[str, Any],
+) -> IngestionRun:
+    """
+    Spool the upload to the shared spool dir and queue an IngestionRun in status
+    `created`; an ingest worker claims it and drives profiling -> completed|failed.
+    """
+    run_id = uuid.uuid4()
+    spool_path = _spool_upload(file, f"{run_id}.{fmt}")
 
-    row_count = int(df.shape[0])
-    column_count = int(df.shape[1])
+    run = IngestionRun(
+        id=run_id,
+        dataset_id=dataset.id,
+        status="created",
+        message="Ingestion queued",
+        source_file=file.filename,
+        spool_path=str(spool_path),
+        options={"format": fmt, **options},
+    )
+    db.add(run)
+    try:
+        db.commit()
+    except Exception:
+        spool_path.unlink(missing_ok=True)
+        raise
+    db.refresh(run)
+    return run
 
-    # STEP 1: resolve monitored dataset mode
-    if dataset_id is not None:
-        dataset = get_owned_dataset(db, dataset_id, current_user.id)
-        # Keep root-level counters aligned with the latest snapshot for backward compatibility.
-        dataset.row_count = row_count
-        dataset.column_count = column_count
-        db.add(dataset)
-    else:
-        dataset_name_clean = (dataset_name or "").strip()
-        if not dataset_name_clean:
-            raise HTTPException(
-                status_code=400,
-                detail="Either dataset_id or dataset_name is required",
-            )
 
-        dataset = Dataset(
-            name=dataset_name_clean,
-            description=description,
-            row_count=row_count,
-            column_count=column_count,
-            owner_id=current_user.id,
-        )
-        db.add(dataset)
+def _queued_response(response: Response, dataset: Dataset, run: IngestionRun) -> dict[str, Any]:
+    response.status_code = 202
+    return {
+        "dataset_id": str(dataset.id),
+        "run_id": str(run.id),
+        "name": dataset.name,
+        "description": dataset.description,
+        "status": run.status,
+        "message": run.message,
+    }
 
-    db.flush()  # dataset.id available
 
-    snapshot = DatasetSnapshot(
+def _complete_duplicate(
+    db: Session,
+    dataset: Dataset,
+    snapshot: DatasetSnapshot,
+    source_file: str | None,
+    started_wall: datetime,
+    started_mono: float,
+) -> dict[str, Any]:
+    """
+    Byte-identical re-upload of the latest snapshot: record a completed run that
+    references it and skip parsing, profiling and the alert pass.
+    """
+    run = IngestionRun(
+        id=uuid.uuid4(),
         dataset_id=dataset.id,
-        row_count=row_count,
-        column_count=column_count,
-        source_file=file.filename,
-    )
-    db.add(snapshot)
-    db.flush()  # snapshot.id available
-
-    # PREVIEW: persist first N rows now (JSON-safe: no NaN/Infinity)
-    preview_df = df.head(PREVIEW_ROWS).copy()
-
-    # Convert pandas/NumPy scalars -> plain python types and replace NaN/Inf -> None
-    preview_rows: list[dict[str, Any]] = []
-    for rec in preview_df.to_dict(orient="records"):
-        clean: dict[str, Any] = {}
-        for k, v in rec.items():
-            if v is None:
-                clean[k] = None
-                continue
-
-            # pandas missing values
-            if pd.isna(v):
-                clean[k] = None
-                continue
-
-            # convert numpy scalars to python scalars
-            if hasattr(v, "item"):
-                try:
-                    v = v.item()
-                except Exception:
-                    pass
-
-            # disallow NaN/Inf (can appear after .item())
-            if isinstance(v, float) and (math.isnan(v) or math.isinf(v)):
-                clean[k] = None
-            else:
-                clean[k] = v
-        preview_rows.append(clean)
-
-    existing_preview = (
-        db.query(DatasetPreview)
-        .filter(DatasetPreview.dataset_id == dataset.id)
-        .first()
+        started_at=started_wall,
+        source_file=source_file,
     )
-    if existing_preview:
-        existing_preview.rows = preview_rows
-        db.add(existing_preview)
-    else:
-        db.add(DatasetPreview(dataset_id=dataset.id, rows=preview_rows))
+    mark_run_completed(run, started_mono, snapshot=snapshot, deduplicated=True)
+    db.add(run)
 
-    # STEP 2: create run early
+    result: dict[str, Any] = {
+        "dataset_id": str(dataset.id),
+        "snapshot_id": str(snapshot.id),
+        "run_id": str(run.id),
+        "name": dataset.name,
+        "description": dataset.description,
+        "row_count": dataset.row_count,
+        "column_count": dataset.column_count,
+        "status": run.status,
+        "message": run.message,
+        "duration_ms": run.duration_ms,
+        "deduplicated": True,
+        "alerts_created": 0,
+    }
+    db.commit()
+    return result
+
+
+def _ingest_parsed(
+    db: Session,
+    dataset: Dataset,
+    parsed: ParsedUpload,
+    source_file: str | None,
+    content_sha256: str | None,
+    started_wall: datetime,
+    started_mono: float,
+    append: bool = False,
+) -> dict[str, Any]:
+    snapshot = create_snapshot(db, dataset, parsed, source_file, update_preview=not append)
+
+    # STEP 2: the run is born in `profiling`; dataset, snapshot, run and all
+    # column rows are written in a single transaction.
     run = IngestionRun(
+        id=uuid.uuid4(),
         dataset_id=dataset.id,
-        status="created",
-        message="Ingestion created",
+        status="profiling",
+        message="Profiling started",
         started_at=started_wall,
+        source_file=source_file,
     )
     db.add(run)
-    db.commit()
-    db.refresh(dataset)
-    db.refresh(run)
 
     try:
-        # move to profiling
-        run.status = "profiling"
-        run.message = "Profiling started"
-        db.add(run)
-        db.commit()
-        db.refresh(run)
-
-        # STEP 3: create columns + stats
-        for col in df.columns:
-            s = df[col]
-
-            null_count = int(s.isna().sum())
-            distinct_count = int(s.dropna().astype(str).nunique())
-
-            col_obj = SnapshotColumn(
-                snapshot_id=snapshot.id,
-                name=str(col),
-                dtype=str(s.dtype),
-                null_count=null_count,
-                distinct_count=distinct_count,
-            )
-            db.add(col_obj)
-            db.flush()  # col_obj.id available
-
-            # Stats only for numeric columns
-            if is_numeric_dtype(s):
-                stats = _compute_numeric_stats(s)
-                if stats is not None:
-                    db.add(
-                        SnapshotStatistics(
-                            snapshot_column_id=col_obj.id,
-                            mean=stats["mean"],
-                            std=stats["std"],
-                            min=stats["min"],
-                            max=stats["max"],
-                            outlier_count=stats["outlier_count"],
-                            outlier_ratio=stats["outlier_ratio"],
-                            skewness=stats["skewness"],
-                            kurtosis=stats.get("kurtosis"),
-                        )
-                    )
-
-        # finalize run
-        finished_wall = datetime.now(timezone.utc)
-        duration_ms = int((time.monotonic() - started_mono) * 1000)
-
-        run.status = "completed"
-        run.message = "Ingestion completed successfully"
-        run.completed_at = finished_wall
-        run.duration_ms = duration_ms
-        run.error_message = None
-
-        db.add(run)
-        db.commit()
-        db.refresh(run)
+        # STEP 3: create columns + stats. The savepoint lets a profiling failure
+        # roll back just the column rows and still record the failed run.
+        with db.begin_nested():
+            persist_column_profiles(db, snapshot, parsed, content_sha256)
+            mark_run_completed(run, started_mono, snapshot=snapshot)
 
-        alerts_created = 0
-        try:
-            summary = evaluate_dataset_rules(db, dataset.id)
-            alerts_created = int(summary.created_events)
-        except Exception:
-            db.rollback()
-            logger.exception("Alert rule evaluation failed after ingestion for dataset_id=%s", dataset.id)
-
-        return {
+        result: dict[str, Any] = {
             "dataset_id": str(dataset.id),
             "snapshot_id": str(snapshot.id),
             "run_id": str(run.id),
@@ -287,25 +220,199 @@ async def ingest_csv(
             "status": run.status,
             "message": run.message,
             "duration_ms": run.duration_ms,
-            "alerts_created": alerts_created,
+            "deduplicated": False,
         }
+        db.commit()
+        invalidate_dataset_risk(dataset.id)
 
     except Exception as e:
         logger.exception("Ingestion failed")
+        mark_run_failed(db, run, e, started_mono)
+        raise HTTPException(status_code=500, detail=f"Ingestion failed: {type(e).__name__}: {e}")
+
+    result["alerts_created"] = evaluate_rules_after_ingest(db, dataset.id)
+    return result
+
+
+def _ingest_csv(
+    response: Response,
+    dataset_name: str | None,
+    dataset_id: uuid.UUID | None,
+    description: str,
+    streaming: bool | None,
+    background: bool,
+    append: bool,
+    preview_rows: int | None,
+    file: UploadFile,
+    db: Session,
+    current_user: User,
+) -> dict[str, Any]:
+    started_wall = datetime.now(timezone.utc)
+    started_mono = time.monotonic()
 
-        finished_wall = datetime.now(timezone.utc)
-        duration_ms = int((time.monotonic() - started_mono) * 1000)
+    if append and dataset_id is None:
+        raise HTTPException(status_code=400, detail="Append mode requires dataset_id")
 
-        # best-effort failure record
+    # UploadFile is already spooled to disk past a small threshold; read from it
+    # directly instead of materializing the whole body as bytes.
+    upload = file.file
+    size_bytes = upload_size(upload)
+    if size_bytes == 0:
+        raise HTTPException(status_code=400, detail="Empty file")
+
+    dataset = _resolve_dataset(
+        db, dataset_id, dataset_name, description, current_user, preview_rows
+    )
+
+    # An appended delta is new rows, never a re-upload of the latest snapshot,
+    # so content dedupe only applies to full uploads.
+    content_sha256 = None
+    if not append:
+        content_sha256 = sha256_fileobj(upload)
+        duplicate = find_duplicate_snapshot(db, dataset.id, content_sha256)
+        if duplicate is not None:
+            return _complete_duplicate(db, dataset, duplicate, file.filename, started_wall, started_mono)
+
+    if background:
+        run = _enqueue_upload(
+            db,
+            dataset,
+            file,
+            "csv",
+            {"streaming": streaming, "sha256": content_sha256, "append": append},
+        )
+        return _queued_response(response, dataset, run)
+
+    try:
+        parsed = parse_csv_upload(
+            upload,
+            size_bytes,
+            # merging needs the mergeable accumulators of the streaming path
+            streaming=True if append else streaming,
+            preview_rows=preview_row_limit(dataset),
+        )
+        if append:
+            merge_previous_snapshot(db, dataset, parsed)
+    except IngestionInputError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return _ingest_parsed(
+        db, dataset, parsed, file.filename, content_sha256, started_wall, started_mono, append
+    )
+
+
+def _ingest_arrow(
+    fmt: str,
+    response: Response,
+    dataset_name: str | None,
+    dataset_id: uuid.UUID | None,
+    description: str,
+    background: bool,
+    preview_rows: int | None,
+    file: UploadFile,
+    db: Session,
+    current_user: User,
+) -> dict[str, Any]:
+    """
+    Parquet / Arrow IPC ingestion. The upload is spooled to disk so pyarrow can
+    memory-map it, then profiled on Arrow arrays into the same snapshot rows.
+    """
+    if importlib.util.find_spec("pyarrow") is None:
+        raise HTTPException(status_code=501, detail=f"{fmt} ingestion requires pyarrow")
+
+    started_wall = datetime.now(timezone.utc)
+    started_mono = time.monotonic()
+
+    if upload_size(file.file) == 0:
+        raise HTTPException(status_code=400, detail="Empty file")
+
+    dataset = _resolve_dataset(
+        db, dataset_id, dataset_name, description, current_user, preview_rows
+    )
+
+    content_sha256 = sha256_fileobj(file.file)
+    duplicate = find_duplicate_snapshot(db, dataset.id, content_sha256)
+    if duplicate is not None:
+        return _complete_duplicate(db, dataset, duplicate, file.filename, started_wall, started_mono)
+
+    if background:
+        run = _enqueue_upload(db, dataset, file, fmt, {"sha256": content_sha256})
+        return _queued_response(response, dataset, run)
+
+    spool_path = _spool_upload(file, f"{uuid.uuid4()}.{fmt}")
+    try:
         try:
-            run.status = "failed"
-            run.message = "Ingestion failed"
-            run.error_message = f"{type(e).__name__}: {e}"
-            run.completed_at = finished_wall
-            run.duration_ms = duration_ms
-            db.add(run)
-            db.commit()
-        except Exception:
+            parsed = parse_arrow_upload(
+                str(spool_path), fmt, preview_rows=preview_row_limit(dataset)
+            )
+        except IngestionInputError as e:
             db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
 
-        raise HTTPException(status_code=500, detail=f"Ingestion failed: {type(e).__name__}: {e}")
+        return _ingest_parsed(
+            db, dataset, parsed, file.filename, content_sha256, started_wall, started_mono
+        )
+    finally:
+        spool_path.unlink(missing_ok=True)
+
+
+@router.post("/csv")
+async def ingest_csv(
+    response: Response,
+    dataset_name: str | None = Form(None),
+    dataset_id: uuid.UUID | None = Form(None),
+    description: str = Form(""),
+    streaming: bool | None = Form(None),
+    background: bool = Form(False),
+    append: bool = Form(False),
+    preview_rows: int | None = Form(None),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> dict[str, Any]:
+    # Only the multipart upload is read on the event loop; parsing, profiling
+    # and DB work run on the bounded ingest pool.
+    return await run_in_ingest_pool(
+        _ingest_csv,
+        response, dataset_name, dataset_id, description, streaming,
+        background, append, preview_rows, file, db, current_user,
+    )
+
+
+@router.post("/parquet")
+async def ingest_parquet(
+    response: Response,
+    dataset_name: str | None = Form(None),
+    dataset_id: uuid.UUID | None = Form(None),
+    description: str = Form(""),
+    background: bool = Form(False),
+    preview_rows: int | None = Form(None),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> dict[str, Any]:
+    return await run_in_ingest_pool(
+        _ingest_arrow,
+        "parquet", response, dataset_name, dataset_id, description,
+        background, preview_rows, file, db, current_user,
+    )
+
+
+@router.post("/arrow")
+async def ingest_arrow(
+    response: Response,
+    dataset_name: str | None = Form(None),
+    dataset_id: uuid.UUID | None = Form(None),
+    description: str = Form(""),
+    background: bool = Form(False),
+    preview_rows: int | None = Form(None),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> dict[str, Any]:
+    return await run_in_ingest_pool(
+        _ingest_arrow,
+        "arrow", response, dataset_name, dataset_id, description,
+        background, preview_rows, file, db, current_user,
+    )
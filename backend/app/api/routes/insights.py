@@ -41,11 +41,13 @@ def get_dataset_insights(
             {
                 "dataset_id": r.dataset_id,
                 "column_id": r.column_id,
+                "column_name": r.column_name,
                 "severity": r.severity,
                 "code": r.code,
                 "title": r.title,
                 "message": r.message,
                 "created_at": r.created_at,
+                "updated_at": r.updated_at,
             }
             for r in items
         ],
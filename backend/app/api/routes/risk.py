@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+from datetime import datetime, timedelta
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import desc
 from sqlalchemy.orm import Session
 
@@ -10,9 +12,20 @@ from app.api.deps import get_current_user
 from app.db.session import get_db
 from app.models.dataset_risk_history import DatasetRiskHistory
 from app.models.user import User
+from app.schemas.risk import RiskReplayParams
 from app.services.anomaly_engine import detect_latest_zscore_anomaly
 from app.services.dataset_access import get_owned_dataset
-from app.services.risk_engine import compute_dataset_risk, track_dataset_risk
+from app.services.risk_history import (
+    DOWNSAMPLE_METHODS,
+    LTTB_METRICS,
+    MAX_HISTORY_BUCKETS,
+    as_utc,
+    bucketed_history,
+    history_bounds,
+    lttb_history,
+)
+from app.services.risk_replay import ReplayParams, replay_dataset_risk
+from app.services.risk_engine import get_dataset_risk as get_cached_dataset_risk, track_dataset_risk
 
 router = APIRouter(prefix="/datasets", tags=["risk"])
 
@@ -24,7 +37,7 @@ def get_dataset_risk(
     current_user: User = Depends(get_current_user),
 ):
     get_owned_dataset(db, dataset_id, current_user.id)
-    res = compute_dataset_risk(db, dataset_id)
+    res = get_cached_dataset_risk(db, dataset_id)
     if res is None:
         raise HTTPException(status_code=404, detail="Dataset not found")
 
@@ -81,23 +94,79 @@ def track_risk(
     }
 
 
+@router.post("/{dataset_id}/risk/replay")
+def replay_risk(
+    dataset_id: UUID,
+    payload: RiskReplayParams,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Dry-run replay of the stored risk history with what-if constants; writes nothing."""
+    get_owned_dataset(db, dataset_id, current_user.id)
+    overrides = payload.model_dump(exclude={"include_series"}, exclude_none=True)
+    try:
+        params = ReplayParams.with_overrides(overrides)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    res = replay_dataset_risk(db, dataset_id, params)
+    if res is None:
+        return {"dataset_id": str(dataset_id), "rows": 0, "changed_rows": 0, "series": []}
+    return res.to_dict(include_series=payload.include_series)
+
+
 @router.get("/{dataset_id}/risk/history")
 def risk_history(
     dataset_id: UUID,
     limit: int = 100,
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+    buckets: Optional[int] = Query(None, ge=1, description="Downsample to at most this many points (bucket: one more when aligned to hour/day)"),
+    method: str = Query("bucket", description="bucket (date_bin aggregates) | lttb (representative rows)"),
+    metric: str = Query("smoothed_score", description="Series LTTB preserves: smoothed_score | risk_score"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     get_owned_dataset(db, dataset_id, current_user.id)
+    # Naive bounds are UTC; history timestamps and history_bounds are aware
+    from_, to = as_utc(from_), as_utc(to)
+
+    if buckets is not None:
+        if method not in DOWNSAMPLE_METHODS:
+            raise HTTPException(status_code=422, detail=f"method must be one of {list(DOWNSAMPLE_METHODS)}")
+        if metric not in LTTB_METRICS:
+            raise HTTPException(status_code=422, detail=f"metric must be one of {list(LTTB_METRICS)}")
+        buckets = min(int(buckets), MAX_HISTORY_BUCKETS)
+
+        start, end = from_, to
+        if start is None or end is None:
+            lo, hi = history_bounds(db, dataset_id)
+            start = start or lo
+            end = end or (hi + timedelta(microseconds=1) if hi is not None else None)
+        if start is None or end is None or end <= start:
+            points: dict = {"method": method, "points": []}
+        elif method == "lttb":
+            points = lttb_history(db, dataset_id, start, end, buckets, metric=metric)
+        else:
+            points = bucketed_history(db, dataset_id, start, end, buckets)
+
+        return {
+            "dataset_id": str(dataset_id),
+            "from": start,
+            "to": end,
+            "buckets": buckets,
+            "count": len(points["points"]),
+            **points,
+        }
+
     limit = max(1, min(int(limit), 500))
 
-    rows = (
-        db.query(DatasetRiskHistory)
-        .filter(DatasetRiskHistory.dataset_id == dataset_id)
-        .order_by(desc(DatasetRiskHistory.created_at))
-        .limit(limit)
-        .all()
-    )
+    q = db.query(DatasetRiskHistory).filter(DatasetRiskHistory.dataset_id == dataset_id)
+    if from_ is not None:
+        q = q.filter(DatasetRiskHistory.created_at >= from_)
+    if to is not None:
+        q = q.filter(DatasetRiskHistory.created_at < to)
+    rows = q.order_by(desc(DatasetRiskHistory.created_at)).limit(limit).all()
 
     return {
         "dataset_id": str(dataset_id),
@@ -39,6 +39,8 @@ def get_run(
         "started_at": run.started_at.isoformat() if run.started_at else None,
         "completed_at": run.completed_at.isoformat() if run.completed_at else None,
         "duration_ms": run.duration_ms,
+        "source_file": run.source_file,
+        "snapshot_id": str(run.snapshot_id) if run.snapshot_id else None,
         "created_at": run.created_at.isoformat() if run.created_at else None,
     }
 
@@ -71,6 +73,8 @@ def list_runs(
             "started_at": r.started_at.isoformat() if r.started_at else None,
             "completed_at": r.completed_at.isoformat() if r.completed_at else None,
             "duration_ms": r.duration_ms,
+            "source_file": r.source_file,
+            "snapshot_id": str(r.snapshot_id) if r.snapshot_id else None,
             "created_at": r.created_at.isoformat() if r.created_at else None,
         }
         for r in runs
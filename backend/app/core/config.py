@@ -30,6 +30,70 @@ class Settings(BaseSettings):
     # Scheduler
     enable_scheduler: bool = True
     scheduler_interval_minutes: int = 10
+    # Datasets scored per compute_dataset_risk_batch call during a tick
+    risk_batch_size: int = 500
+
+    # Risk results are cached per dataset until its signal watermark changes
+    # or the TTL lapses; risk_cache_url (redis://...) adds a shared backend
+    risk_cache_max_entries: int = 10_000
+    risk_cache_ttl_seconds: int = 300
+    risk_cache_url: str | None = None
+
+    # Risk history, alert events and anomaly events are partitioned by month;
+    # a daily maintenance job creates partitions ahead and drops expired ones.
+    # Raw risk history past its retention is rolled up (hourly + daily) first.
+    # A retention of 0 keeps everything.
+    partition_months_ahead: int = 3
+    partition_maintenance_interval_hours: int = 24
+    risk_history_raw_retention_days: int = 180
+    risk_history_hourly_retention_days: int = 730
+    alert_event_retention_days: int = 365
+    anomaly_event_retention_days: int = 365
+
+    # Largest z-score window (points) a rolling anomaly baseline may hold;
+    # every tracked point rewrites each baseline's ring (8 bytes per point)
+    anomaly_window_max: int = 1000
+
+    # Ingestion
+    ingest_stream_threshold_bytes: int = 64 * 1024 * 1024
+    ingest_chunk_rows: int = 100_000
+    # Request-path ingestion runs on a bounded thread pool; uploads beyond
+    # concurrency + queued slots get 429 with Retry-After
+    ingest_max_concurrency: int = 2
+    ingest_max_queued: int = 4
+    ingest_retry_after_seconds: int = 10
+
+    # Parquet/Arrow IPC uploads are read from the spooled file via mmap
+    ingest_arrow_memory_map: bool = True
+
+    # Parallel column profiling: frames with at least this many numeric columns
+    # are split across a process pool of profile_parallel_workers (<= 1 disables)
+    profile_parallel_workers: int = 4
+    profile_parallel_min_columns: int = 256
+
+    # Stored preview rows per dataset (Dataset.preview_rows overrides the default)
+    preview_rows_default: int = 50
+    preview_rows_max: int = 10_000
+
+    # Distinct counts: exact | approx | auto (exact up to distinct_exact_limit values, then HLL)
+    distinct_count_mode: str = "auto"
+    distinct_exact_limit: int = 100_000
+    distinct_approx_error: float = 0.02
+
+    # Per-column KLL quantile sketch size; rank error is roughly 1/k, memory O(k)
+    quantile_sketch_k: int = 400
+    # Distribution summaries persisted per snapshot for drift detection:
+    # fixed-bin histogram for numeric columns, top-k frequencies for text columns
+    histogram_bins: int = 20
+    top_k_values: int = 20
+
+    # Background ingestion workers
+    ingest_spool_dir: str = "/tmp/insightsentinel/spool"
+    ingest_worker_processes: int = 2
+    ingest_worker_poll_seconds: float = 2.0
+    # A claimed run whose heartbeat is older than this is reclaimed
+    ingest_claim_timeout_minutes: int = 5
+    ingest_heartbeat_seconds: float = 30.0
 
     @property
     def postgres_dsn(self) -> str:
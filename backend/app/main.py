@@ -7,6 +7,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import get_settings
 from app.core.logging import setup_logging
 from app.api.routes.datasets import router as datasets_router
+from app.api.routes.drift import router as drift_router
 from app.api.routes.ingest import router as ingest_router
 from app.api.routes.insights import router as insights_router
 from app.api.routes.runs import router as runs_router
@@ -18,6 +19,7 @@ from app.api.routes.auth import router as auth_router
 from app.api.routes.health import router as health_router
 from app.api.routes.portfolio import router as portfolio_router
 from app.api.routes.risk import router as risk_router
+from app.services.ingest_executor import shutdown_ingest_pool
 from app.services.scheduler import start_scheduler, shutdown_scheduler
 
 settings = get_settings()
@@ -54,6 +56,7 @@ app.include_router(auth_router)
 app.include_router(health_router)
 app.include_router(portfolio_router)
 app.include_router(risk_router)
+app.include_router(drift_router)
 
 
 @app.on_event("startup")
@@ -64,6 +67,7 @@ def on_startup():
 @app.on_event("shutdown")
 def on_shutdown():
     shutdown_scheduler()
+    shutdown_ingest_pool()
 
 
 @app.get("/health")
@@ -10,7 +10,10 @@ from app.models.dataset_insight import DatasetInsight
 from app.models.alert_rule import AlertRule
 from app.models.alert_event import AlertEvent
 from app.models.dataset_risk_history import DatasetRiskHistory
+from app.models.dataset_risk_state import DatasetRiskState
+from app.models.dataset_risk_rollup import DatasetRiskDaily, DatasetRiskHourly
 from app.models.dataset_anomaly_event import DatasetAnomalyEvent
+from app.models.dataset_anomaly_baseline import DatasetAnomalyBaseline
 from app.models.user import User
 __all__ = [
     "Dataset",
@@ -25,7 +28,11 @@ __all__ = [
     "AlertRule",
     "AlertEvent",
     "DatasetRiskHistory",
+    "DatasetRiskState",
+    "DatasetRiskHourly",
+    "DatasetRiskDaily",
     "DatasetAnomalyEvent",
+    "DatasetAnomalyBaseline",
     "User",
 ]
 
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import uuid
 
-from sqlalchemy import Column, DateTime, ForeignKey, String, func
+from sqlalchemy import Column, DateTime, ForeignKey, Index, String, func
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 
@@ -11,6 +11,8 @@ from app.db.base import Base
 
 class AlertEvent(Base):
     __tablename__ = "alert_events"
+    # Monthly range partitions on created_at (see app/services/partition_maintenance.py)
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
@@ -38,7 +40,16 @@ class AlertEvent(Base):
     # extra structured context (values, thresholds, counts, etc.)
     payload = Column(JSONB, nullable=True)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Partition key, so part of the primary key
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, primary_key=True)
 
     dataset = relationship("Dataset")
     rule = relationship("AlertRule")
+
+
+# 24h alert counts and rule cooldowns: dataset first, then a recent created_at range
+Index(
+    "ix_alert_events_dataset_id_created_at",
+    AlertEvent.dataset_id,
+    AlertEvent.created_at,
+)
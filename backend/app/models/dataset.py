@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import uuid
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -18,9 +18,23 @@ class Dataset(Base):
 
     row_count = Column(Integer, nullable=False, default=0)
     column_count = Column(Integer, nullable=False, default=0)
+    # Rows kept in DatasetPreview; NULL means Settings.preview_rows_default
+    preview_rows = Column(Integer, nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
+    # Maintained by DB triggers: latest write that changes risk inputs (snapshot,
+    # insight, alert event) and latest risk history row.
+    last_signal_at = Column(DateTime(timezone=True), nullable=True)
+    last_risk_at = Column(DateTime(timezone=True), nullable=True)
+    # txid_current() of the transaction that last stamped last_signal_at (one stamp per transaction)
+    last_signal_txid = Column(BigInteger, nullable=True)
+    # Bumped by the same trigger once per writing transaction; risk_seq is the
+    # signal_seq a tracked risk read before its inputs. The scheduler only
+    # revisits datasets with signal_seq > risk_seq.
+    signal_seq = Column(BigInteger, nullable=False, default=0, server_default="0")
+    risk_seq = Column(BigInteger, nullable=True)
+
     owner_id = Column(
         UUID(as_uuid=True),
         ForeignKey("users.id", ondelete="CASCADE"),
@@ -49,3 +63,12 @@ class Dataset(Base):
         passive_deletes=True,
         uselist=False,
     )
+
+
+Index(
+    "ix_datasets_risk_dirty",
+    Dataset.last_signal_at,
+    postgresql_where=text(
+        "row_count > 0 AND (risk_seq IS NULL OR signal_seq > risk_seq)"
+    ),
+)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, func
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+
+from app.db.base import Base
+
+
+class DatasetAnomalyBaseline(Base):
+    """
+    Rolling z-score baseline for one dataset, metric and window size: the
+    previous `window_size` values in a ring buffer with their running sum and
+    sum of squares, plus the latest (not yet baselined) point. Updated when a
+    risk point is recorded, so detection reads one row instead of history.
+    """
+
+    __tablename__ = "dataset_anomaly_baselines"
+
+    dataset_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("datasets.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    metric = Column(String(50), primary_key=True)  # e.g. "risk_score"
+    window_size = Column(Integer, primary_key=True)
+
+    # Ring buffer of window_size slots; `head` is the next slot to overwrite
+    # (0-based), `count` how many slots hold values
+    ring = Column(ARRAY(Float), nullable=False)
+    head = Column(Integer, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+    value_sum = Column(Float, nullable=False, default=0.0)
+    value_sumsq = Column(Float, nullable=False, default=0.0)
+
+    # Point under evaluation; pushed into the ring when the next one arrives
+    latest_value = Column(Float, nullable=False)
+    latest_at = Column(DateTime(timezone=True), nullable=False)
+
+    # Latest anomaly event for dataset + metric (dedupe gate and cooldown)
+    last_event_at = Column(DateTime(timezone=True), nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
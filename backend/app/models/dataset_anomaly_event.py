@@ -10,6 +10,8 @@ from app.db.base import Base
 
 class DatasetAnomalyEvent(Base):
     __tablename__ = "dataset_anomaly_events"
+    # Monthly range partitions on created_at (see app/services/partition_maintenance.py)
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     dataset_id = Column(
@@ -25,7 +27,8 @@ class DatasetAnomalyEvent(Base):
     window = Column(Integer, nullable=False)
     threshold = Column(Float, nullable=False)
     direction = Column(String(10), nullable=True)  # "spike" / "drop"
-    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Partition key, so part of the primary key
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), primary_key=True)
 
 
 Index(
@@ -33,8 +33,15 @@ class DatasetInsight(Base):
     code = Column(String(64), nullable=False)  # e.g. HIGH_NULL_RATIO
     title = Column(String(200), nullable=False)
     message = Column(String(1000), nullable=False)
+    # column the insight is about (snapshot insights have no dataset column id)
+    column_name = Column(String(255), nullable=True)
+    # sha256 of code/column/severity/evidence; refresh only rewrites rows whose fingerprint changed
+    fingerprint = Column(String(64), nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
 
     dataset = relationship("Dataset")
     column = relationship("DatasetColumn")
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import uuid
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, func
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, func
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 
 from app.db.base import Base
@@ -10,6 +10,8 @@ from app.db.base import Base
 
 class DatasetRiskHistory(Base):
     __tablename__ = "dataset_risk_history"
+    # Monthly range partitions on created_at (see app/services/partition_maintenance.py)
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
@@ -27,4 +29,12 @@ class DatasetRiskHistory(Base):
     alpha = Column(Float, nullable=True)
     delta_score = Column(Float, nullable=True)
     accel_score = Column(Float, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Partition key, so part of the primary key
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, primary_key=True)
+
+
+Index(
+    "ix_dataset_risk_history_dataset_id_created_at",
+    DatasetRiskHistory.dataset_id,
+    DatasetRiskHistory.created_at,
+)
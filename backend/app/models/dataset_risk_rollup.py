@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import declared_attr
+
+from app.db.base import Base
+
+
+class _RiskRollupColumns:
+    """
+    Aggregates of dataset_risk_history rows whose raw partition has been
+    dropped. Sums and counts (not averages) so buckets merge exactly.
+    """
+
+    @declared_attr
+    def dataset_id(cls):
+        return Column(
+            UUID(as_uuid=True),
+            ForeignKey("datasets.id", ondelete="CASCADE"),
+            primary_key=True,
+        )
+
+    # date_bin start of the bucket (UTC-aligned)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+
+    row_count = Column(Integer, nullable=False)
+
+    risk_min = Column(Integer, nullable=False)
+    risk_max = Column(Integer, nullable=False)
+    risk_sum = Column(BigInteger, nullable=False)
+
+    # smoothed_score is nullable on history rows, so it carries its own count
+    smoothed_min = Column(Integer, nullable=True)
+    smoothed_max = Column(Integer, nullable=True)
+    smoothed_sum = Column(BigInteger, nullable=True)
+    smoothed_count = Column(Integer, nullable=False, default=0)
+
+    # Values of the bucket's latest row
+    last_at = Column(DateTime(timezone=True), nullable=False)
+    risk_last = Column(Integer, nullable=False)
+    risk_level_last = Column(String(20), nullable=False)
+    smoothed_last = Column(Integer, nullable=True)
+    delta_last = Column(Float, nullable=True)
+    accel_last = Column(Float, nullable=True)
+
+
+class DatasetRiskHourly(_RiskRollupColumns, Base):
+    __tablename__ = "dataset_risk_history_hourly"
+
+
+class DatasetRiskDaily(_RiskRollupColumns, Base):
+    __tablename__ = "dataset_risk_history_daily"
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base
+
+
+class DatasetRiskState(Base):
+    """
+    Rolling risk-tracking state, one row per dataset: everything
+    track_dataset_risk needs from earlier history rows and alerts, so a track
+    is one read plus one upsert instead of several history/alert lookups.
+    """
+
+    __tablename__ = "dataset_risk_state"
+
+    dataset_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("datasets.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    # Bumped on every write; the upsert only applies if it still matches the
+    # value read, so concurrent trackers cannot both append history
+    version = Column(Integer, nullable=False, default=0)
+
+    # Mirrors the latest history row
+    risk_score = Column(Integer, nullable=True)
+    risk_level = Column(String(20), nullable=True)
+    breakdown_hash = Column(String(64), nullable=True)  # sha256 of the stable breakdown JSON
+    smoothed_score = Column(Integer, nullable=True)
+    prev_smoothed_score = Column(Integer, nullable=True)  # from the history row before it
+    alpha = Column(Float, nullable=True)
+    delta_score = Column(Float, nullable=True)
+    accel_score = Column(Float, nullable=True)
+    tracked_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Cooldowns for the alerts raised by risk tracking
+    last_spike_alert_at = Column(DateTime(timezone=True), nullable=True)
+    last_accel_alert_at = Column(DateTime(timezone=True), nullable=True)
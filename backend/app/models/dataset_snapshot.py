@@ -2,9 +2,9 @@ from __future__ import annotations
 
 import uuid
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, LargeBinary, String, func
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from app.db.base import Base
 
@@ -24,6 +24,16 @@ class DatasetSnapshot(Base):
     row_count = Column(Integer, nullable=False)
     column_count = Column(Integer, nullable=False)
     source_file = Column(String(500), nullable=True)
+    # SHA-256 of the uploaded bytes; identical re-uploads reuse this snapshot
+    content_sha256 = Column(String(64), nullable=True)
+
+    # Exact full-file duplicate rows (NULL when unknown, e.g. an append onto a
+    # snapshot without row_hashes)
+    duplicate_row_count = Column(Integer, nullable=True)
+    duplicate_row_ratio = Column(Float, nullable=True)
+    # Distinct row hashes (sketches.pack_row_hashes) so appends count duplicates
+    # across uploads; NULL past distinct_exact_limit and for Parquet/Arrow uploads
+    row_hashes = deferred(Column(LargeBinary, nullable=True))
 
     created_at = Column(
         DateTime(timezone=True),
@@ -2,8 +2,8 @@ from __future__ import annotations
 
 import uuid
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, func, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -33,7 +33,32 @@ class IngestionRun(Base):
 
     duration_ms = Column(Integer, nullable=True)
 
+    source_file = Column(String(500), nullable=True)
+
+    # Snapshot produced (or reused, for a byte-identical re-upload) by this run
+    snapshot_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("dataset_snapshots.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+
+    # Background mode: upload spooled to disk, claimed by an ingest worker
+    spool_path = Column(String(1000), nullable=True)
+    options = Column(JSONB, nullable=True)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    # Refreshed by the claiming worker while it processes the run; a stale
+    # heartbeat (worker gone) lets another worker reclaim it
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # FIX: no trailing comma here
-    dataset = relationship("Dataset", back_populates="ingestion_runs")
\ No newline at end of file
+    dataset = relationship("Dataset", back_populates="ingestion_runs")
+
+
+Index(
+    "ix_ingestion_runs_queue",
+    IngestionRun.status,
+    IngestionRun.created_at,
+    postgresql_where=text("spool_path IS NOT NULL"),
+)
@@ -2,9 +2,9 @@ from __future__ import annotations
 
 import uuid
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, func
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, LargeBinary, String, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import deferred, relationship
 
 from app.db.base import Base
 
@@ -25,6 +25,22 @@ class SnapshotColumn(Base):
     dtype = Column(String(100), nullable=False)
     null_count = Column(Integer, nullable=False)
     distinct_count = Column(Integer, nullable=False)
+    # True when distinct_count is a HyperLogLog estimate rather than an exact count
+    distinct_is_approximate = Column(Boolean, nullable=False, server_default="false")
+    # Serialized HLL sketch (see app.services.sketches); mergeable across chunks/snapshots
+    distinct_sketch = deferred(Column(LargeBinary, nullable=True))
+
+    # Type-inference signals over every non-blank value of text columns
+    # (see app.services.type_inference); NULL for non-text columns.
+    text_value_count = Column(Integer, nullable=True)
+    numeric_parse_count = Column(Integer, nullable=True)
+    numeric_parse_ratio = Column(Float, nullable=True)
+    date_parse_count = Column(Integer, nullable=True)
+    date_parse_ratio = Column(Float, nullable=True)
+    future_date_count = Column(Integer, nullable=True)
+    date_format_counts = Column(JSONB, nullable=True)  # {"ISO": 120, "EU_SLASH": 3, ...}
+    # Most frequent values of text columns: {"total": n, "values": [[value, count], ...], "exact": bool}
+    top_values = Column(JSONB, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     snapshot = relationship("DatasetSnapshot")
@@ -2,9 +2,9 @@ from __future__ import annotations
 
 import uuid
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, func
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, LargeBinary, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import deferred, relationship
 
 from app.db.base import Base
 
@@ -22,6 +22,14 @@ class SnapshotStatistics(Base):
         index=True,
     )
 
+    # Sufficient statistics (finite-value count, sum, central moment sums M2..M4)
+    # so an append can merge into this row without the raw values
+    value_count = Column(Integer)
+    value_sum = Column(Float)
+    m2 = Column(Float)
+    m3 = Column(Float)
+    m4 = Column(Float)
+
     mean = Column(Float)
     std = Column(Float)
     min = Column(Float)
@@ -30,6 +38,15 @@ class SnapshotStatistics(Base):
     outlier_ratio = Column(Float)
     skewness = Column(Float)
     kurtosis = Column(Float)
+    p01 = Column(Float)
+    p05 = Column(Float)
+    p50 = Column(Float)
+    p95 = Column(Float)
+    p99 = Column(Float)
+    # Serialized KLL sketch (see app.services.sketches); mergeable across chunks/snapshots
+    quantile_sketch = deferred(Column(LargeBinary, nullable=True))
+    # Equal-width histogram over [min, max]: {"edges": [...], "counts": [...]}
+    histogram = Column(JSONB, nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
@@ -41,6 +41,7 @@ class DatasetListOut(BaseModel):
     description: str = ""
     row_count: int
     column_count: int
+    preview_rows: Optional[int] = None
     created_at: datetime
 
 
@@ -52,6 +53,7 @@ class DatasetOut(BaseModel):
     description: str = ""
     row_count: int
     column_count: int
+    preview_rows: Optional[int] = None
     created_at: datetime
 
     columns: list[DatasetColumnOut] = []
\ No newline at end of file
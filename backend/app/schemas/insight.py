@@ -9,11 +9,13 @@ from pydantic import BaseModel
 class DatasetInsightOut(BaseModel):
     dataset_id: uuid.UUID
     column_id: uuid.UUID | None = None
+    column_name: str | None = None
     severity: str
     code: str
     title: str
     message: str
     created_at: datetime | None = None
+    updated_at: datetime | None = None
 
 
 class DatasetInsightsResponseOut(BaseModel):
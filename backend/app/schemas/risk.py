@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class RiskReplayParams(BaseModel):
+    """What-if overrides for a risk history replay; omitted fields keep the live values."""
+
+    ema_alpha: Optional[float] = Field(None, gt=0.0, le=1.0)
+    alpha_min: Optional[float] = Field(None, ge=0.0, le=1.0)
+    alpha_max: Optional[float] = Field(None, ge=0.0, le=1.0)
+    track_interval_minutes: Optional[float] = Field(None, gt=0.0)
+    stale_after_minutes: Optional[float] = Field(None, ge=0.0)
+    decay_per_interval: Optional[float] = Field(None, ge=0.0, lt=1.0)
+    # Per breakdown component: insight_score | stat_score | alert_score | struct_score | drift_score
+    component_weights: Optional[dict[str, float]] = None
+    component_caps: Optional[dict[str, float]] = None
+    include_series: bool = True
@@ -14,12 +14,14 @@ from app.models.dataset import Dataset
 from app.models.dataset_column import DatasetColumn
 from app.models.dataset_insight import DatasetInsight
 from app.models.dataset_preview import DatasetPreview
+from app.services.risk_cache import invalidate_dataset_risk
 from app.services.snapshot_context import get_latest_snapshot_profile_context
 
 _USE_STRATEGY = True
 _COOLDOWN_MINUTES = 10
 _SUPPORTED_OPS = {">", ">=", "<", "<=", "==", "!="}
-_SUPPORTED_SCOPES = {"latest", "any", "mean"}
+_PERCENTILE_SCOPES = {"p01", "p05", "p50", "p95", "p99"}
+_SUPPORTED_SCOPES = {"latest", "any", "mean"} | _PERCENTILE_SCOPES
 logger = logging.getLogger(__name__)
 
 
@@ -194,6 +196,18 @@ def _handle_threshold_rule(db: Session, rule: Any, ctx: RuleContext) -> int:
 
             triggered = _compare(float(mean_v), op, t)
             evidence["mean"] = float(mean_v)
+
+        elif scope in _PERCENTILE_SCOPES:
+            # Percentiles come from the snapshot's quantile sketch; the preview
+            # is too small to stand in for tail quantiles, so no fallback.
+            col = ctx.columns_by_name.get(col_name)
+            stats = ctx.stats_by_col_id.get(str(col.id)) if col is not None else None
+            pct_v = getattr(stats, scope, None) if stats is not None else None
+            if pct_v is None:
+                return 0
+
+            triggered = _compare(float(pct_v), op, t)
+            evidence[scope] = float(pct_v)
         else:
             return 0
     except Exception:
@@ -419,6 +433,7 @@ def evaluate_alerts_for_dataset(db: Session, dataset_id) -> AlertEvalSummary:
 
     if summary.created_events > 0:
         db.commit()
+        invalidate_dataset_risk(dataset_id)
     return summary
 
 
@@ -527,6 +542,7 @@ def _evaluate_dataset_rules_legacy(db: Session, dataset_id) -> int:
 
     if created > 0:
         db.commit()
+        invalidate_dataset_risk(dataset_id)
     return created
 
 
@@ -3,69 +3,132 @@ from __future__ import annotations
 from datetime import datetime, timedelta, timezone
 import math
 from typing import Optional, Tuple
+import uuid
 
-from sqlalchemy import desc
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
+from app.models.dataset_anomaly_baseline import DatasetAnomalyBaseline
 from app.models.dataset_anomaly_event import DatasetAnomalyEvent
 from app.models.dataset_risk_history import DatasetRiskHistory
+from app.services.pg_lock import advisory_xact_lock
 
 _COOLDOWN_MINUTES = 10
 
+# Shift the pending latest point into every baseline of the dataset + metric
+# (evicting the oldest slot once full) and make `value` the new latest point.
+# Risk scores are integers, so the running sums stay exact in float8.
+# Cost: MVCC writes a new row version with the whole ring on every push, and
+# rings above ~250 slots live in TOAST, so each push rewrites up to
+# 8 bytes x window (8 KB at the anomaly_window_max cap of 1000) per baseline.
+_PUSH_POINT = text(
+    """
+    UPDATE dataset_anomaly_baselines SET
+        ring[head + 1] = latest_value,
+        value_sum = value_sum + latest_value
+            - CASE WHEN count = window_size THEN ring[head + 1] ELSE 0 END,
+        value_sumsq = value_sumsq + latest_value * latest_value
+            - CASE WHEN count = window_size THEN ring[head + 1] * ring[head + 1] ELSE 0 END,
+        head = (head + 1) % window_size,
+        count = LEAST(count + 1, window_size),
+        latest_value = :value,
+        latest_at = now(),
+        updated_at = now()
+    WHERE dataset_id = :dataset_id AND metric = :metric
+    """
+)
+
 
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def _cooldown_exists(db: Session, dataset_id, metric: str) -> bool:
-    cutoff = _now() - timedelta(minutes=_COOLDOWN_MINUTES)
-    q = (
-        db.query(DatasetAnomalyEvent)
-        .filter(DatasetAnomalyEvent.dataset_id == dataset_id)
-        .filter(DatasetAnomalyEvent.metric == metric)
-        .filter(DatasetAnomalyEvent.created_at >= cutoff)
-    )
-    return db.query(q.exists()).scalar() is True
+def _as_uuid(value) -> uuid.UUID:
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
 
 
-def _rolling_baseline(values: list[float]) -> Tuple[Optional[float], Optional[float]]:
-    if not values:
+def _as_utc(ts: Optional[datetime]) -> Optional[datetime]:
+    if ts is None:
+        return None
+    return ts if ts.tzinfo is not None else ts.replace(tzinfo=timezone.utc)
+
+
+def _rolling_baseline(count: int, value_sum: float, value_sumsq: float) -> Tuple[Optional[float], Optional[float]]:
+    """Population mean and std from running sums."""
+    if count <= 0:
         return None, None
 
-    m = sum(values) / len(values)
-    var = sum((x - m) ** 2 for x in values) / len(values)
+    m = value_sum / count
+    var = max(0.0, value_sumsq / count - m * m)
     s = math.sqrt(var)
     return m, s
 
 
-def _should_evaluate_latest_point(db: Session, dataset_id, metric: str) -> bool:
+def _baseline_lock_key(dataset_id: uuid.UUID, metric: str) -> str:
+    return f"anomaly-baseline:{dataset_id}:{metric}"
+
+
+def record_baseline_point(db: Session, dataset_id, value: float, metric: str = "risk_score") -> None:
     """
-    Dedupe gate: only evaluate if there is a new risk_history point
-    newer than the last anomaly event for this metric.
+    Feed a newly recorded point into the dataset's rolling baselines for
+    `metric`: one UPDATE, O(1) arithmetic per window (see _PUSH_POINT for the
+    write cost). Runs in the caller's transaction, next to the history insert;
+    windows without a baseline row are seeded from history on first detection
+    instead. Holds the baseline lock until commit so a concurrent seed either
+    sees this point in history or its row already exists for this push.
     """
-    latest_risk = (
-        db.query(DatasetRiskHistory)
+    dataset_id = _as_uuid(dataset_id)
+    advisory_xact_lock(db, _baseline_lock_key(dataset_id, metric))
+    db.execute(_PUSH_POINT, {"value": float(value), "dataset_id": dataset_id, "metric": metric})
+
+
+def _seed_baseline(db: Session, dataset_id: uuid.UUID, metric: str, window: int) -> Optional[DatasetAnomalyBaseline]:
+    """
+    Build a window's baseline from the latest `window + 1` history points
+    (once). Takes the lock record_baseline_point holds, so a track in flight
+    commits its point before the history read, and a later one pushes into
+    the committed row; neither loses the point.
+    """
+    advisory_xact_lock(db, _baseline_lock_key(dataset_id, metric))
+    rows = (
+        db.query(DatasetRiskHistory.risk_score, DatasetRiskHistory.created_at)
         .filter(DatasetRiskHistory.dataset_id == dataset_id)
-        .order_by(desc(DatasetRiskHistory.created_at))
-        .first()
+        .order_by(DatasetRiskHistory.created_at.desc())
+        .limit(window + 1)
+        .all()
     )
-    if not latest_risk:
-        return False
-
-    latest_anom = (
-        db.query(DatasetAnomalyEvent)
+    if not rows:
+        db.commit()  # releases the lock
+        return None
+
+    # Newest first: rows[0] is the point under evaluation, the rest the baseline.
+    baseline = [float(r.risk_score) for r in reversed(rows[1:]) if r.risk_score is not None]
+    ring = baseline + [0.0] * (window - len(baseline))
+    last_event_at = (
+        db.query(func.max(DatasetAnomalyEvent.created_at))
         .filter(DatasetAnomalyEvent.dataset_id == dataset_id)
         .filter(DatasetAnomalyEvent.metric == metric)
-        .order_by(desc(DatasetAnomalyEvent.created_at))
-        .first()
+        .scalar()
     )
 
-    # If we never emitted an anomaly before, evaluate.
-    if not latest_anom:
-        return True
-
-    # Only evaluate if risk point is strictly newer than last anomaly event.
-    return latest_risk.created_at > latest_anom.created_at
+    stmt = pg_insert(DatasetAnomalyBaseline).values(
+        dataset_id=dataset_id,
+        metric=metric,
+        window_size=window,
+        ring=ring,
+        head=len(baseline) % window,
+        count=len(baseline),
+        value_sum=float(sum(baseline)),
+        value_sumsq=float(sum(x * x for x in baseline)),
+        latest_value=float(rows[0].risk_score),
+        latest_at=rows[0].created_at,
+        last_event_at=last_event_at,
+    )
+    db.execute(stmt.on_conflict_do_nothing())
+    db.commit()
+    return db.get(DatasetAnomalyBaseline, (dataset_id, metric, window))
 
 
 def detect_latest_zscore_anomaly(
@@ -77,46 +140,41 @@ def detect_latest_zscore_anomaly(
 ) -> int:
     """
     Detect anomaly for the latest point using baseline from previous `window` points.
-    Persists 0/1 anomaly event.
+    Reads the persisted rolling baseline (one primary-key lookup, no history
+    scan). Persists 0/1 anomaly event.
     """
     try:
         window = int(window)
         z_threshold = float(z_threshold)
         if window < 5 or z_threshold <= 0 or not math.isfinite(z_threshold):
             return 0
+        if window > int(get_settings().anomaly_window_max):
+            return 0
         if metric != "risk_score":
             # Keep v1 strict. Later we can add "health_score".
             return 0
-        if not _should_evaluate_latest_point(db, dataset_id, metric):
-            return 0
 
-        # Need window + 1 points: baseline(window) + latest(1).
-        rows = (
-            db.query(DatasetRiskHistory)
-            .filter(DatasetRiskHistory.dataset_id == dataset_id)
-            .order_by(DatasetRiskHistory.created_at.desc())
-            .limit(window + 1)
-            .all()
-        )
-        if len(rows) < window + 1:
+        dataset_id = _as_uuid(dataset_id)
+        state = db.get(DatasetAnomalyBaseline, (dataset_id, metric, window))
+        if state is None:
+            state = _seed_baseline(db, dataset_id, metric, window)
+            if state is None:
+                return 0
+
+        # Dedupe gate: only evaluate a point strictly newer than the last anomaly event.
+        latest_at = _as_utc(state.latest_at)
+        last_event_at = _as_utc(state.last_event_at)
+        if last_event_at is not None and latest_at <= last_event_at:
             return 0
 
-        # Rows are newest-first; reverse for time order.
-        rows = list(reversed(rows))
-        baseline_rows = rows[:-1]
-        latest = rows[-1]
-
-        baseline_vals = [
-            float(r.risk_score) for r in baseline_rows if r.risk_score is not None
-        ]
-        if len(baseline_vals) < window:
+        if int(state.count) < window:
             return 0
 
-        mean_v, std_v = _rolling_baseline(baseline_vals)
+        mean_v, std_v = _rolling_baseline(int(state.count), float(state.value_sum), float(state.value_sumsq))
         if mean_v is None or std_v is None or std_v == 0 or not math.isfinite(std_v):
             return 0
 
-        value = float(latest.risk_score)
+        value = float(state.latest_value)
         z = (value - mean_v) / std_v
         if not math.isfinite(z):
             return 0
@@ -125,7 +183,7 @@ def detect_latest_zscore_anomaly(
             return 0
 
         # Cooldown per dataset+metric to avoid spam.
-        if _cooldown_exists(db, dataset_id, metric):
+        if last_event_at is not None and last_event_at >= _now() - timedelta(minutes=_COOLDOWN_MINUTES):
             return 0
 
         direction = "spike" if z > 0 else "drop"
@@ -142,8 +200,14 @@ def detect_latest_zscore_anomaly(
                 direction=direction,
             )
         )
+        # Every window of this metric shares the dedupe gate and cooldown.
+        db.query(DatasetAnomalyBaseline).filter(
+            DatasetAnomalyBaseline.dataset_id == dataset_id,
+            DatasetAnomalyBaseline.metric == metric,
+        ).update({DatasetAnomalyBaseline.last_event_at: func.now()}, synchronize_session=False)
         db.commit()
         return 1
     except Exception:
         # Never crash callers.
+        db.rollback()
         return 0
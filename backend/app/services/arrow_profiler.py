@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from app.services.online_stats import MomentAccumulator
+from app.core.config import get_settings
+from app.services.profiling_engine import (
+    PERCENTILES,
+    iqr_outliers,
+    moment_stats,
+    sorted_histogram,
+    top_values_payload,
+)
+from app.services.sketches import hash_series, new_distinct_counter, new_quantile_sketch
+from app.services.type_inference import TypeSignals, text_signals
+
+ARROW_FORMATS = ("parquet", "arrow")
+
+
+def read_arrow_table(path: str, fmt: str, memory_map: bool = True) -> pa.Table:
+    """
+    Read a spooled Parquet or Arrow IPC (file or stream format) upload.
+    With memory_map, IPC buffers reference the mapped file instead of being copied.
+    """
+    if fmt == "parquet":
+        return pq.read_table(path, memory_map=memory_map)
+    if fmt != "arrow":
+        raise ValueError(f"Unsupported Arrow format: {fmt}")
+
+    source = pa.memory_map(path, "r") if memory_map else pa.OSFile(path, "rb")
+    try:
+        return ipc.open_file(source).read_all()
+    except pa.ArrowInvalid:
+        # Not the random-access file format; try the streaming format.
+        source.seek(0)
+        return ipc.open_stream(source).read_all()
+
+
+def _dtype_name(t: pa.DataType) -> str:
+    """pandas-style dtype string, so Arrow columns look like their CSV counterparts."""
+    if pa.types.is_dictionary(t):
+        return "category"
+    if pa.types.is_decimal(t):
+        return "float64"  # profiled as float64 (see _is_numeric)
+    if pa.types.is_timestamp(t):
+        # tz-aware: pandas' extension dtype string, e.g. "datetime64[us, UTC]"
+        return str(t.to_pandas_dtype())
+    try:
+        return str(np.dtype(t.to_pandas_dtype()))
+    except Exception:
+        return "object"
+
+
+def _is_numeric(t: pa.DataType) -> bool:
+    # bool is profiled as 0/1, like pandas' is_numeric_dtype on the CSV path
+    return (
+        pa.types.is_integer(t)
+        or pa.types.is_floating(t)
+        or pa.types.is_boolean(t)
+        or pa.types.is_decimal(t)
+    )
+
+
+def _null_count(col: pa.ChunkedArray) -> int:
+    # pandas reads NaN as missing, so count it with the nulls like the CSV path does
+    n = int(col.null_count)
+    if pa.types.is_floating(col.type):
+        n += int(pc.sum(pc.is_nan(col).cast(pa.int64())).as_py() or 0)
+    return n
+
+
+def _distinct(col: pa.ChunkedArray) -> tuple[int, bytes]:
+    """
+    Exact distinct count plus an HLL sketch over the unique values (the sketch
+    of the uniques equals the sketch of the whole column).
+    """
+    t = col.type
+    if pa.types.is_dictionary(t):
+        col = col.cast(t.value_type)
+    try:
+        uniques = pc.unique(col).drop_null()
+        values = pd.Series(uniques.to_numpy(zero_copy_only=False))
+        count = int(pc.count_distinct(col, mode="only_valid").as_py())
+        if pa.types.is_floating(t) and values.isna().any():
+            count -= 1  # NaN is a value to Arrow but missing to pandas
+    except (pa.ArrowNotImplementedError, TypeError):
+        # nested types: fall back to their string form
+        values = pd.Series(col.to_pandas()).dropna().astype(str).drop_duplicates()
+        count = int(values.size)
+
+    distinct = new_distinct_counter()
+    distinct.hll.add_hashes(hash_series(values))
+    return count, distinct.hll.to_bytes()
+
+
+def _is_text(t: pa.DataType) -> bool:
+    if pa.types.is_dictionary(t):
+        t = t.value_type
+    return pa.types.is_string(t) or pa.types.is_large_string(t)
+
+
+def _type_signals(col: pa.ChunkedArray) -> TypeSignals | None:
+    if not _is_text(col.type):
+        return None
+    return text_signals(col.to_pandas(types_mapper=pd.ArrowDtype))
+
+
+def _numeric_stats(col: pa.ChunkedArray) -> dict[str, Any] | None:
+    """
+    Numeric stats on Arrow buffers: moments and the quantile sketch fold chunk
+    by chunk over zero-copy float64 views, quantiles and IQR outliers run as
+    pyarrow.compute kernels. NaN/inf are treated as missing, as on the CSV path.
+    """
+    values = col.cast(pa.float64()) if col.type != pa.float64() else col
+    values = values.filter(pc.is_finite(values))
+    n = len(values)
+    if n == 0:
+        return None
+
+    moments = MomentAccumulator()
+    sketch = new_quantile_sketch()
+    for chunk in values.chunks:
+        x = chunk.to_numpy(zero_copy_only=False)
+        moments.merge(MomentAccumulator.from_array(x))
+        sketch.update(x)
+
+    stats = moment_stats(moments)
+
+    names = list(PERCENTILES)
+    qs = pc.quantile(
+        values,
+        q=[0.25, 0.75] + [PERCENTILES[k] for k in names],
+        interpolation="linear",
+    ).to_pylist()
+    q1, q3 = float(qs[0]), float(qs[1])
+
+    def _outside(lower: float, upper: float) -> int:
+        mask = pc.or_(pc.less(values, lower), pc.greater(values, upper))
+        return int(pc.sum(mask.cast(pa.int64())).as_py() or 0)
+
+    stats["outlier_count"], stats["outlier_ratio"] = iqr_outliers(n, q1, q3, _outside)
+    for k, v in zip(names, qs[2:]):
+        stats[k] = float(v)
+    stats["quantile_sketch"] = sketch.to_bytes()
+    stats["histogram"] = sorted_histogram(np.sort(values.to_numpy()))
+    return stats
+
+
+def _top_values(col: pa.ChunkedArray) -> dict[str, Any] | None:
+    """Exact top-k frequencies via the value_counts kernel."""
+    if not _is_text(col.type):
+        return None
+    if pa.types.is_dictionary(col.type):
+        col = col.cast(col.type.value_type)
+    vc = pc.value_counts(col.drop_null())
+    if len(vc) == 0:
+        return None
+    values = vc.field("values").to_pylist()
+    counts = vc.field("counts").to_numpy()
+    k = max(1, int(get_settings().top_k_values))
+    order = np.argsort(-counts, kind="stable")[:k]
+    return top_values_payload(
+        [(values[i], int(counts[i])) for i in order],
+        int(counts.sum()),
+        exact=True,
+    )
+
+
+def profile_table(table: pa.Table) -> list[dict[str, Any]]:
+    """Arrow counterpart of `profiling_engine.profile_frame`; same output shape."""
+    profiles: list[dict[str, Any]] = []
+    for name, col in zip(table.column_names, table.columns):
+        distinct_count, distinct_sketch = _distinct(col)
+        profiles.append(
+            {
+                "name": str(name),
+                "dtype": _dtype_name(col.type),
+                "null_count": _null_count(col),
+                "distinct_count": distinct_count,
+                "distinct_is_approximate": False,
+                "distinct_sketch": distinct_sketch,
+                "stats": _numeric_stats(col) if _is_numeric(col.type) else None,
+                "type_signals": _type_signals(col),
+                "top_values": _top_values(col),
+            }
+        )
+    return profiles
+
+
+def count_duplicate_rows(table: pa.Table) -> int | None:
+    """Exact duplicate rows via a group-by over every column; None for nested types."""
+    if table.num_rows == 0:
+        return 0
+    try:
+        unique_rows = table.group_by(table.column_names).aggregate([]).num_rows
+    except (pa.ArrowNotImplementedError, pa.ArrowTypeError):
+        return None
+    return int(table.num_rows - unique_rows)
+
+
+def table_preview(table: pa.Table, n: int) -> pd.DataFrame:
+    return table.slice(0, n).to_pandas()
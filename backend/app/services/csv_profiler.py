@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import pandas as pd
 
+from app.services.profiling_engine import profile_frame
+
 
 def profile_dataframe(df: pd.DataFrame) -> dict:
     """
@@ -18,23 +20,18 @@ def profile_dataframe(df: pd.DataFrame) -> dict:
     row_count = int(df.shape[0])
     column_count = int(df.shape[1])
 
-    cols = []
-    for col in df.columns:
-        series = df[col]
-        null_count = int(series.isna().sum())
-        # nunique(dropna=True) ignores NaN by default
-        distinct_count = int(series.nunique(dropna=True))
-        cols.append(
-            {
-                "name": str(col),
-                "dtype": str(series.dtype),
-                "null_count": null_count,
-                "distinct_count": distinct_count,
-            }
-        )
+    cols = [
+        {
+            "name": p["name"],
+            "dtype": p["dtype"],
+            "null_count": p["null_count"],
+            "distinct_count": p["distinct_count"],
+        }
+        for p in profile_frame(df)
+    ]
 
     return {
         "row_count": row_count,
         "column_count": column_count,
         "columns": cols,
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+import logging
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import DatasetSnapshot, SnapshotColumn, SnapshotStatistics
+from app.services.snapshot_context import get_latest_snapshot
+
+logger = logging.getLogger("insightsentinel.drift")
+
+# Conventional PSI bands: < 0.1 stable, 0.1-0.25 moderate shift, >= 0.25 significant.
+PSI_MODERATE = 0.10
+PSI_SIGNIFICANT = 0.25
+# KS statistic (max CDF distance) bands for numeric columns
+KS_MODERATE = 0.10
+KS_SIGNIFICANT = 0.20
+
+# Floor for empty bins so PSI stays finite
+_PSI_EPSILON = 1e-4
+_OTHER = "__other__"
+
+
+@dataclass
+class ColumnDrift:
+    column: str
+    kind: str  # numeric | categorical
+    psi: float
+    ks: Optional[float]
+    level: str  # stable | moderate | significant
+
+
+@dataclass
+class DriftReport:
+    dataset_id: str
+    snapshot_id: Optional[str]
+    reference_snapshot_id: Optional[str]
+    columns: list[ColumnDrift] = field(default_factory=list)
+
+    def drifted(self) -> list[ColumnDrift]:
+        return [c for c in self.columns if c.level != "stable"]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "dataset_id": self.dataset_id,
+            "snapshot_id": self.snapshot_id,
+            "reference_snapshot_id": self.reference_snapshot_id,
+            "columns": [asdict(c) for c in self.columns],
+        }
+
+
+def population_stability_index(expected: np.ndarray, actual: np.ndarray) -> float:
+    """PSI = sum((a - e) * ln(a / e)) over bins of two probability vectors."""
+    e = np.maximum(np.asarray(expected, dtype="float64"), _PSI_EPSILON)
+    a = np.maximum(np.asarray(actual, dtype="float64"), _PSI_EPSILON)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def _histogram_cdf(hist: dict[str, Any], x: np.ndarray) -> np.ndarray:
+    """
+    CDF of a stored histogram at points x, assuming values spread uniformly
+    within each bin (piecewise linear between edges).
+    """
+    edges = np.asarray(hist["edges"], dtype="float64")
+    counts = np.asarray(hist["counts"], dtype="float64")
+    total = counts.sum()
+    if total <= 0:
+        return np.zeros_like(x)
+    if edges[-1] <= edges[0]:
+        return np.where(x >= edges[0], 1.0, 0.0)  # constant column: a single step
+    cdf = np.concatenate([[0.0], np.cumsum(counts) / total])
+    return np.interp(x, edges, cdf, left=0.0, right=1.0)
+
+
+def histogram_drift(reference: dict[str, Any], current: dict[str, Any]) -> tuple[float, float]:
+    """
+    (PSI, KS) between two stored histograms with possibly different edges.
+
+    PSI uses the reference bins plus one tail bin on each side for mass the
+    current snapshot has outside the reference range. KS is the largest CDF
+    distance; both CDFs are piecewise linear, so it is attained on an edge.
+    """
+    grid = np.unique(np.concatenate([reference["edges"], current["edges"]]).astype("float64"))
+    ks = float(np.max(np.abs(_histogram_cdf(reference, grid) - _histogram_cdf(current, grid))))
+
+    cuts = np.asarray(reference["edges"], dtype="float64")
+
+    def _bins(hist: dict[str, Any]) -> np.ndarray:
+        return np.diff(np.concatenate([[0.0], _histogram_cdf(hist, cuts), [1.0]]))
+
+    return population_stability_index(_bins(reference), _bins(current)), ks
+
+
+def top_values_drift(reference: dict[str, Any], current: dict[str, Any]) -> float:
+    """
+    PSI between two stored top-k frequency tables. Values outside either
+    table share one "other" bucket, so shifts in the tail are only seen in
+    aggregate.
+    """
+    ref_total = int(reference.get("total") or 0)
+    cur_total = int(current.get("total") or 0)
+    if ref_total <= 0 or cur_total <= 0:
+        return 0.0
+    ref = {str(v): int(c) for v, c in reference.get("values") or []}
+    cur = {str(v): int(c) for v, c in current.get("values") or []}
+
+    keys = sorted(set(ref) | set(cur))
+    p_ref = np.array([ref.get(k, 0) for k in keys] + [0], dtype="float64") / ref_total
+    p_cur = np.array([cur.get(k, 0) for k in keys] + [0], dtype="float64") / cur_total
+    p_ref[-1] = max(0.0, 1.0 - p_ref[:-1].sum())
+    p_cur[-1] = max(0.0, 1.0 - p_cur[:-1].sum())
+    return population_stability_index(p_ref, p_cur)
+
+
+def _level(psi: float, ks: Optional[float]) -> str:
+    if psi >= PSI_SIGNIFICANT or (ks is not None and ks >= KS_SIGNIFICANT):
+        return "significant"
+    if psi >= PSI_MODERATE or (ks is not None and ks >= KS_MODERATE):
+        return "moderate"
+    return "stable"
+
+
+def _reference_snapshot(db: Session, latest: DatasetSnapshot) -> DatasetSnapshot | None:
+    """The snapshot taken just before `latest`."""
+    return (
+        db.query(DatasetSnapshot)
+        .filter(DatasetSnapshot.dataset_id == latest.dataset_id)
+        .filter(DatasetSnapshot.created_at < latest.created_at)
+        .order_by(DatasetSnapshot.created_at.desc())
+        .first()
+    )
+
+
+_Summary = tuple[Optional[dict[str, Any]], Optional[dict[str, Any]]]
+
+
+def _summary_query(db: Session, snapshot_ids):
+    return (
+        db.query(
+            SnapshotColumn.snapshot_id,
+            SnapshotColumn.name,
+            SnapshotColumn.top_values,
+            SnapshotStatistics.histogram,
+        )
+        .outerjoin(SnapshotStatistics, SnapshotStatistics.snapshot_column_id == SnapshotColumn.id)
+        .filter(SnapshotColumn.snapshot_id.in_(list(snapshot_ids)))
+    )
+
+
+def _summaries(db: Session, snapshot_id) -> dict[str, _Summary]:
+    """name -> (top_values, histogram) for one snapshot."""
+    return {name: (top, hist) for _, name, top, hist in _summary_query(db, [snapshot_id])}
+
+
+def _compare(current: dict[str, _Summary], reference: dict[str, _Summary]) -> list[ColumnDrift]:
+    """Drift of every column present in both snapshots with comparable summaries."""
+    columns: list[ColumnDrift] = []
+    for name, (top, hist) in current.items():
+        if name not in reference:
+            continue
+        ref_top, ref_hist = reference[name]
+        if hist and ref_hist:
+            psi, ks = histogram_drift(ref_hist, hist)
+            kind = "numeric"
+        elif top and ref_top:
+            psi, ks = top_values_drift(ref_top, top), None
+            kind = "categorical"
+        else:
+            continue  # no comparable summaries (e.g. dtype changed, older snapshot)
+        columns.append(
+            ColumnDrift(
+                column=name,
+                kind=kind,
+                psi=round(psi, 6),
+                ks=round(ks, 6) if ks is not None else None,
+                level=_level(psi, ks),
+            )
+        )
+    columns.sort(key=lambda c: c.psi, reverse=True)
+    return columns
+
+
+def compute_dataset_drift(
+    db: Session,
+    dataset_id,
+    reference_snapshot_id=None,
+) -> Optional[DriftReport]:
+    """
+    Per-column drift between the latest snapshot and a reference snapshot
+    (default: the one before it), computed from the stored histograms and
+    top-k tables only. None if the reference snapshot doesn't belong to the
+    dataset; an empty report when there is nothing to compare yet.
+    """
+    latest = get_latest_snapshot(db, dataset_id)
+    report = DriftReport(
+        dataset_id=str(dataset_id),
+        snapshot_id=str(latest.id) if latest is not None else None,
+        reference_snapshot_id=None,
+    )
+    if reference_snapshot_id is not None:
+        reference = (
+            db.query(DatasetSnapshot)
+            .filter(DatasetSnapshot.id == reference_snapshot_id)
+            .filter(DatasetSnapshot.dataset_id == dataset_id)
+            .first()
+        )
+        if reference is None:
+            return None
+    elif latest is not None:
+        reference = _reference_snapshot(db, latest)
+    else:
+        reference = None
+
+    if latest is None or reference is None or reference.id == latest.id:
+        return report
+    report.reference_snapshot_id = str(reference.id)
+
+    report.columns = _compare(_summaries(db, latest.id), _summaries(db, reference.id))
+    return report
+
+
+def compute_drift_batch(db: Session, dataset_ids) -> dict[str, DriftReport]:
+    """
+    `compute_dataset_drift` with the default reference for many datasets:
+    one window query picks the latest two snapshots of every dataset and one
+    more loads all their summaries. Keyed by dataset id as string.
+    """
+    dataset_ids = list(dataset_ids)
+    if not dataset_ids:
+        return {}
+
+    rank = (
+        func.row_number()
+        .over(partition_by=DatasetSnapshot.dataset_id, order_by=DatasetSnapshot.created_at.desc())
+        .label("rank")
+    )
+    ranked = (
+        db.query(DatasetSnapshot.id, DatasetSnapshot.dataset_id, rank)
+        .filter(DatasetSnapshot.dataset_id.in_(dataset_ids))
+        .subquery()
+    )
+    pairs: dict[str, dict[int, Any]] = {}
+    for snapshot_id, ds_id, r in db.query(ranked).filter(ranked.c.rank <= 2).all():
+        pairs.setdefault(str(ds_id), {})[int(r)] = snapshot_id
+
+    summaries: dict[Any, dict[str, _Summary]] = {}
+    snapshot_ids = [sid for p in pairs.values() if len(p) == 2 for sid in p.values()]
+    if snapshot_ids:
+        for snapshot_id, name, top, hist in _summary_query(db, snapshot_ids):
+            summaries.setdefault(snapshot_id, {})[name] = (top, hist)
+
+    reports: dict[str, DriftReport] = {}
+    for ds_id in map(str, dataset_ids):
+        p = pairs.get(ds_id, {})
+        report = DriftReport(
+            dataset_id=ds_id,
+            snapshot_id=str(p[1]) if 1 in p else None,
+            reference_snapshot_id=str(p[2]) if 2 in p else None,
+        )
+        if 2 in p:
+            report.columns = _compare(summaries.get(p[1], {}), summaries.get(p[2], {}))
+        reports[ds_id] = report
+    return reports
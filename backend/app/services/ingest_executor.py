@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from typing import Any, Callable, TypeVar
+
+from fastapi import HTTPException
+
+from app.core.config import get_settings
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_slots: threading.BoundedSemaphore | None = None
+_init_lock = threading.Lock()
+
+
+def _ensure_pool() -> tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    global _executor, _slots
+    with _init_lock:
+        if _executor is None or _slots is None:
+            settings = get_settings()
+            workers = max(1, int(settings.ingest_max_concurrency))
+            # A slot covers a running ingestion or one waiting for a worker thread.
+            _slots = threading.BoundedSemaphore(workers + max(0, int(settings.ingest_max_queued)))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest")
+        return _executor, _slots
+
+
+async def run_in_ingest_pool(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run blocking ingestion work (parsing, profiling, SQLAlchemy) on the bounded
+    ingest thread pool so the event loop stays responsive.
+
+    Admission is non-blocking: when every slot is taken the request is rejected
+    with 429 + Retry-After instead of piling up behind the running uploads.
+    """
+    executor, slots = _ensure_pool()
+    if not slots.acquire(blocking=False):
+        retry_after = max(1, int(get_settings().ingest_retry_after_seconds))
+        raise HTTPException(
+            status_code=429,
+            detail="Too many concurrent ingestions; retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    def _run() -> T:
+        # Released by the worker thread, so a client disconnect that cancels
+        # the awaiting request can't free the slot while the work still runs.
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            slots.release()
+
+    loop = asyncio.get_running_loop()
+    try:
+        future = loop.run_in_executor(executor, _run)
+    except BaseException:
+        slots.release()
+        raise
+    return await future
+
+
+def shutdown_ingest_pool() -> None:
+    global _executor, _slots
+    with _init_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _slots = None
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+import logging
+import multiprocessing as mp
+from pathlib import Path
+import signal
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.logging import setup_logging
+from app.db.session import SessionLocal
+from app.models import Dataset, IngestionRun
+from app.services.ingestion_pipeline import (
+    IngestionInputError,
+    create_snapshot,
+    evaluate_rules_after_ingest,
+    find_duplicate_snapshot,
+    mark_run_completed,
+    mark_run_failed,
+    merge_previous_snapshot,
+    parse_arrow_upload,
+    parse_csv_upload,
+    persist_column_profiles,
+    upload_size,
+)
+from app.services.preview import preview_row_limit
+from app.services.risk_cache import invalidate_dataset_risk
+
+logger = logging.getLogger("insightsentinel.ingest_worker")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def claim_next_run(db: Session) -> IngestionRun | None:
+    """
+    Claim the oldest queued run with SELECT ... FOR UPDATE SKIP LOCKED so
+    concurrent workers never pick the same row. Runs in `profiling` whose
+    heartbeat is older than the claim timeout (worker gone) are reclaimed;
+    a live worker keeps its heartbeat fresh however long the file takes.
+    """
+    settings = get_settings()
+    stale_cutoff = _now() - timedelta(minutes=settings.ingest_claim_timeout_minutes)
+
+    run = (
+        db.query(IngestionRun)
+        .filter(IngestionRun.spool_path.isnot(None))
+        .filter(
+            or_(
+                IngestionRun.status == "created",
+                and_(
+                    IngestionRun.status == "profiling",
+                    func.coalesce(IngestionRun.heartbeat_at, IngestionRun.claimed_at) < stale_cutoff,
+                ),
+            )
+        )
+        .order_by(IngestionRun.created_at.asc())
+        .with_for_update(skip_locked=True)
+        .limit(1)
+        .first()
+    )
+    if run is None:
+        db.rollback()
+        return None
+
+    now = _now()
+    run.status = "profiling"
+    run.message = "Profiling started"
+    run.claimed_at = now
+    run.heartbeat_at = now
+    run.started_at = run.started_at or now
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+class _Heartbeat:
+    """
+    Refreshes a claimed run's heartbeat_at every `ingest_heartbeat_seconds`
+    from a background thread with its own session, so parsing and profiling
+    (which hold the worker's session) never starve it. Stops on exit, or once
+    the run is no longer this claim's (finished or reclaimed).
+    """
+
+    def __init__(self, run: IngestionRun):
+        self.run_id = run.id
+        self.claimed_at = run.claimed_at
+        self.interval = max(1.0, float(get_settings().ingest_heartbeat_seconds))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name=f"heartbeat-{run.id}", daemon=True)
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _beat(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                with SessionLocal() as db:
+                    updated = (
+                        db.query(IngestionRun)
+                        .filter(IngestionRun.id == self.run_id)
+                        .filter(IngestionRun.status == "profiling")
+                        .filter(IngestionRun.claimed_at == self.claimed_at)
+                        .update({IngestionRun.heartbeat_at: _now()}, synchronize_session=False)
+                    )
+                    db.commit()
+            except Exception:
+                logger.exception("Ingestion heartbeat failed", extra={"run_id": str(self.run_id)})
+                continue
+            if not updated:
+                if not self._stop.is_set():
+                    logger.warning("Ingestion run no longer claimed", extra={"run_id": str(self.run_id)})
+                return
+
+
+def process_run(db: Session, run: IngestionRun) -> None:
+    """Profile a claimed run's spooled file and move it to completed|failed."""
+    with _Heartbeat(run):
+        completed = _process_run(db, run)
+    if completed:
+        evaluate_rules_after_ingest(db, run.dataset_id)
+
+
+def _process_run(db: Session, run: IngestionRun) -> bool:
+    """True when a new snapshot was profiled and committed."""
+    started_mono = time.monotonic()
+    spool_path = Path(run.spool_path)
+    options: dict[str, Any] = run.options or {}
+
+    try:
+        dataset = db.query(Dataset).filter(Dataset.id == run.dataset_id).first()
+        if dataset is None:
+            raise IngestionInputError("Dataset not found")
+
+        content_sha256 = options.get("sha256")
+        # An identical upload may have been profiled since this run was queued.
+        duplicate = find_duplicate_snapshot(db, dataset.id, content_sha256)
+        if duplicate is not None:
+            mark_run_completed(run, started_mono, snapshot=duplicate, deduplicated=True)
+            run.spool_path = None
+            db.add(run)
+            db.commit()
+            spool_path.unlink(missing_ok=True)
+            return False
+
+        fmt = options.get("format") or "csv"
+        append = bool(options.get("append"))
+        if fmt == "csv":
+            with open(spool_path, "rb") as fh:
+                parsed = parse_csv_upload(
+                    fh,
+                    upload_size(fh),
+                    streaming=True if append else options.get("streaming"),
+                    preview_rows=preview_row_limit(dataset),
+                )
+                if append:
+                    merge_previous_snapshot(db, dataset, parsed)
+                snapshot = create_snapshot(db, dataset, parsed, run.source_file, update_preview=not append)
+                persist_column_profiles(db, snapshot, parsed, content_sha256)
+        else:
+            parsed = parse_arrow_upload(
+                str(spool_path), fmt, preview_rows=preview_row_limit(dataset)
+            )
+            snapshot = create_snapshot(db, dataset, parsed, run.source_file)
+            persist_column_profiles(db, snapshot, parsed, content_sha256)
+
+        mark_run_completed(run, started_mono, snapshot=snapshot)
+        run.spool_path = None
+        db.add(run)
+        db.commit()
+        invalidate_dataset_risk(run.dataset_id)
+    except Exception as e:
+        logger.exception("Background ingestion failed", extra={"run_id": str(run.id)})
+        db.rollback()
+        run.spool_path = None
+        mark_run_failed(db, run, e, started_mono)
+        spool_path.unlink(missing_ok=True)
+        return False
+
+    spool_path.unlink(missing_ok=True)
+    return True
+
+
+def run_worker_loop(stop_event: Any = None) -> None:
+    """Poll for queued runs until `stop_event` is set."""
+    settings = get_settings()
+    setup_logging(settings.log_level)
+    poll = max(0.1, float(settings.ingest_worker_poll_seconds))
+
+    while stop_event is None or not stop_event.is_set():
+        claimed = False
+        db: Session = SessionLocal()
+        try:
+            run = claim_next_run(db)
+            if run is not None:
+                claimed = True
+                logger.info("Ingestion run claimed", extra={"run_id": str(run.id)})
+                process_run(db, run)
+        except KeyboardInterrupt:
+            break
+        except Exception:
+            logger.exception("Ingest worker iteration failed")
+        finally:
+            db.close()
+
+        # Drain the queue back-to-back; only sleep when idle.
+        if claimed:
+            continue
+        if stop_event is not None:
+            stop_event.wait(poll)
+        else:
+            time.sleep(poll)
+
+
+def main() -> None:
+    settings = get_settings()
+    setup_logging(settings.log_level)
+
+    n = max(1, int(settings.ingest_worker_processes))
+    ctx = mp.get_context("spawn")
+    stop_event = ctx.Event()
+
+    def _stop(signum, frame):
+        logger.info("Ingest worker pool stopping (signal=%s)", signum)
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    procs = [
+        ctx.Process(target=run_worker_loop, args=(stop_event,), name=f"ingest-worker-{i}")
+        for i in range(n)
+    ]
+    for p in procs:
+        p.start()
+    logger.info(f"Ingest worker pool started (processes={n})")
+
+    for p in procs:
+        p.join()
+    logger.info("Ingest worker pool stopped")
+
+
+if __name__ == "__main__":
+    main()
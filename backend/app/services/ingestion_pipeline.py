@@ -0,0 +1,523 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import hashlib
+import logging
+import time
+from typing import Any, BinaryIO
+import uuid
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, undefer
+
+from app.core.config import get_settings
+from app.models import (
+    Dataset,
+    DatasetSnapshot,
+    IngestionRun,
+    SnapshotColumn,
+    SnapshotStatistics,
+)
+from app.services.alert_engine import evaluate_dataset_rules
+from app.services.online_stats import (
+    ColumnAccumulator,
+    MomentAccumulator,
+    StreamedProfile,
+    merge_dtype,
+    profile_csv_stream,
+)
+from app.services.preview import (
+    preview_row_limit,
+    sanitize_preview_rows,
+    upsert_dataset_preview,
+)
+from app.services.profiling_engine import (
+    PERCENTILES,
+    moment_stats,
+    profile_frame,
+    sketch_histogram,
+    sketch_quantile_stats,
+    top_values_payload,
+)
+from app.services.sketches import (
+    HyperLogLog,
+    KLLSketch,
+    hash_rows,
+    new_quantile_sketch,
+    pack_row_hashes,
+    unique_row_hashes,
+    unpack_row_hashes,
+)
+from app.services.snapshot_context import get_latest_snapshot
+from app.services.type_inference import (
+    TypeSignals,
+    is_text_dtype,
+    signal_columns,
+)
+
+logger = logging.getLogger("insightsentinel")
+
+
+_HASH_BLOCK_BYTES = 1024 * 1024
+
+
+class IngestionInputError(ValueError):
+    """Upload could not be parsed into a profileable table."""
+
+
+@dataclass
+class ParsedUpload:
+    row_count: int
+    column_count: int
+    preview_df: pd.DataFrame
+    df: pd.DataFrame | None = None
+    streamed: StreamedProfile | None = None
+    # pyarrow.Table for Parquet/Arrow IPC uploads (pyarrow is imported lazily)
+    table: Any = None
+    # Exact rows beyond their first occurrence over the whole upload; None if unknown
+    duplicate_row_count: int | None = None
+    # Distinct row hashes behind duplicate_row_count (CSV uploads only)
+    row_hashes: np.ndarray | None = None
+
+
+def _profile_accumulators(columns: list[ColumnAccumulator]) -> list[dict[str, Any]]:
+    """
+    Streaming counterpart of `profile_frame`. Percentiles, IQR outlier
+    bounds and the histogram come from each column's merged quantile sketch;
+    top values from its heavy-hitters summary.
+    """
+    top_k = max(1, int(get_settings().top_k_values))
+    profiles: list[dict[str, Any]] = []
+    for acc in columns:
+        stats = None
+        if acc.numeric and acc.moments.count > 0:
+            stats = moment_stats(acc.moments)
+            stats.update(sketch_quantile_stats(acc.quantiles))
+            stats["histogram"] = sketch_histogram(acc.quantiles, stats["min"], stats["max"])
+        is_text = is_text_dtype(acc.dtype or "object")
+        top = None
+        # values of numeric chunks weren't summarised, so a demoted column has no table
+        if is_text and acc.top is not None and acc.top.total > 0 and not acc.untracked_values:
+            top = top_values_payload(acc.top.top(top_k), acc.top.total, exact=acc.top.error == 0)
+        profiles.append(
+            {
+                "name": acc.name,
+                "dtype": acc.dtype or "object",
+                "null_count": acc.null_count,
+                "distinct_count": acc.distinct_count,
+                "distinct_is_approximate": acc.distinct.is_approximate,
+                "distinct_sketch": acc.distinct.hll.to_bytes(),
+                "stats": stats,
+                "type_signals": acc.text if is_text else None,
+                "top_values": top,
+            }
+        )
+    return profiles
+
+
+def upload_size(fileobj: BinaryIO) -> int:
+    fileobj.seek(0, 2)
+    size_bytes = fileobj.tell()
+    fileobj.seek(0)
+    return int(size_bytes)
+
+
+def sha256_fileobj(fileobj: BinaryIO) -> str:
+    """Streaming SHA-256 of a seekable upload; leaves the file at offset 0."""
+    fileobj.seek(0)
+    h = hashlib.sha256()
+    for block in iter(lambda: fileobj.read(_HASH_BLOCK_BYTES), b""):
+        h.update(block)
+    fileobj.seek(0)
+    return h.hexdigest()
+
+
+def find_duplicate_snapshot(db: Session, dataset_id, content_sha256: str | None) -> DatasetSnapshot | None:
+    """The dataset's latest snapshot, if it was built from byte-identical content."""
+    if not content_sha256:
+        return None
+    latest = get_latest_snapshot(db, dataset_id)
+    if latest is not None and latest.content_sha256 == content_sha256:
+        return latest
+    return None
+
+
+def parse_csv_upload(
+    fileobj: BinaryIO,
+    size_bytes: int,
+    streaming: bool | None = None,
+    preview_rows: int | None = None,
+) -> ParsedUpload:
+    """
+    Parse a spooled CSV upload. Raises IngestionInputError for empty/invalid files.
+
+    Streaming mode folds fixed-size chunks into mergeable accumulators so peak
+    memory depends on chunk size, not file size. Auto-enabled for large uploads.
+    """
+    settings = get_settings()
+    preview_rows = preview_rows or preview_row_limit()
+
+    if size_bytes == 0:
+        raise IngestionInputError("Empty file")
+
+    use_streaming = (
+        streaming
+        if streaming is not None
+        else size_bytes >= settings.ingest_stream_threshold_bytes
+    )
+
+    try:
+        if use_streaming:
+            streamed = profile_csv_stream(
+                fileobj,
+                chunk_rows=settings.ingest_chunk_rows,
+                preview_rows=preview_rows,
+            )
+            parsed = ParsedUpload(
+                row_count=int(streamed.row_count),
+                column_count=len(streamed.columns),
+                preview_df=streamed.preview_df,
+                streamed=streamed,
+                duplicate_row_count=streamed.duplicate_row_count,
+                row_hashes=streamed.row_hashes,
+            )
+        else:
+            df = pd.read_csv(fileobj)
+            row_hashes = unique_row_hashes([hash_rows(df)])
+            parsed = ParsedUpload(
+                row_count=int(df.shape[0]),
+                column_count=int(df.shape[1]),
+                preview_df=df.head(preview_rows),
+                df=df,
+                duplicate_row_count=int(df.shape[0] - row_hashes.size),
+                row_hashes=row_hashes,
+            )
+    except Exception as e:
+        raise IngestionInputError(f"Invalid CSV: {type(e).__name__}: {e}") from e
+
+    if parsed.column_count == 0:
+        raise IngestionInputError("CSV has no columns")
+
+    return parsed
+
+
+def parse_arrow_upload(
+    path: str,
+    fmt: str,
+    preview_rows: int | None = None,
+) -> ParsedUpload:
+    """
+    Read a spooled Parquet/Arrow IPC upload (memory-mapped when enabled).
+    Raises IngestionInputError for unreadable or empty tables.
+    """
+    from app.services.arrow_profiler import (
+        count_duplicate_rows as count_duplicate_table_rows,
+        read_arrow_table,
+        table_preview,
+    )
+
+    settings = get_settings()
+    preview_rows = preview_rows or preview_row_limit()
+
+    try:
+        table = read_arrow_table(path, fmt, memory_map=settings.ingest_arrow_memory_map)
+    except Exception as e:
+        detail = str(e).replace(path, "<upload>")  # don't leak the spool path
+        raise IngestionInputError(f"Invalid {fmt} file: {type(e).__name__}: {detail}") from e
+
+    if table.num_columns == 0:
+        raise IngestionInputError(f"{fmt} file has no columns")
+
+    return ParsedUpload(
+        row_count=int(table.num_rows),
+        column_count=int(table.num_columns),
+        preview_df=table_preview(table, preview_rows),
+        table=table,
+        duplicate_row_count=count_duplicate_table_rows(table),
+    )
+
+
+def merge_previous_snapshot(db: Session, dataset: Dataset, parsed: ParsedUpload) -> None:
+    """
+    Append mode: fold the latest snapshot's persisted sufficient statistics
+    (counts, moment sums, KLL and HLL sketches) into the streamed accumulators
+    of the new rows, so the next snapshot describes previous + new rows at a
+    cost proportional to the new rows only.
+
+    Moments/min/max/null counts are exact; percentiles, IQR outliers and
+    distinct counts come from the merged sketches. Duplicate rows are exact
+    while the previous snapshot kept its row hashes, else unknown.
+    Raises IngestionInputError when the upload cannot be appended.
+    """
+    if parsed.streamed is None:
+        raise IngestionInputError("Append mode requires a streamed CSV upload")
+
+    previous = get_latest_snapshot(db, dataset.id)
+    if previous is None:
+        raise IngestionInputError("Append mode requires an existing snapshot")
+
+    prev_columns = (
+        db.query(SnapshotColumn)
+        .options(undefer(SnapshotColumn.distinct_sketch))
+        .filter(SnapshotColumn.snapshot_id == previous.id)
+        .all()
+    )
+    prev_stats = {
+        s.snapshot_column_id: s
+        for s in (
+            db.query(SnapshotStatistics)
+            .options(undefer(SnapshotStatistics.quantile_sketch))
+            .filter(SnapshotStatistics.snapshot_column_id.in_([c.id for c in prev_columns]))
+            .all()
+        )
+    }
+
+    accs = {acc.name: acc for acc in parsed.streamed.columns}
+    if set(accs) != {c.name for c in prev_columns}:
+        raise IngestionInputError("Append mode requires the same columns as the latest snapshot")
+
+    for col in prev_columns:
+        acc = accs[col.name]
+        acc.dtype = merge_dtype(col.dtype, acc.dtype or col.dtype)
+        acc.null_count += int(col.null_count)
+
+        if col.distinct_sketch is None:
+            raise IngestionInputError(f"Column '{col.name}' has no distinct sketch; re-upload the full file")
+        try:
+            acc.distinct.merge_hll(HyperLogLog.from_bytes(col.distinct_sketch))
+        except ValueError as e:
+            raise IngestionInputError(f"Column '{col.name}': {e}") from e
+
+        st = prev_stats.get(col.id)
+        if acc.text is not None:
+            prev_text = TypeSignals.from_column(col)
+            if prev_text is None and not is_text_dtype(col.dtype):
+                # numeric/bool before: every value counts, finite numbers parse
+                numeric = col.dtype != "bool" and st is not None
+                prev_text = TypeSignals(
+                    text_count=int(previous.row_count) - int(col.null_count),
+                    numeric_count=int(st.value_count or 0) if numeric else 0,
+                )
+            if prev_text is None:
+                acc.text = None  # text snapshot from before type signals existed
+            else:
+                acc.text.merge(prev_text)
+
+        if acc.top is not None:
+            prev_top = col.top_values
+            if prev_top:
+                values = prev_top.get("values") or []
+                # Counts below the stored top-k are gone; bound them by the smallest kept.
+                truncated = sum(c for _, c in values) < int(prev_top.get("total") or 0)
+                acc.top.merge_counts(
+                    {str(v): int(c) for v, c in values},
+                    int(prev_top.get("total") or 0),
+                    error=int(values[-1][1]) if truncated and values else 0,
+                )
+            elif int(previous.row_count) - int(col.null_count) > 0:
+                acc.top = None  # previous values were never summarised
+
+        if acc.dtype == "object":
+            # Text in either part demotes the column, like a single read would.
+            acc.numeric = False
+            acc.moments = MomentAccumulator()
+            acc.quantiles = new_quantile_sketch()
+            continue
+
+        if st is None:
+            continue  # no finite values in the previous snapshot
+        if st.value_count is None or st.quantile_sketch is None:
+            raise IngestionInputError(
+                f"Column '{col.name}' has no mergeable statistics; re-upload the full file"
+            )
+        acc.moments.merge(
+            MomentAccumulator(
+                count=int(st.value_count),
+                total=float(st.value_sum or 0.0),
+                m2=float(st.m2 or 0.0),
+                m3=float(st.m3 or 0.0),
+                m4=float(st.m4 or 0.0),
+                min=st.min,
+                max=st.max,
+            )
+        )
+        acc.quantiles.merge(KLLSketch.from_bytes(st.quantile_sketch))
+
+    parsed.row_count += int(previous.row_count)
+    previous_hashes = None
+    if previous.row_hashes is not None:
+        try:
+            previous_hashes = unpack_row_hashes(previous.row_hashes)
+        except ValueError:
+            logger.warning("Unreadable row hashes on snapshot %s", previous.id)
+    if previous_hashes is None or parsed.row_hashes is None:
+        # Rows of earlier uploads aren't kept, so duplicates across the boundary are unknown.
+        parsed.duplicate_row_count = None
+        parsed.row_hashes = None
+    else:
+        parsed.row_hashes = unique_row_hashes([previous_hashes, parsed.row_hashes])
+        parsed.duplicate_row_count = int(parsed.row_count - parsed.row_hashes.size)
+
+
+def create_snapshot(
+    db: Session,
+    dataset: Dataset,
+    parsed: ParsedUpload,
+    source_file: str | None,
+    update_preview: bool = True,
+) -> DatasetSnapshot:
+    """
+    Create the snapshot row and upsert the dataset preview (no commit).
+    Keeps root-level dataset counters aligned with the latest snapshot.
+    Appends keep the stored preview, which already shows the first rows.
+    """
+    dataset.row_count = parsed.row_count
+    dataset.column_count = parsed.column_count
+    db.add(dataset)
+
+    snapshot = DatasetSnapshot(
+        id=uuid.uuid4(),  # client-side id: no flush needed before dependent rows
+        dataset_id=dataset.id,
+        row_count=parsed.row_count,
+        column_count=parsed.column_count,
+        source_file=source_file,
+        duplicate_row_count=parsed.duplicate_row_count,
+        row_hashes=pack_row_hashes(parsed.row_hashes) if parsed.row_hashes is not None else None,
+        duplicate_row_ratio=(
+            parsed.duplicate_row_count / parsed.row_count
+            if parsed.duplicate_row_count is not None and parsed.row_count > 0
+            else None
+        ),
+    )
+    db.add(snapshot)
+
+    if update_preview:
+        # PREVIEW: persist first N rows now (JSON-safe: no NaN/Infinity)
+        preview_rows = sanitize_preview_rows(parsed.preview_df.head(preview_row_limit(dataset)))
+        upsert_dataset_preview(db, dataset.id, preview_rows)
+
+    return snapshot
+
+
+def persist_column_profiles(
+    db: Session,
+    snapshot: DatasetSnapshot,
+    parsed: ParsedUpload,
+    content_sha256: str | None = None,
+) -> None:
+    """
+    Profile every column and bulk-insert SnapshotColumn/SnapshotStatistics rows
+    (no commit). Ids are generated client-side so both tables go out as one
+    executemany INSERT each, independent of column count.
+
+    The content hash is stamped on the snapshot only once its columns are in,
+    so a snapshot left behind by a failed profile never matches
+    find_duplicate_snapshot.
+    """
+    if parsed.streamed is not None:
+        column_profiles = _profile_accumulators(parsed.streamed.columns)
+    elif parsed.table is not None:
+        from app.services.arrow_profiler import profile_table
+
+        column_profiles = profile_table(parsed.table)
+    else:
+        column_profiles = profile_frame(parsed.df)
+
+    column_rows: list[dict[str, Any]] = []
+    stats_rows: list[dict[str, Any]] = []
+    for prof in column_profiles:
+        col_id = uuid.uuid4()
+        column_rows.append(
+            {
+                "id": col_id,
+                "snapshot_id": snapshot.id,
+                "name": prof["name"],
+                "dtype": prof["dtype"],
+                "null_count": prof["null_count"],
+                "distinct_count": prof["distinct_count"],
+                "distinct_is_approximate": prof["distinct_is_approximate"],
+                "distinct_sketch": prof["distinct_sketch"],
+                **signal_columns(prof.get("type_signals")),
+                "top_values": prof.get("top_values"),
+            }
+        )
+
+        stats = prof["stats"]
+        if stats is not None:
+            stats_rows.append(
+                {
+                    "id": uuid.uuid4(),
+                    "snapshot_column_id": col_id,
+                    "value_count": stats.get("value_count"),
+                    "value_sum": stats.get("value_sum"),
+                    "m2": stats.get("m2"),
+                    "m3": stats.get("m3"),
+                    "m4": stats.get("m4"),
+                    "mean": stats["mean"],
+                    "std": stats["std"],
+                    "min": stats["min"],
+                    "max": stats["max"],
+                    "outlier_count": stats["outlier_count"],
+                    "outlier_ratio": stats["outlier_ratio"],
+                    "skewness": stats["skewness"],
+                    "kurtosis": stats.get("kurtosis"),
+                    "quantile_sketch": stats.get("quantile_sketch"),
+                    "histogram": stats.get("histogram"),
+                    **{k: stats.get(k) for k in PERCENTILES},
+                }
+            )
+
+    # Parent dataset/snapshot rows must exist before the bulk INSERTs.
+    db.flush()
+    if column_rows:
+        db.execute(insert(SnapshotColumn), column_rows)
+    if stats_rows:
+        db.execute(insert(SnapshotStatistics), stats_rows)
+    snapshot.content_sha256 = content_sha256
+
+
+def mark_run_completed(
+    run: IngestionRun,
+    started_mono: float,
+    snapshot: DatasetSnapshot | None = None,
+    deduplicated: bool = False,
+) -> None:
+    run.status = "completed"
+    run.message = (
+        "Upload identical to latest snapshot; profiling skipped"
+        if deduplicated
+        else "Ingestion completed successfully"
+    )
+    if snapshot is not None:
+        run.snapshot_id = snapshot.id
+    run.completed_at = datetime.now(timezone.utc)
+    run.duration_ms = int((time.monotonic() - started_mono) * 1000)
+    run.error_message = None
+
+
+def mark_run_failed(db: Session, run: IngestionRun, exc: Exception, started_mono: float) -> None:
+    """Best-effort failure record; never raises."""
+    try:
+        run.status = "failed"
+        run.message = "Ingestion failed"
+        run.error_message = f"{type(exc).__name__}: {exc}"[:1000]
+        run.completed_at = datetime.now(timezone.utc)
+        run.duration_ms = int((time.monotonic() - started_mono) * 1000)
+        db.add(run)
+        db.commit()
+    except Exception:
+        db.rollback()
+
+
+def evaluate_rules_after_ingest(db: Session, dataset_id) -> int:
+    """Run alert rules for a freshly ingested dataset; failures are logged, not raised."""
+    try:
+        summary = evaluate_dataset_rules(db, dataset_id)
+        return int(summary.created_events)
+    except Exception:
+        db.rollback()
+        logger.exception("Alert rule evaluation failed after ingestion for dataset_id=%s", dataset_id)
+        return 0
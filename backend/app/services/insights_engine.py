@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import hashlib
 import json
-import re
-from typing import Any, List, Optional
+from typing import Any, List
 
+import pandas as pd
 from sqlalchemy.orm import Session
 
 from app.models import (
@@ -17,54 +17,33 @@ from app.models import (
 )
 from app.models.dataset_insight import DatasetInsight
 from app.models.dataset_preview import DatasetPreview
-
-_NUM_RE = re.compile(r"^[\s\+\-]?(?:\d+\.?\d*|\.\d+)(?:[eE][\+\-]?\d+)?\s*$")
-_DATE_HINT_RE = re.compile(
-    r"^\s*\d{4}-\d{2}-\d{2}(\s+\d{2}:\d{2}(:\d{2})?)?\s*$"  # 2026-01-02 or 2026-01-02 12:30(:45)
-)
-_EU_DATE_RE = re.compile(r"^\s*\d{2}/\d{2}/\d{4}\s*$")  # 31/12/2026
-_US_DATE_RE = re.compile(r"^\s*\d{2}-\d{2}-\d{4}\s*$")  # 12-31-2026 (ambiguous but common)
+from app.services.risk_cache import invalidate_dataset_risk
+from app.services.type_inference import TypeSignals, is_text_dtype, text_signals
 
 
-def _canonical_row(r: dict) -> str:
-    # stable JSON string for hashing
-    return json.dumps(r, sort_keys=True, default=str, ensure_ascii=False)
+def _preview_frame(preview_rows: list) -> pd.DataFrame:
+    """Preview rows as one DataFrame, so preview checks run as column operations."""
+    records = [r for r in preview_rows or [] if isinstance(r, dict)]
+    return pd.DataFrame.from_records(records) if records else pd.DataFrame()
 
 
-def _to_float_like(v: Any) -> Optional[float]:
-    """
-    Try to parse a value into float in a tolerant way:
-    - supports "1,234.56" (commas removed)
-    - supports "\u20ac123" / "$123" (currency stripped)
-    - rejects empty/None
-    """
-    if v is None:
-        return None
+def _nonblank_strings(df: pd.DataFrame) -> pd.DataFrame:
+    """Every cell as a stripped string, with nulls and blanks masked to NA."""
+    text = df.astype("string").apply(lambda s: s.str.strip())
+    return text.mask(text == "")
 
-    # Already numeric
-    if isinstance(v, (int, float)) and not (isinstance(v, float) and (v != v)):  # NaN check
-        return float(v)
 
-    s = str(v).strip()
-    if not s:
-        return None
-
-    # Remove common currency/percent symbols and spaces
-    s = s.replace(",", "")
-    s = s.replace("%", "")
-    s = s.replace("\u20ac", "").replace("$", "").replace("\u00a3", "")
+def _count_duplicate_rows(df: pd.DataFrame) -> int:
+    try:
+        return int(df.duplicated().sum())
+    except TypeError:
+        # unhashable JSON values (lists/objects): compare their string form
+        return int(df.astype(str).duplicated().sum())
 
-    if not _NUM_RE.match(s):
-        return None
 
-    try:
-        f = float(s)
-        # reject NaN/inf
-        if f != f or f == float("inf") or f == float("-inf"):
-            return None
-        return f
-    except Exception:
-        return None
+def _constant_columns(df: pd.DataFrame) -> int:
+    """Columns with exactly one distinct non-blank value."""
+    return int((_nonblank_strings(df).nunique(dropna=True) == 1).sum())
 
 
 def _is_date_like_name(name: str) -> bool:
@@ -79,63 +58,71 @@ def _is_categorical_dtype(dtype: str) -> bool:
     return any(k in d for k in ["object", "bool", "category", "string", "varchar", "text", "char"])
 
 
-def _date_family(v: Any) -> Optional[str]:
-    """Classify a date-ish string into a format family to detect mixed formats."""
-    if v is None:
-        return None
-    s = str(v).strip()
-    if not s:
-        return None
-
-    # quick family detection (cheap, avoids heavy parsing)
-    if _DATE_HINT_RE.match(s):
-        return "ISO"
-    if _EU_DATE_RE.match(s):
-        return "EU_SLASH"
-    if _US_DATE_RE.match(s):
-        return "US_DASH"
-
-    # fallback: try python parsing for common iso-ish shapes
-    # Keep it conservative to avoid false positives
-    try:
-        datetime.fromisoformat(s.replace("Z", "+00:00"))
-        return "ISO_LIKE"
-    except Exception:
-        return "UNKNOWN"
-
-
-def _try_parse_datetime(v: Any) -> Optional[datetime]:
-    if v is None:
-        return None
-    s = str(v).strip()
-    if not s:
-        return None
-
-    # normalize Z
-    s2 = s.replace("Z", "+00:00")
+def _duplicate_severity(dup_ratio: float, constant_cols: int, where: str) -> tuple[str, str]:
+    # severity decision
+    if constant_cols >= 2:
+        return (
+            "info",
+            f"Duplicates may be expected because {constant_cols} column(s) appear constant{where}.",
+        )
+    severity = "info" if dup_ratio < 0.05 else "warning"
+    return severity, "Consider de-duplication rules or upstream export logic."
 
-    # Try ISO first
-    try:
-        dt = datetime.fromisoformat(s2)
-        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
-    except Exception:
-        pass
 
-    # Try EU slash dd/mm/yyyy
-    try:
-        dt = datetime.strptime(s, "%d/%m/%Y").replace(tzinfo=timezone.utc)
-        return dt
-    except Exception:
-        pass
+def insight_fingerprint(ins: DatasetInsight) -> str:
+    """Stable hash of what an insight says: code, column, severity and its rendered evidence."""
+    payload = json.dumps(
+        [ins.code, ins.column_name, ins.severity, ins.title, ins.message],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-    # Try US dash mm-dd-yyyy
-    try:
-        dt = datetime.strptime(s, "%m-%d-%Y").replace(tzinfo=timezone.utc)
-        return dt
-    except Exception:
-        pass
 
-    return None
+def _sync_insights(db: Session, dataset_id, candidates: list[DatasetInsight]) -> list[DatasetInsight]:
+    """
+    Reconcile freshly computed insights with the stored ones, keyed by
+    (code, column): unchanged rows are left alone, changed ones are updated in
+    place, new ones inserted and vanished ones deleted. Commits only when
+    this reconciliation changed something (not on the caller's unrelated
+    pending objects), so refreshing an unchanged snapshot writes nothing.
+    """
+    stored: dict[tuple[str, str | None], DatasetInsight] = {}
+    stale: list[DatasetInsight] = []
+    for row in db.query(DatasetInsight).filter(DatasetInsight.dataset_id == dataset_id).all():
+        key = (row.code, row.column_name)
+        if row.fingerprint is None or key in stored:
+            stale.append(row)  # rows from before fingerprints, or duplicates
+        else:
+            stored[key] = row
+
+    changed = False
+    result: list[DatasetInsight] = []
+    for cand in candidates:
+        cand.fingerprint = insight_fingerprint(cand)
+        row = stored.pop((cand.code, cand.column_name), None)
+        if row is None:
+            db.add(cand)
+            result.append(cand)
+            changed = True
+            continue
+        if row.fingerprint != cand.fingerprint:
+            changed = True
+            row.column_id = cand.column_id
+            row.severity = cand.severity
+            row.title = cand.title
+            row.message = cand.message
+            row.fingerprint = cand.fingerprint
+        result.append(row)
+
+    stale.extend(stored.values())
+    for row in stale:
+        db.delete(row)
+        changed = True
+
+    if changed:
+        db.commit()
+        invalidate_dataset_risk(dataset_id)
+    return result
 
 
 def refresh_insights(db: Session, dataset_id) -> list[DatasetInsight]:
@@ -184,53 +171,47 @@ def refresh_insights(db: Session, dataset_id) -> list[DatasetInsight]:
         .first()
     )
     preview_rows = preview.rows if preview else []
+    # built once; preview fallbacks below are column operations on it
+    preview_df = _preview_frame(preview_rows)
 
     insights: List[DatasetInsight] = []
 
-    # clear old insights (idempotent refresh)
-    db.query(DatasetInsight).filter(DatasetInsight.dataset_id == dataset_id).delete()
+    # --- DUPLICATE_ROWS (dataset-level, exact over the whole file at ingest) ---
+    if latest_snapshot is not None and latest_snapshot.duplicate_row_count is not None:
+        dup = int(latest_snapshot.duplicate_row_count)
+        n = int(latest_snapshot.row_count or 0)
 
-    # --- DUPLICATE_ROWS_IN_PREVIEW (dataset-level) ---
-    if preview and preview.rows:
-        n = len(preview.rows)
+        if dup > 0 and n > 0:
+            dup_ratio = dup / n
+            # constant dimensions over the full data: exactly 1 distinct non-null value
+            constant_cols = sum(1 for c in columns if int(c.distinct_count or 0) == 1)
+            severity, msg_extra = _duplicate_severity(dup_ratio, constant_cols, "")
 
-        # count duplicates using canonical representation
-        seen = set()
-        dup = 0
-        for r in preview.rows:
-            key = _canonical_row(r)
-            if key in seen:
-                dup += 1
-            else:
-                seen.add(key)
+            insights.append(
+                DatasetInsight(
+                    dataset_id=dataset.id,
+                    column_id=None,
+                    severity=severity,
+                    code="DUPLICATE_ROWS",
+                    title="Duplicate rows detected",
+                    message=(
+                        f"Found {dup} duplicate row(s) across all {n} rows "
+                        f"({dup_ratio:.1%}). {msg_extra}"
+                    ),
+                )
+            )
+
+    # --- DUPLICATE_ROWS_IN_PREVIEW (fallback when no full-file count is stored) ---
+    elif not preview_df.empty:
+        n = len(preview_df)
+        dup = _count_duplicate_rows(preview_df)
 
         if dup > 0 and n > 0:
             dup_ratio = dup / n
 
-            # detect "constant dimensions" (columns that have exactly 1 distinct non-null value in preview)
-            constant_cols = 0
-            if isinstance(preview.rows[0], dict):
-                keys = list(preview.rows[0].keys())
-                for k in keys:
-                    vals = []
-                    for r in preview.rows:
-                        if isinstance(r, dict):
-                            v = r.get(k)
-                            if v is not None and str(v).strip() != "":
-                                vals.append(str(v))
-                    if len(set(vals)) <= 1 and len(vals) > 0:
-                        constant_cols += 1
-
-            # severity decision
-            if constant_cols >= 2:
-                severity = "info"
-                msg_extra = f"Duplicates may be expected because {constant_cols} column(s) appear constant in preview."
-            else:
-                if dup_ratio < 0.05:
-                    severity = "info"
-                else:
-                    severity = "warning"
-                msg_extra = "Consider de-duplication rules or upstream export logic."
+            # "constant dimensions": columns with exactly 1 distinct non-blank value in preview
+            constant_cols = _constant_columns(preview_df)
+            severity, msg_extra = _duplicate_severity(dup_ratio, constant_cols, " in preview")
 
             insights.append(
                 DatasetInsight(
@@ -261,6 +242,7 @@ def refresh_insights(db: Session, dataset_id) -> list[DatasetInsight]:
     row_count = max(int(dataset.row_count or 0), 0)
     for col in columns:
         insight_col_id = None if cols_are_snapshot else col.id
+        first_col_insight = len(insights)
         # --- HIGH_NULL_RATIO ---
         if row_count > 0:
             null_ratio = (col.null_count or 0) / row_count
@@ -292,38 +274,46 @@ def refresh_insights(db: Session, dataset_id) -> list[DatasetInsight]:
 
         numeric_as_string_detected = False
 
+        # Type-inference counts computed over every value at ingest. Older
+        # snapshots (and legacy dataset columns) derive the same counts from
+        # the preview column; typed (non-text) snapshot columns have no
+        # string-format checks.
+        signals = TypeSignals.from_column(col) if cols_are_snapshot else None
+        scope = ""
+        if (
+            signals is None
+            and col.name in preview_df.columns
+            and (not cols_are_snapshot or is_text_dtype(col.dtype))
+        ):
+            signals, scope = text_signals(preview_df[col.name]), "preview "
+
         # --- POTENTIAL_NUMERIC_AS_STRING (type integrity) ---
-        # Use preview rows to see if values are mostly numeric but stored as object/string.
-        if preview_rows and _is_categorical_dtype(col.dtype) and not _is_date_like_name(col.name):
-            vals = []
-            for r in preview_rows:
-                if isinstance(r, dict) and col.name in r:
-                    vals.append(r.get(col.name))
-
-            non_null = [v for v in vals if v is not None and str(v).strip() != ""]
-
-            # Noise gate: need enough evidence (small datasets should still work)
-            if len(non_null) >= 3:
-                parsed = [_to_float_like(v) for v in non_null]
-                ok = [p for p in parsed if p is not None]
-                ratio = len(ok) / len(non_null) if non_null else 0.0
-
-                if ratio >= 0.80:
-                    numeric_as_string_detected = True
-                    insights.append(
-                        DatasetInsight(
-                            dataset_id=dataset.id,
-                            column_id=insight_col_id,
-                            severity="warning",
-                            code="POTENTIAL_NUMERIC_AS_STRING",
-                            title="Numeric values stored as text",
-                            message=(
-                                f"Column '{col.name}' is stored as '{col.dtype}' but "
-                                f"{len(ok)}/{len(non_null)} preview values ({ratio:.0%}) parse as numbers. "
-                                "Consider casting/cleaning (remove separators/currency) to enable numeric analytics."
-                            ),
-                        )
+        # Values mostly numeric but stored as object/string.
+        # Noise gate: need enough evidence (small datasets should still work)
+        if (
+            signals is not None
+            and signals.text_count >= 3
+            and _is_categorical_dtype(col.dtype)
+            and not _is_date_like_name(col.name)
+        ):
+            ratio = signals.numeric_count / signals.text_count
+
+            if ratio >= 0.80:
+                numeric_as_string_detected = True
+                insights.append(
+                    DatasetInsight(
+                        dataset_id=dataset.id,
+                        column_id=insight_col_id,
+                        severity="warning",
+                        code="POTENTIAL_NUMERIC_AS_STRING",
+                        title="Numeric values stored as text",
+                        message=(
+                            f"Column '{col.name}' is stored as '{col.dtype}' but "
+                            f"{signals.numeric_count}/{signals.text_count} {scope}values ({ratio:.0%}) parse as numbers. "
+                            "Consider casting/cleaning (remove separators/currency) to enable numeric analytics."
+                        ),
                     )
+                )
 
         # --- LOW_CARDINALITY ---
         # Only add this if the column is NOT likely numeric-as-string (otherwise it's misleading)
@@ -383,18 +373,14 @@ def refresh_insights(db: Session, dataset_id) -> list[DatasetInsight]:
                     )
                 )
 
-        # --- DATE/TIME QUALITY (preview-based) ---
-        if preview_rows and _is_date_like_name(col.name):
-            vals = []
-            for r in preview_rows:
-                if isinstance(r, dict) and col.name in r:
-                    vals.append(r.get(col.name))
+        # --- DATE/TIME QUALITY ---
+        if _is_date_like_name(col.name) and signals is not None:
+            date_ok, date_total = signals.date_count, signals.text_count
+            families = signals.date_families
+            future_count = signals.future_date_count
 
-            non_null = [v for v in vals if v is not None and str(v).strip() != ""]
-            if len(non_null) >= 5:
-                parsed = [_try_parse_datetime(v) for v in non_null]
-                ok = [p for p in parsed if p is not None]
-                ratio = (len(ok) / len(non_null)) if non_null else 0.0
+            if date_total >= 5:
+                ratio = date_ok / date_total
 
                 # DATE_PARSE_FAILURE
                 if ratio < 0.80:
@@ -407,22 +393,17 @@ def refresh_insights(db: Session, dataset_id) -> list[DatasetInsight]:
                             title="Date/time parse failures",
                             message=(
                                 f"Column '{col.name}' looks like a date/time field but only "
-                                f"{len(ok)}/{len(non_null)} preview values ({ratio:.0%}) could be parsed. "
+                                f"{date_ok}/{date_total} {scope}values ({ratio:.0%}) could be parsed. "
                                 "Standardize formats (ISO 8601 recommended) and remove invalid values."
                             ),
                         )
                     )
 
                 # MIXED_DATE_FORMATS (only if parse is mostly OK; avoids spam)
-                families = {}
-                for v in non_null:
-                    fam = _date_family(v)
-                    if fam and fam != "UNKNOWN":
-                        families[fam] = families.get(fam, 0) + 1
-
                 strong_families = {k: c for k, c in families.items() if c >= 2}
                 if len(strong_families) >= 2 and ratio >= 0.80:
                     fams = ", ".join([f"{k}({c})" for k, c in sorted(strong_families.items(), key=lambda x: -x[1])])
+                    where = "in preview" if scope else "across all values"
                     insights.append(
                         DatasetInsight(
                             dataset_id=dataset.id,
@@ -431,26 +412,25 @@ def refresh_insights(db: Session, dataset_id) -> list[DatasetInsight]:
                             code="MIXED_DATE_FORMATS",
                             title="Mixed date formats detected",
                             message=(
-                                f"Column '{col.name}' contains mixed date/time formats in preview: {fams}. "
+                                f"Column '{col.name}' contains mixed date/time formats {where}: {fams}. "
                                 "Normalize to a single standard (ISO 8601) to avoid sorting/aggregation issues."
                             ),
                         )
                     )
 
                 # FUTURE_DATES_IN_PREVIEW (optional but useful; keep as info to prevent spam)
-                now = datetime.now(timezone.utc)
-                future = [dt for dt in ok if dt and dt > (now.replace(microsecond=0))]
                 # add a tolerance: ignore tiny future if time zones
-                if future and ratio >= 0.80:
+                if future_count and ratio >= 0.80:
+                    where = "in preview" if scope else f"({future_count} value(s))"
                     insights.append(
                         DatasetInsight(
                             dataset_id=dataset.id,
                             column_id=insight_col_id,
                             severity="info",
                             code="FUTURE_DATES_IN_PREVIEW",
-                            title="Future dates found (preview)",
+                            title="Future dates found" + (" (preview)" if scope else ""),
                             message=(
-                                f"Column '{col.name}' contains future date/time values in preview. "
+                                f"Column '{col.name}' contains future date/time values {where}. "
                                 "Confirm whether this is expected (e.g., scheduled events) or a parsing/timezone/data-entry issue."
                             ),
                         )
@@ -529,9 +509,8 @@ def refresh_insights(db: Session, dataset_id) -> list[DatasetInsight]:
                         )
                     )
 
-    # persist
-    for i in insights:
-        db.add(i)
-    db.commit()
+        # snapshot insights have no dataset column id; the name identifies the column
+        for ins in insights[first_col_insight:]:
+            ins.column_name = col.name
 
-    return insights
+    return _sync_insights(db, dataset_id, insights)
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import math
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.sketches import (
+    DistinctCounter,
+    FrequentItems,
+    KLLSketch,
+    hash_rows,
+    hash_text_series,
+    new_distinct_counter,
+    new_frequent_items,
+    new_quantile_sketch,
+    unique_row_hashes,
+)
+from app.services.type_inference import TypeSignals, text_signals
+
+
+@dataclass
+class MomentAccumulator:
+    """
+    Mergeable running moments for one numeric column.
+
+    Keeps count/sum and the central moment sums M2/M3/M4 so two partial
+    accumulators (e.g. two CSV chunks) can be combined exactly without
+    revisiting the raw values (Chan/Pebay pairwise update).
+    """
+
+    count: int = 0
+    total: float = 0.0
+    m2: float = 0.0
+    m3: float = 0.0
+    m4: float = 0.0
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+    @classmethod
+    def from_array(cls, x: np.ndarray) -> "MomentAccumulator":
+        x = np.asarray(x, dtype="float64").reshape(-1, 1)
+        return cls.from_block(x)[0]
+
+    @classmethod
+    def from_block(cls, block: np.ndarray) -> list["MomentAccumulator"]:
+        """
+        One accumulator per column of a 2-D float block (rows x cols), computed
+        in a single vectorized pass. NaN/inf cells are treated as missing.
+        """
+        block = np.array(block, dtype="float64", order="F", copy=True)
+        block[~np.isfinite(block)] = np.nan
+        present = ~np.isnan(block)
+        counts = present.sum(axis=0)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            totals = np.where(present, block, 0.0).sum(axis=0)
+            means = totals / counts
+            d = np.where(present, block - means, 0.0)
+            d2 = d * d
+            m2 = d2.sum(axis=0)
+            m3 = (d2 * d).sum(axis=0)
+            m4 = (d2 * d2).sum(axis=0)
+            mins = np.where(present, block, np.inf).min(axis=0, initial=np.inf)
+            maxs = np.where(present, block, -np.inf).max(axis=0, initial=-np.inf)
+
+        out: list[MomentAccumulator] = []
+        for j in range(block.shape[1]):
+            n = int(counts[j])
+            if n == 0:
+                out.append(cls())
+                continue
+            out.append(
+                cls(
+                    count=n,
+                    total=float(totals[j]),
+                    m2=float(m2[j]),
+                    m3=float(m3[j]),
+                    m4=float(m4[j]),
+                    min=float(mins[j]),
+                    max=float(maxs[j]),
+                )
+            )
+        return out
+
+    @property
+    def mean(self) -> Optional[float]:
+        if self.count <= 0:
+            return None
+        return self.total / self.count
+
+    def merge(self, other: "MomentAccumulator") -> "MomentAccumulator":
+        """Fold `other` into self (in place) and return self."""
+        if other.count <= 0:
+            return self
+        if self.count <= 0:
+            self.count, self.total = other.count, other.total
+            self.m2, self.m3, self.m4 = other.m2, other.m3, other.m4
+            self.min, self.max = other.min, other.max
+            return self
+
+        na = float(self.count)
+        nb = float(other.count)
+        n = na + nb
+        delta = (other.total / nb) - (self.total / na)
+        d2 = delta * delta
+
+        m2 = self.m2 + other.m2 + d2 * na * nb / n
+        m3 = (
+            self.m3
+            + other.m3
+            + d2 * delta * na * nb * (na - nb) / (n * n)
+            + 3.0 * delta * (na * other.m2 - nb * self.m2) / n
+        )
+        m4 = (
+            self.m4
+            + other.m4
+            + d2 * d2 * na * nb * (na * na - na * nb + nb * nb) / (n * n * n)
+            + 6.0 * d2 * (na * na * other.m2 + nb * nb * self.m2) / (n * n)
+            + 4.0 * delta * (na * other.m3 - nb * self.m3) / n
+        )
+
+        self.count += other.count
+        self.total += other.total
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def std(self) -> Optional[float]:
+        """Sample standard deviation (ddof=1), like pandas Series.std()."""
+        if self.count < 2:
+            return None
+        return math.sqrt(max(self.m2, 0.0) / (self.count - 1))
+
+    def skewness(self) -> Optional[float]:
+        """Adjusted Fisher-Pearson skewness, matching pandas Series.skew()."""
+        n = self.count
+        if n < 3:
+            return None
+        if self.m2 <= 1e-14 * max(1.0, abs(self.total)):
+            return 0.0
+        return (n * math.sqrt(n - 1) / (n - 2)) * (self.m3 / self.m2 ** 1.5)
+
+    def kurtosis(self) -> Optional[float]:
+        """Sample excess kurtosis, matching pandas Series.kurt()."""
+        n = self.count
+        if n < 4:
+            return None
+        if self.m2 <= 1e-14 * max(1.0, abs(self.total)):
+            return 0.0
+        adj = 3.0 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+        numer = n * (n + 1) * (n - 1) * self.m4
+        denom = (n - 2) * (n - 3) * self.m2 ** 2
+        return numer / denom - adj
+
+
+def merge_dtype(current: Optional[str], incoming: str) -> str:
+    """
+    Widen a column dtype across chunks the way a single read_csv would:
+    int + float -> float64, anything mixed with text/bool -> object.
+    """
+    if current is None or current == incoming:
+        return incoming
+    numeric = ("int64", "float64")
+    if current in numeric and incoming in numeric:
+        return "float64"
+    return "object"
+
+
+@dataclass
+class ColumnAccumulator:
+    """
+    Per-column state folded chunk by chunk in streaming ingestion.
+
+    distinct values are tracked as vectorized 64-bit hashes folded into a
+    DistinctCounter (exact up to a limit, HyperLogLog beyond it), which is far
+    smaller than a set of Python strings. Numeric columns also fold their
+    values into a KLL quantile sketch for percentiles and IQR bounds.
+    `text` folds type-inference counts for every chunk (numeric chunks count
+    cheaply) so they are complete if a later chunk turns the column to text;
+    None when they cannot be known (appending to a snapshot without them).
+    `top` is a heavy-hitters summary of text values; None once a column turns
+    to text after numeric chunks whose values were not tracked.
+    """
+
+    name: str
+    dtype: Optional[str] = None
+    null_count: int = 0
+    numeric: bool = True
+    moments: MomentAccumulator = field(default_factory=MomentAccumulator)
+    distinct: DistinctCounter = field(default_factory=new_distinct_counter)
+    quantiles: KLLSketch = field(default_factory=new_quantile_sketch)
+    text: Optional[TypeSignals] = field(default_factory=TypeSignals)
+    top: Optional[FrequentItems] = field(default_factory=new_frequent_items)
+    untracked_values: int = 0
+
+    @property
+    def distinct_count(self) -> int:
+        return self.distinct.count
+
+    def update(self, s: pd.Series) -> None:
+        self.dtype = merge_dtype(self.dtype, str(s.dtype))
+        self.null_count += int(s.isna().sum())
+
+        signals = text_signals(s) if self.text is not None else None
+        if signals is not None:
+            self.text.merge(signals)
+        if self.dtype == "object" and (signals is None or signals.numeric_count):
+            # Numbers in text chunks must hash like the numeric chunks of the column
+            self.distinct.add_hashes(hash_text_series(s))
+        else:
+            self.distinct.add_series(s)
+        if self.top is not None:
+            if self.dtype != "object":
+                self.untracked_values += int(s.notna().sum())
+            elif self.untracked_values:
+                self.top = None
+            else:
+                self.top.update(s)
+
+        if self.numeric and (self.dtype == "object" or not pd.api.types.is_numeric_dtype(s)):
+            # A later text chunk demotes the column; drop numeric state.
+            self.numeric = False
+            self.moments = MomentAccumulator()
+            self.quantiles = new_quantile_sketch()
+
+
+@dataclass
+class StreamedProfile:
+    row_count: int
+    columns: list[ColumnAccumulator]
+    preview_df: pd.DataFrame
+    duplicate_row_count: int = 0
+    # distinct row hashes of the whole file (see sketches.hash_rows)
+    row_hashes: Optional[np.ndarray] = None
+
+
+def profile_csv_stream(fileobj: Any, chunk_rows: int, preview_rows: int) -> StreamedProfile:
+    """
+    Read a CSV file object in chunks of `chunk_rows` and fold every chunk into
+    per-column accumulators. Peak memory depends on chunk size, not file size.
+    """
+    row_count = 0
+    accs: dict[str, ColumnAccumulator] = {}
+    preview_parts: list[pd.DataFrame] = []
+    preview_have = 0
+    # per-chunk unique row hashes; deduplicated across chunks once at the end
+    row_hash_parts: list[np.ndarray] = []
+
+    reader = pd.read_csv(fileobj, chunksize=max(1, int(chunk_rows)))
+    with reader:
+        for chunk in reader:
+            row_count += int(chunk.shape[0])
+            row_hash_parts.append(pd.unique(hash_rows(chunk)))
+
+            if preview_have < preview_rows:
+                part = chunk.head(preview_rows - preview_have).copy()
+                preview_parts.append(part)
+                preview_have += int(part.shape[0])
+
+            numeric_cols: list[Any] = []
+            numeric_accs: list[ColumnAccumulator] = []
+            for col in chunk.columns:
+                key = str(col)
+                acc = accs.get(key)
+                if acc is None:
+                    acc = accs[key] = ColumnAccumulator(name=key)
+                acc.update(chunk[col])
+                if acc.numeric:
+                    numeric_cols.append(col)
+                    numeric_accs.append(acc)
+
+            # Moments for every still-numeric column in one 2-D pass per chunk.
+            if numeric_cols:
+                block = chunk[numeric_cols].to_numpy(dtype="float64", na_value=np.nan)
+                for j, (acc, part) in enumerate(zip(numeric_accs, MomentAccumulator.from_block(block))):
+                    acc.moments.merge(part)
+                    acc.quantiles.update(block[:, j])
+
+    preview_df = pd.concat(preview_parts) if preview_parts else pd.DataFrame()
+    row_hashes = unique_row_hashes(row_hash_parts)
+    return StreamedProfile(
+        row_count=row_count,
+        columns=list(accs.values()),
+        preview_df=preview_df,
+        duplicate_row_count=int(row_count - row_hashes.size),
+        row_hashes=row_hashes,
+    )
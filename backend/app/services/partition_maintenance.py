@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import argparse
+from datetime import date, datetime, timedelta, timezone
+import logging
+import re
+from typing import Any, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.logging import setup_logging
+from app.db.session import SessionLocal
+
+logger = logging.getLogger("insightsentinel.partitions")
+
+# Tables range-partitioned by month on created_at (alembic 8e5a1c7d3b90)
+RISK_HISTORY_TABLE = "dataset_risk_history"
+PARTITIONED_TABLES: tuple[str, ...] = (RISK_HISTORY_TABLE, "alert_events", "dataset_anomaly_events")
+
+# Rollup table -> date_bin stride; buckets are aligned to UTC midnight
+ROLLUP_TABLES: dict[str, str] = {
+    "dataset_risk_history_hourly": "1 hour",
+    "dataset_risk_history_daily": "1 day",
+}
+_ROLLUP_ORIGIN = "2000-01-01 00:00:00+00"
+
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def add_months(d: date, n: int) -> date:
+    m = d.month - 1 + n
+    return date(d.year + m // 12, m % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def _bound(month: date) -> str:
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+def list_partitions(db: Session, table: str) -> dict[str, date]:
+    """Monthly partitions of `table` as name -> first day of the month (DEFAULT excluded)."""
+    rows = db.execute(
+        text(
+            """
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST(:parent AS regclass)
+            """
+        ),
+        {"parent": table},
+    ).scalars()
+    out: dict[str, date] = {}
+    for name in rows:
+        m = _PARTITION_SUFFIX.search(name)
+        if m:
+            out[name] = date(int(m.group(1)), int(m.group(2)), 1)
+    return out
+
+
+def ensure_partitions(db: Session, table: str, through: date) -> list[str]:
+    """
+    Create missing monthly partitions from the newest existing one up to and
+    including `through`. Rows that already landed in the DEFAULT partition for
+    a month are moved into the new partition in the same transaction.
+    """
+    existing = list_partitions(db, table)
+    today = month_start(datetime.now(timezone.utc).date())
+    month = add_months(max(existing.values()), 1) if existing else today
+    created: list[str] = []
+    while month <= month_start(through):
+        name = partition_name(table, month)
+        lo, hi = _bound(month), _bound(add_months(month, 1))
+        params = {"lo": lo, "hi": hi}
+        stray = db.execute(
+            text(
+                f"SELECT EXISTS (SELECT 1 FROM {table}_default "
+                f"WHERE created_at >= CAST(:lo AS timestamptz) AND created_at < CAST(:hi AS timestamptz))"
+            ),
+            params,
+        ).scalar()
+        if stray:
+            # A DEFAULT partition holding rows of the range blocks CREATE ... PARTITION OF;
+            # build the table standalone, move the rows, then attach it
+            db.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+            db.execute(
+                text(
+                    f"WITH moved AS (DELETE FROM {table}_default "
+                    f"WHERE created_at >= CAST(:lo AS timestamptz) AND created_at < CAST(:hi AS timestamptz) "
+                    f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+                ),
+                params,
+            )
+            db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{lo}') TO ('{hi}')"))
+        else:
+            db.execute(text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ('{lo}') TO ('{hi}')"))
+        db.commit()
+        created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def expired_partitions(db: Session, table: str, cutoff: datetime) -> list[str]:
+    """Partitions whose whole month ends at or before `cutoff`, oldest first."""
+    parts = list_partitions(db, table)
+    keep_from = cutoff.astimezone(timezone.utc).date()
+    return sorted(
+        (name for name, month in parts.items() if add_months(month, 1) <= keep_from),
+        key=parts.__getitem__,
+    )
+
+
+def rollup_history(db: Session, relation: str, before: Optional[datetime] = None) -> int:
+    """
+    Fold raw history rows of `relation` (a partition, optionally only rows
+    older than `before`) into the hourly and daily rollups, merging into
+    buckets that already exist. Called in the transaction that drops or
+    deletes those rows, so no row is counted twice. Returns the row count.
+    """
+    where = "WHERE created_at < :before" if before is not None else ""
+    params: dict[str, Any] = {"before": before} if before is not None else {}
+    count = int(db.execute(text(f"SELECT count(*) FROM {relation} {where}"), params).scalar() or 0)
+    if not count:
+        return 0
+    for rollup, stride in ROLLUP_TABLES.items():
+        db.execute(
+            text(
+                f"""
+                INSERT INTO {rollup} (
+                    dataset_id, bucket_start, row_count,
+                    risk_min, risk_max, risk_sum,
+                    smoothed_min, smoothed_max, smoothed_sum, smoothed_count,
+                    last_at, risk_last, risk_level_last, smoothed_last, delta_last, accel_last
+                )
+                SELECT
+                    dataset_id,
+                    date_bin(CAST(:stride AS interval), created_at, CAST(:origin AS timestamptz)) AS bucket,
+                    count(*),
+                    min(risk_score), max(risk_score), sum(risk_score),
+                    min(smoothed_score), max(smoothed_score), sum(smoothed_score), count(smoothed_score),
+                    max(created_at),
+                    (array_agg(risk_score ORDER BY created_at DESC))[1],
+                    (array_agg(risk_level ORDER BY created_at DESC))[1],
+                    (array_agg(smoothed_score ORDER BY created_at DESC))[1],
+                    (array_agg(delta_score ORDER BY created_at DESC))[1],
+                    (array_agg(accel_score ORDER BY created_at DESC))[1]
+                FROM {relation}
+                {where}
+                GROUP BY dataset_id, bucket
+                ON CONFLICT (dataset_id, bucket_start) DO UPDATE SET
+                    row_count = {rollup}.row_count + EXCLUDED.row_count,
+                    risk_min = LEAST({rollup}.risk_min, EXCLUDED.risk_min),
+                    risk_max = GREATEST({rollup}.risk_max, EXCLUDED.risk_max),
+                    risk_sum = {rollup}.risk_sum + EXCLUDED.risk_sum,
+                    smoothed_min = LEAST({rollup}.smoothed_min, EXCLUDED.smoothed_min),
+                    smoothed_max = GREATEST({rollup}.smoothed_max, EXCLUDED.smoothed_max),
+                    smoothed_sum = COALESCE({rollup}.smoothed_sum, 0) + COALESCE(EXCLUDED.smoothed_sum, 0),
+                    smoothed_count = {rollup}.smoothed_count + EXCLUDED.smoothed_count,
+                    last_at = GREATEST({rollup}.last_at, EXCLUDED.last_at),
+                    risk_last = CASE WHEN EXCLUDED.last_at >= {rollup}.last_at
+                        THEN EXCLUDED.risk_last ELSE {rollup}.risk_last END,
+                    risk_level_last = CASE WHEN EXCLUDED.last_at >= {rollup}.last_at
+                        THEN EXCLUDED.risk_level_last ELSE {rollup}.risk_level_last END,
+                    smoothed_last = CASE WHEN EXCLUDED.last_at >= {rollup}.last_at
+                        THEN EXCLUDED.smoothed_last ELSE {rollup}.smoothed_last END,
+                    delta_last = CASE WHEN EXCLUDED.last_at >= {rollup}.last_at
+                        THEN EXCLUDED.delta_last ELSE {rollup}.delta_last END,
+                    accel_last = CASE WHEN EXCLUDED.last_at >= {rollup}.last_at
+                        THEN EXCLUDED.accel_last ELSE {rollup}.accel_last END
+                """
+            ),
+            {"stride": stride, "origin": _ROLLUP_ORIGIN, **params},
+        )
+    return count
+
+
+def run_partition_maintenance(
+    db: Session,
+    now: Optional[datetime] = None,
+    dry_run: bool = False,
+) -> dict[str, Any]:
+    """
+    One maintenance pass:
+      - create monthly partitions `partition_months_ahead` months ahead,
+      - roll raw risk history partitions older than `risk_history_raw_retention_days`
+        into the hourly/daily rollups and drop them (one transaction per partition),
+      - delete hourly rollups older than `risk_history_hourly_retention_days`,
+      - drop alert/anomaly event partitions past their retention,
+      - expire rows of the same age that landed in a DEFAULT partition.
+    A retention of 0 keeps everything.
+    """
+    settings = get_settings()
+    now = now or datetime.now(timezone.utc)
+    summary: dict[str, Any] = {
+        "created": [], "dropped": [], "rolled_up_rows": 0,
+        "default_rows_expired": 0, "hourly_rollups_deleted": 0,
+    }
+
+    through = add_months(month_start(now.date()), max(0, int(settings.partition_months_ahead)))
+    retention = {
+        RISK_HISTORY_TABLE: int(settings.risk_history_raw_retention_days),
+        "alert_events": int(settings.alert_event_retention_days),
+        "dataset_anomaly_events": int(settings.anomaly_event_retention_days),
+    }
+
+    for table in PARTITIONED_TABLES:
+        if not dry_run:
+            summary["created"] += ensure_partitions(db, table, through)
+
+        days = retention[table]
+        if days <= 0:
+            continue
+        for partition in expired_partitions(db, table, now - timedelta(days=days)):
+            summary["dropped"].append(partition)
+            if dry_run:
+                continue
+            try:
+                if table == RISK_HISTORY_TABLE:
+                    summary["rolled_up_rows"] += rollup_history(db, partition)
+                db.execute(text(f"DROP TABLE {partition}"))
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.exception("Partition drop failed", extra={"partition": partition})
+                raise
+
+        # Rows that fell into DEFAULT (no monthly partition existed yet) expire
+        # on the same month boundary as the partitions
+        keep_from = month_start((now - timedelta(days=days)).astimezone(timezone.utc).date())
+        before = datetime(keep_from.year, keep_from.month, 1, tzinfo=timezone.utc)
+        if dry_run:
+            continue
+        if table == RISK_HISTORY_TABLE:
+            summary["rolled_up_rows"] += rollup_history(db, f"{table}_default", before=before)
+        res = db.execute(text(f"DELETE FROM {table}_default WHERE created_at < :before"), {"before": before})
+        summary["default_rows_expired"] += int(res.rowcount or 0)
+        db.commit()
+
+    hourly_days = int(settings.risk_history_hourly_retention_days)
+    if hourly_days > 0 and not dry_run:
+        res = db.execute(
+            text("DELETE FROM dataset_risk_history_hourly WHERE bucket_start < :cutoff"),
+            {"cutoff": now - timedelta(days=hourly_days)},
+        )
+        summary["hourly_rollups_deleted"] = int(res.rowcount or 0)
+        db.commit()
+
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create upcoming partitions and apply retention.")
+    parser.add_argument("--dry-run", action="store_true", help="list partitions that would be dropped")
+    args = parser.parse_args()
+
+    setup_logging(get_settings().log_level)
+    db: Session = SessionLocal()
+    try:
+        summary = run_partition_maintenance(db, dry_run=args.dry_run)
+    finally:
+        db.close()
+    logger.info("Partition maintenance finished", extra={"dry_run": args.dry_run, **summary})
+
+
+if __name__ == "__main__":
+    main()
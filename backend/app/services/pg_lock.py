@@ -29,3 +29,11 @@ def advisory_unlock(db: Session, key: str) -> None:
         text("SELECT pg_advisory_unlock(:id)"),
         {"id": lock_id},
     )
+
+
+def advisory_xact_lock(db: Session, key: str) -> None:
+    """Block until the transaction-scoped lock for `key` is held; released at commit/rollback."""
+    db.execute(
+        text("SELECT pg_advisory_xact_lock(:id)"),
+        {"id": _lock_id(key)},
+    )
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 
 from app.models.dataset import Dataset
 from app.models.dataset_risk_history import DatasetRiskHistory
+from app.services.risk_engine import compute_dataset_risk_batch
 
 
 def compute_portfolio_overview(db: Session, owner_id, limit: int = 10) -> Dict[str, Any]:
@@ -15,7 +16,8 @@ def compute_portfolio_overview(db: Session, owner_id, limit: int = 10) -> Dict[s
       - top_risk: highest smoothed_score (fallback to risk_score)
       - top_movers: largest absolute delta_score
       - fastest_accelerating: largest absolute accel_score
-    Efficient: uses GROUP BY MAX(created_at) subquery.
+    Efficient: uses GROUP BY MAX(created_at) subquery. Datasets with no risk
+    history yet are scored live in one compute_dataset_risk_batch call.
     """
     limit = max(1, min(int(limit or 10), 100))
 
@@ -62,6 +64,28 @@ def compute_portfolio_overview(db: Session, owner_id, limit: int = 10) -> Dict[s
                 "delta_score": delta_v,
                 "accel_score": accel_v,
                 "created_at": r.created_at,
+                "source": "history",
+            }
+        )
+
+    tracked = {row["dataset_id"] for row in rows}
+    untracked = [
+        ds_id
+        for (ds_id,) in db.query(Dataset.id).filter(Dataset.owner_id == owner_id).all()
+        if str(ds_id) not in tracked
+    ]
+    for res in compute_dataset_risk_batch(db, untracked).values():
+        score = int(res.dataset_risk_score)
+        rows.append(
+            {
+                "dataset_id": res.dataset_id,
+                "risk_score": score,
+                "risk_level": res.risk_level,
+                "smoothed_score": score,
+                "delta_score": 0.0,
+                "accel_score": 0.0,
+                "created_at": None,
+                "source": "live",
             }
         )
 
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.dataset import Dataset
+from app.models.dataset_preview import DatasetPreview
+
+
+def preview_row_limit(dataset: Dataset | None = None) -> int:
+    """Preview size for a dataset: its own `preview_rows` or the configured default."""
+    settings = get_settings()
+    n = getattr(dataset, "preview_rows", None) or settings.preview_rows_default
+    return max(1, min(int(n), settings.preview_rows_max))
+
+
+def _json_value(v: Any) -> Any:
+    """One preview cell as a JSON-serialisable value."""
+    if v is None:
+        return None
+    if isinstance(v, (datetime, date, time)):
+        # pd.Timestamp is a datetime; NaT never gets here (masked as missing)
+        return v.isoformat()
+    if isinstance(v, Decimal):
+        return float(v) if v.is_finite() else None
+    if isinstance(v, timedelta):
+        return str(v)
+    if isinstance(v, bytes):
+        return v.decode("utf-8", errors="replace")
+    if isinstance(v, np.ndarray):
+        v = v.tolist()
+    if isinstance(v, (list, tuple)):
+        return [_json_value(x) for x in v]
+    if isinstance(v, dict):
+        return {str(k): _json_value(x) for k, x in v.items()}
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, float) and not np.isfinite(v):
+        return None
+    return v
+
+
+def sanitize_preview_rows(df: pd.DataFrame) -> list[dict[str, Any]]:
+    """
+    JSON-safe preview records from a DataFrame in frame-level passes:
+    NaN/inf/NA/NaT -> None and NumPy scalars -> plain Python values. Columns
+    that are not plain numbers (timestamps, dates, Decimal, nested values from
+    Arrow) are converted cell by cell: isoformat strings for temporal values,
+    float for Decimal.
+    """
+    if df.shape[0] == 0:
+        return []
+    clean = df.astype(object).where(df.notna(), None)
+    for j, dtype in enumerate(df.dtypes):
+        col = clean.iloc[:, j]
+        if is_numeric_dtype(dtype) and not is_bool_dtype(dtype):
+            clean.isetitem(j, col.where(~df.iloc[:, j].isin([np.inf, -np.inf]), None))
+        else:
+            # Built as object so converted values are not re-inferred (e.g. floats + None -> NaN)
+            clean.isetitem(j, pd.Series([_json_value(v) for v in col], index=col.index, dtype=object))
+    return clean.to_dict(orient="records")
+
+
+def upsert_dataset_preview(db: Session, dataset_id, rows: list[dict[str, Any]]) -> DatasetPreview:
+    """Replace the stored preview rows for a dataset (no commit)."""
+    preview = (
+        db.query(DatasetPreview)
+        .filter(DatasetPreview.dataset_id == dataset_id)
+        .first()
+    )
+    if preview is None:
+        preview = DatasetPreview(dataset_id=dataset_id, rows=rows)
+    else:
+        preview.rows = rows
+    db.add(preview)
+    return preview
@@ -0,0 +1,442 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import math
+import multiprocessing as mp
+import os
+import tempfile
+import threading
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_integer_dtype, is_numeric_dtype
+
+from app.core.config import get_settings
+from app.services.online_stats import MomentAccumulator
+from app.services.sketches import (
+    DistinctCounter,
+    KLLSketch,
+    hash_numeric,
+    new_distinct_counter,
+    new_quantile_sketch,
+)
+from app.services.type_inference import is_text_dtype, text_signals
+
+logger = logging.getLogger("insightsentinel.profiling")
+
+# Numeric columns are profiled in 2-D blocks of this many columns so the float
+# copy and its temporaries stay bounded on very wide frames.
+_BLOCK_COLUMNS = 64
+
+# Percentiles persisted on SnapshotStatistics (and usable as THRESHOLD rule scopes).
+PERCENTILES: dict[str, float] = {
+    "p01": 0.01,
+    "p05": 0.05,
+    "p50": 0.50,
+    "p95": 0.95,
+    "p99": 0.99,
+}
+
+# Longer top-k values are truncated in the stored frequency table.
+_TOP_VALUE_MAX_CHARS = 200
+
+
+def _safe_float(x: Any) -> float | None:
+    """Convert numpy/pandas scalars to plain float, returning None for NaN/inf."""
+    if x is None:
+        return None
+    try:
+        v = float(x)
+        if math.isnan(v) or math.isinf(v):
+            return None
+        return v
+    except Exception:
+        return None
+
+
+def moment_stats(acc: MomentAccumulator) -> dict[str, Any]:
+    """
+    mean/std/min/max/skewness/kurtosis from a (possibly merged) accumulator,
+    plus the sufficient statistics needed to merge it again later.
+    """
+    return {
+        "value_count": int(acc.count),
+        "value_sum": _safe_float(acc.total),
+        "m2": _safe_float(acc.m2),
+        "m3": _safe_float(acc.m3),
+        "m4": _safe_float(acc.m4),
+        "mean": _safe_float(acc.mean),
+        "std": _safe_float(acc.std()),
+        "min": _safe_float(acc.min),
+        "max": _safe_float(acc.max),
+        "skewness": _safe_float(acc.skewness()),
+        "kurtosis": _safe_float(acc.kurtosis()),
+    }
+
+
+def iqr_outliers(n: int, q1: float, q3: float, count_fn) -> tuple[int | None, float | None]:
+    """
+    outlier_count/outlier_ratio for Tukey fences around [q1, q3].
+    `count_fn(lower, upper)` returns how many values fall outside the fences.
+    """
+    # For outliers IQR works better with >= 4 points
+    if n < 4 or not (math.isfinite(q1) and math.isfinite(q3)):
+        return None, None
+    iqr = q3 - q1
+    if iqr <= 0:
+        # iqr == 0: all values essentially same -> no outliers
+        return 0, 0.0
+    outlier_count = int(count_fn(q1 - 1.5 * iqr, q3 + 1.5 * iqr))
+    return outlier_count, _safe_float(outlier_count / n)
+
+
+def _histogram_edges(lo: float, hi: float) -> np.ndarray:
+    if not hi > lo:
+        return np.array([lo, hi], dtype="float64")  # constant column: one bin
+    return np.linspace(lo, hi, max(1, int(get_settings().histogram_bins)) + 1)
+
+
+def _histogram_payload(edges: np.ndarray, counts: np.ndarray) -> dict[str, Any]:
+    return {
+        "edges": [float(e) for e in edges],
+        "counts": [int(round(float(c))) for c in counts],
+    }
+
+
+def sorted_histogram(sorted_values: np.ndarray) -> dict[str, Any] | None:
+    """Equal-width histogram over [min, max] of ascending finite values."""
+    n = int(sorted_values.size)
+    if n == 0:
+        return None
+    edges = _histogram_edges(float(sorted_values[0]), float(sorted_values[-1]))
+    pos = np.searchsorted(sorted_values, edges, side="left")
+    pos[-1] = n
+    return _histogram_payload(edges, np.diff(pos))
+
+
+def sketch_histogram(sketch: KLLSketch, lo: float | None, hi: float | None) -> dict[str, Any] | None:
+    """Equal-width histogram over [lo, hi] estimated from a quantile sketch."""
+    if sketch.n == 0 or lo is None or hi is None:
+        return None
+    edges = _histogram_edges(float(lo), float(hi))
+    return _histogram_payload(edges, sketch.histogram(edges))
+
+
+def top_values_payload(items: list[tuple[Any, int]], total: int, exact: bool) -> dict[str, Any]:
+    """Stored top-k frequency table: most frequent values first."""
+    return {
+        "total": int(total),
+        "values": [[str(v)[:_TOP_VALUE_MAX_CHARS], int(c)] for v, c in items],
+        "exact": bool(exact),
+    }
+
+
+def top_values(s: pd.Series) -> dict[str, Any] | None:
+    """Exact top-k (Settings.top_k_values) frequencies of a column's non-null values."""
+    vc = s.dropna().astype(str).value_counts()
+    if vc.empty:
+        return None
+    k = max(1, int(get_settings().top_k_values))
+    return top_values_payload(list(vc.head(k).items()), int(vc.sum()), exact=True)
+
+
+def sketch_quantile_stats(sketch: KLLSketch) -> dict[str, Any]:
+    """
+    Percentiles and IQR outliers from a (possibly merged) quantile sketch, for
+    paths that never hold the whole column. Exact while the sketch has not
+    compacted; otherwise within the sketch's rank error.
+    """
+    n = int(sketch.n)
+    names = list(PERCENTILES)
+    qs = sketch.quantiles([0.25, 0.75] + [PERCENTILES[k] for k in names])
+    q1, q3 = float(qs[0]), float(qs[1])
+
+    def _outside(lower: float, upper: float) -> float:
+        return round(sketch.rank(lower) + (n - sketch.rank(upper, inclusive=True)))
+
+    outlier_count, outlier_ratio = iqr_outliers(n, q1, q3, _outside)
+    stats: dict[str, Any] = {k: _safe_float(v) for k, v in zip(names, qs[2:])}
+    stats["outlier_count"] = outlier_count
+    stats["outlier_ratio"] = outlier_ratio
+    stats["quantile_sketch"] = sketch.to_bytes() if n > 0 else None
+    return stats
+
+
+def _sorted_quantiles(sorted_block: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """
+    Linear-interpolated quantile per column (pandas' default), given a block
+    sorted along axis 0 with NaNs pushed to the end and per-column counts.
+    """
+    pos = np.maximum(counts - 1, 0) * q
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.ceil(pos).astype(np.int64)
+    frac = pos - lo
+    v_lo = np.take_along_axis(sorted_block, lo[None, :], axis=0)[0]
+    v_hi = np.take_along_axis(sorted_block, hi[None, :], axis=0)[0]
+    return v_lo + (v_hi - v_lo) * frac
+
+
+def numeric_block_stats(block: np.ndarray) -> list[dict[str, Any] | None]:
+    """
+    Numeric stats for every column of a 2-D float block (rows x cols) at once:
+    moments in one NumPy pass, Q1/Q3 and percentiles from a single axis-0 sort,
+    and IQR outlier counts as one broadcast comparison. Each column also gets a
+    serialized quantile sketch so later merges don't need the raw values, and
+    an equal-width histogram read off the same sort.
+    None for columns with no finite values.
+    """
+    block = np.array(block, dtype="float64", order="F", copy=True)
+    block[~np.isfinite(block)] = np.nan
+
+    accs = MomentAccumulator.from_block(block)
+    counts = np.array([a.count for a in accs], dtype=np.int64)
+
+    # np.sort places NaN last, so the first `count` rows of each column are its values.
+    sorted_block = np.sort(block, axis=0)
+    if sorted_block.shape[0] > 0:
+        q1 = _sorted_quantiles(sorted_block, counts, 0.25)
+        q3 = _sorted_quantiles(sorted_block, counts, 0.75)
+        pct = {k: _sorted_quantiles(sorted_block, counts, q) for k, q in PERCENTILES.items()}
+    else:
+        q1 = q3 = np.full(block.shape[1], np.nan)
+        pct = {k: q1 for k in PERCENTILES}
+
+    sketches: list[bytes | None] = []
+    histograms: list[dict[str, Any] | None] = []
+    for j in range(block.shape[1]):
+        n = int(counts[j])
+        if n == 0:
+            sketches.append(None)
+            histograms.append(None)
+            continue
+        sk = new_quantile_sketch()
+        sk.update(sorted_block[:n, j])
+        sketches.append(sk.to_bytes())
+        histograms.append(sorted_histogram(sorted_block[:n, j]))
+    del sorted_block
+
+    iqr = q3 - q1
+    with np.errstate(invalid="ignore"):
+        lower = q1 - 1.5 * iqr
+        upper = q3 + 1.5 * iqr
+        outliers = ((block < lower) | (block > upper)).sum(axis=0)
+
+    out: list[dict[str, Any] | None] = []
+    for j, acc in enumerate(accs):
+        n = int(counts[j])
+        if n == 0:
+            out.append(None)
+            continue
+
+        stats = moment_stats(acc)
+        outlier_count, outlier_ratio = iqr_outliers(
+            n, float(q1[j]), float(q3[j]), lambda lower, upper, j=j: outliers[j]
+        )
+        stats["outlier_count"] = outlier_count
+        stats["outlier_ratio"] = outlier_ratio
+        for k in PERCENTILES:
+            stats[k] = _safe_float(pct[k][j])
+        stats["quantile_sketch"] = sketches[j]
+        stats["histogram"] = histograms[j]
+        out.append(stats)
+    return out
+
+
+def _distinct_fields(distinct: DistinctCounter) -> dict[str, Any]:
+    return {
+        "distinct_count": distinct.count,
+        "distinct_is_approximate": distinct.is_approximate,
+        "distinct_sketch": distinct.hll.to_bytes(),
+    }
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by all profiling calls; spawned once, on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _profile_mapped_columns(
+    path: str,
+    shape: tuple[int, int],
+    start: int,
+    stop: int,
+    int_path: str | None = None,
+    int_width: int = 0,
+    int_positions: dict[int, int] | None = None,
+) -> tuple[list[dict[str, Any] | None], list[dict[str, Any]]]:
+    """
+    Pool task: numeric stats + distinct fields for columns [start, stop) of the
+    column-major float64 matrix memory-mapped at `path`. Integer columns are
+    hashed from their int64 copy at `int_path` (`int_width` columns;
+    `int_positions` maps matrix column -> int column), since float64 rounds
+    integers above 2**53. Only the
+    paths and bounds are pickled; the data is shared through the page cache.
+    """
+    full = np.memmap(path, dtype="float64", mode="r", shape=shape, order="F")
+    block = full[:, start:stop]
+    int_positions = int_positions or {}
+    ints = (
+        np.memmap(int_path, dtype="int64", mode="r", shape=(shape[0], int_width), order="F")
+        if int_path and int_positions
+        else None
+    )
+
+    distinct: list[dict[str, Any]] = []
+    for j in range(block.shape[1]):
+        col = np.asarray(block[:, j])
+        present = ~np.isnan(col)
+        k = int_positions.get(start + j)
+        values = np.asarray(ints[:, k])[present] if ints is not None and k is not None else col[present]
+        counter = new_distinct_counter()
+        # Same hashes as sketches.hash_series for a numeric column.
+        counter.add_hashes(hash_numeric(values))
+        distinct.append(_distinct_fields(counter))
+
+    stats = numeric_block_stats(block)
+    del block, full, ints
+    return stats, distinct
+
+
+def _profile_numeric_parallel(
+    df: pd.DataFrame,
+    numeric_idx: list[int],
+    workers: int,
+) -> list[tuple[dict[str, Any] | None, dict[str, Any]]]:
+    """
+    Split numeric columns across the process pool. The columns are written once
+    into a memory-mapped temp file that every worker maps read-only.
+    """
+    shape = (df.shape[0], len(numeric_idx))
+    fd, path = tempfile.mkstemp(prefix="insightsentinel-profile-", suffix=".f64")
+    os.close(fd)
+    int_path: str | None = None
+    try:
+        mm = np.memmap(path, dtype="float64", mode="w+", shape=shape, order="F")
+        for j, i in enumerate(numeric_idx):
+            mm[:, j] = df.iloc[:, i].to_numpy(dtype="float64", na_value=np.nan)
+        mm.flush()
+        del mm
+
+        # Exact int64 copies of integer columns for hashing (bit patterns, so uint64 too)
+        int_cols = [j for j, i in enumerate(numeric_idx) if is_integer_dtype(df.dtypes.iloc[i])]
+        int_positions = {j: k for k, j in enumerate(int_cols)}
+        if int_cols:
+            fd, int_path = tempfile.mkstemp(prefix="insightsentinel-profile-", suffix=".i64")
+            os.close(fd)
+            im = np.memmap(int_path, dtype="int64", mode="w+", shape=(shape[0], len(int_cols)), order="F")
+            for k, j in enumerate(int_cols):
+                col = df.iloc[:, numeric_idx[j]]
+                unsigned = getattr(col.dtype, "numpy_dtype", col.dtype).kind == "u"
+                im[:, k] = col.to_numpy(dtype="uint64" if unsigned else "int64", na_value=0).view("int64")
+            im.flush()
+            del im
+
+        pool = _get_pool(workers)
+        # Enough tasks to keep every worker busy without tiny blocks.
+        step = max(1, min(_BLOCK_COLUMNS, math.ceil(shape[1] / (workers * 2))))
+        futures = []
+        for start in range(0, shape[1], step):
+            stop = min(start + step, shape[1])
+            positions = {j: k for j, k in int_positions.items() if start <= j < stop}
+            futures.append(
+                pool.submit(
+                    _profile_mapped_columns, path, shape, start, stop, int_path, len(int_cols), positions
+                )
+            )
+
+        out: list[tuple[dict[str, Any] | None, dict[str, Any]]] = []
+        for fut in futures:
+            stats, distinct = fut.result()
+            out.extend(zip(stats, distinct))
+        return out
+    finally:
+        os.unlink(path)
+        if int_path is not None:
+            os.unlink(int_path)
+
+
+def profile_frame(df: pd.DataFrame) -> list[dict[str, Any]]:
+    """
+    Profile every column of a DataFrame with frame-level passes.
+
+    Frames with at least `profile_parallel_min_columns` numeric columns are
+    split across a process pool (`profile_parallel_workers`); results are
+    identical to the serial path.
+
+    Returns one dict per column, in frame order:
+      {"name", "dtype", "null_count", "distinct_count",
+       "distinct_is_approximate", "distinct_sketch", "stats", "type_signals",
+       "top_values"}
+    where "stats" is None for non-numeric columns and "type_signals" /
+    "top_values" are None for non-text columns.
+    """
+    settings = get_settings()
+    null_counts = df.isna().sum(axis=0).to_numpy()
+
+    profiles: list[dict[str, Any]] = []
+    numeric_idx: list[int] = []
+    for i in range(df.shape[1]):
+        s = df.iloc[:, i]
+        is_text = is_text_dtype(s.dtype)
+        profiles.append(
+            {
+                "name": str(df.columns[i]),
+                "dtype": str(s.dtype),
+                "null_count": int(null_counts[i]),
+                "stats": None,
+                "type_signals": text_signals(s) if is_text else None,
+                "top_values": top_values(s) if is_text else None,
+            }
+        )
+        # bool columns keep their own (non-numeric) hashes, so they stay serial
+        if is_numeric_dtype(s.dtype) and not is_bool_dtype(s.dtype):
+            numeric_idx.append(i)
+
+    workers = int(settings.profile_parallel_workers)
+    if workers > 1 and df.shape[0] > 0 and len(numeric_idx) >= settings.profile_parallel_min_columns:
+        try:
+            results = _profile_numeric_parallel(df, numeric_idx, workers)
+        except BrokenProcessPool:
+            logger.exception("Profiling pool broke; falling back to serial profiling")
+            _reset_pool()
+        else:
+            for i, (stats, distinct) in zip(numeric_idx, results):
+                profiles[i]["stats"] = stats
+                profiles[i].update(distinct)
+
+    serial_idx = [i for i in range(df.shape[1]) if "distinct_count" not in profiles[i]]
+    for i in serial_idx:
+        distinct = new_distinct_counter()
+        distinct.add_series(df.iloc[:, i])
+        profiles[i].update(_distinct_fields(distinct))
+
+    serial_numeric = [
+        i for i in serial_idx
+        if profiles[i]["stats"] is None and is_numeric_dtype(df.dtypes.iloc[i])
+    ]
+    for start in range(0, len(serial_numeric), _BLOCK_COLUMNS):
+        idx = serial_numeric[start:start + _BLOCK_COLUMNS]
+        block = df.iloc[:, idx].to_numpy(dtype="float64", na_value=np.nan)
+        for i, stats in zip(idx, numeric_block_stats(block)):
+            profiles[i]["stats"] = stats
+
+    return profiles
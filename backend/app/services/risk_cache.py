@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+import json
+import logging
+import threading
+import time
+from typing import Any, Optional, Protocol
+
+from app.core.config import get_settings
+
+logger = logging.getLogger("insightsentinel.risk_cache")
+
+_KEY_PREFIX = "insightsentinel:risk:"
+
+
+def _watermark_key(watermark: Optional[int]) -> Optional[str]:
+    return str(watermark) if watermark is not None else None
+
+
+class RiskCacheBackend(Protocol):
+    """Shared store for cached risk results (JSON strings with a TTL)."""
+
+    def get(self, key: str) -> Optional[str]: ...
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+class RedisRiskCacheBackend:
+    """Redis-backed shared cache; needs the optional `redis` package."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("risk_cache_url is set but the 'redis' package is not installed") from e
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[str]:
+        raw = self._client.get(key)
+        return raw.decode("utf-8") if isinstance(raw, bytes) else raw
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        self._client.set(key, value, ex=max(1, int(ttl_seconds)))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(key)
+
+
+class RiskCache:
+    """
+    Risk results per dataset, valid for one signal watermark (signal_seq, bumped
+    by every ingest, insight update or alert) and at most `ttl_seconds` (the 24h
+    alert window moves without new signals). An in-process LRU sits in front of an optional
+    shared backend; backend errors degrade to a miss.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        backend: Optional[RiskCacheBackend] = None,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.backend = backend
+        self._entries: OrderedDict[str, tuple[Optional[str], float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dataset_id, watermark: Optional[int]) -> Optional[dict[str, Any]]:
+        key = str(dataset_id)
+        mark = _watermark_key(watermark)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == mark and entry[1] > now:
+                    self._entries.move_to_end(key)
+                    return entry[2]
+                del self._entries[key]
+
+        if self.backend is None:
+            return None
+        try:
+            raw = self.backend.get(_KEY_PREFIX + key)
+        except Exception:
+            logger.warning("Risk cache backend read failed", exc_info=True)
+            return None
+        if not raw:
+            return None
+        payload = json.loads(raw)
+        if payload.get("watermark") != mark:
+            return None
+        self._store(key, mark, payload["result"])
+        return payload["result"]
+
+    def set(self, dataset_id, watermark: Optional[int], result: dict[str, Any]) -> None:
+        key = str(dataset_id)
+        mark = _watermark_key(watermark)
+        self._store(key, mark, result)
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(
+                _KEY_PREFIX + key,
+                json.dumps({"watermark": mark, "result": result}, default=str),
+                int(self.ttl_seconds),
+            )
+        except Exception:
+            logger.warning("Risk cache backend write failed", exc_info=True)
+
+    def invalidate(self, dataset_id) -> None:
+        key = str(dataset_id)
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.backend is None:
+            return
+        try:
+            self.backend.delete(_KEY_PREFIX + key)
+        except Exception:
+            logger.warning("Risk cache backend delete failed", exc_info=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key: str, mark: Optional[str], result: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (mark, time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_cache: RiskCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_risk_cache() -> RiskCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = get_settings()
+                backend = RedisRiskCacheBackend(settings.risk_cache_url) if settings.risk_cache_url else None
+                _cache = RiskCache(
+                    max_entries=settings.risk_cache_max_entries,
+                    ttl_seconds=settings.risk_cache_ttl_seconds,
+                    backend=backend,
+                )
+    return _cache
+
+
+def invalidate_dataset_risk(dataset_id) -> None:
+    """Drop the cached risk for a dataset; call after its signals change."""
+    get_risk_cache().invalidate(dataset_id)
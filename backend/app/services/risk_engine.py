@@ -1,24 +1,38 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timedelta, timezone
+import hashlib
 import json
 import logging
 from typing import Any, Dict, List, Optional
 
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.models import Dataset, DatasetInsight
 from app.models.alert_event import AlertEvent
+from app.models.column_statistics import ColumnStatistics
+from app.models.dataset_column import DatasetColumn
 from app.models.dataset_risk_history import DatasetRiskHistory
-from app.services.snapshot_context import get_latest_snapshot_profile_context
+from app.models.dataset_risk_state import DatasetRiskState
+from app.models.snapshot_column import SnapshotColumn
+from app.models.snapshot_statistics import SnapshotStatistics
+from app.services.drift_engine import DriftReport, compute_dataset_drift, compute_drift_batch
+from app.services.anomaly_engine import record_baseline_point
+from app.services.risk_cache import get_risk_cache, invalidate_dataset_risk
+from app.services.snapshot_context import (
+    get_latest_snapshot_profile_context,
+    get_latest_snapshots,
+)
 
 logger = logging.getLogger("insightsentinel.risk")
 
 
 @dataclass
 class RiskItem:
-    kind: str  # INSIGHT | STAT | ALERT | STRUCT
+    kind: str  # INSIGHT | STAT | ALERT | STRUCT | DRIFT
     code: str
     weight: float
     detail: Dict[str, Any]
@@ -31,6 +45,9 @@ class RiskScoreResult:
     risk_level: str
     breakdown: Dict[str, int]
     top_risks: List[Dict[str, Any]]
+    # Dataset.signal_seq read before the signals; the tracked watermark.
+    # Not cached: a cached result says nothing about what a track read.
+    signal_seq: Optional[int] = field(default=None, compare=False)
 
 
 def _now() -> datetime:
@@ -59,6 +76,7 @@ INSIGHT_WEIGHTS: Dict[str, int] = {
     "LIKELY_IDENTIFIER": 4,
     "NUMERIC_RANGE_SUSPICIOUS": 4,
     "POTENTIAL_NUMERIC_AS_STRING": 10,
+    "DUPLICATE_ROWS": 6,
     "DUPLICATE_ROWS_IN_PREVIEW": 4,  # low weight; often expected
     "CONSTANT_COLUMN": 3,
     "LOW_CARDINALITY": 1,  # informational
@@ -68,6 +86,13 @@ MAX_INSIGHT_SCORE = 40
 MAX_STAT_SCORE = 30
 MAX_ALERT_SCORE = 20
 MAX_STRUCT_SCORE = 10
+MAX_DRIFT_SCORE = 15
+
+# Per drifted column, by drift level (latest vs previous snapshot)
+DRIFT_WEIGHTS: Dict[str, int] = {
+    "significant": 6,
+    "moderate": 3,
+}
 
 # --- Risk spike config ---
 RISK_SPIKE_WARNING_THRESHOLD = 10
@@ -89,7 +114,12 @@ def _stable_json(obj) -> str:
 
 
 def compute_dataset_risk(db: Session, dataset_id) -> Optional[RiskScoreResult]:
-    ds = db.query(Dataset).filter(Dataset.id == dataset_id).first()
+    # Columns, not the entity: an identity-mapped Dataset keeps a stale signal_seq.
+    ds = (
+        db.query(Dataset.row_count, Dataset.signal_seq)
+        .filter(Dataset.id == dataset_id)
+        .first()
+    )
     if not ds:
         return None
 
@@ -104,6 +134,10 @@ def compute_dataset_risk(db: Session, dataset_id) -> Optional[RiskScoreResult]:
         db, dataset_id
     )
     cols_by_id = {str(c.id): c for c in columns_by_name.values()}
+    column_stats = [
+        (cols_by_id[col_id].name if col_id in cols_by_id else col_id, st)
+        for col_id, st in stats_by_col_id.items()
+    ]
 
     # Recent alerts (24h)
     cutoff = _now() - timedelta(hours=24)
@@ -114,8 +148,108 @@ def compute_dataset_risk(db: Session, dataset_id) -> Optional[RiskScoreResult]:
         .count()
     )
 
-    row_count = int(snapshot.row_count if snapshot is not None else (ds.row_count or 0))
+    res = _score_dataset(
+        dataset_id,
+        row_count=int(snapshot.row_count if snapshot is not None else (ds.row_count or 0)),
+        insights=insights,
+        snapshot=snapshot,
+        column_stats=column_stats,
+        recent_alerts_count=int(recent_alerts_count),
+        drift=compute_dataset_drift(db, dataset_id),
+    )
+    res.signal_seq = int(ds.signal_seq)
+    return res
+
+
+def compute_dataset_risk_batch(db: Session, dataset_ids) -> Dict[str, RiskScoreResult]:
+    """
+    `compute_dataset_risk` for many datasets in a fixed number of set-based
+    queries (datasets, insights, latest snapshots via DISTINCT ON, their
+    column stats, legacy stats, grouped 24h alert counts, drift) instead of
+    several per dataset. Keyed by dataset id as string; unknown ids are left out.
+    Every result carries the signal_seq read by the first of those queries.
+    """
+    ids = list(dict.fromkeys(dataset_ids))
+    if not ids:
+        return {}
+
+    rows = db.query(Dataset.id, Dataset.row_count, Dataset.signal_seq).filter(Dataset.id.in_(ids)).all()
+    row_counts = {str(ds_id): rc for ds_id, rc, _ in rows}
+    signal_seqs = {str(ds_id): int(seq) for ds_id, _, seq in rows}
+    ids = [i for i in ids if str(i) in row_counts]
+    if not ids:
+        return {}
+
+    insights_by_ds: Dict[str, List[DatasetInsight]] = {}
+    for ins in db.query(DatasetInsight).filter(DatasetInsight.dataset_id.in_(ids)).all():
+        insights_by_ds.setdefault(str(ins.dataset_id), []).append(ins)
+
+    snapshots = get_latest_snapshots(db, ids)
+    stats_by_ds: Dict[str, List[tuple[str, Any]]] = {}
+    if snapshots:
+        by_snapshot = {s.id: ds_id for ds_id, s in snapshots.items()}
+        rows = (
+            db.query(SnapshotColumn.snapshot_id, SnapshotColumn.name, SnapshotStatistics)
+            .join(SnapshotStatistics, SnapshotStatistics.snapshot_column_id == SnapshotColumn.id)
+            .filter(SnapshotColumn.snapshot_id.in_(list(by_snapshot)))
+            .all()
+        )
+        for snapshot_id, name, st in rows:
+            stats_by_ds.setdefault(by_snapshot[snapshot_id], []).append((name, st))
+
+    # Datasets profiled before snapshots existed keep dataset-level stats.
+    legacy_ids = [i for i in ids if str(i) not in snapshots]
+    if legacy_ids:
+        rows = (
+            db.query(DatasetColumn.dataset_id, DatasetColumn.name, ColumnStatistics)
+            .join(ColumnStatistics, ColumnStatistics.column_id == DatasetColumn.id)
+            .filter(DatasetColumn.dataset_id.in_(legacy_ids))
+            .all()
+        )
+        for ds_id, name, st in rows:
+            stats_by_ds.setdefault(str(ds_id), []).append((name, st))
+
+    cutoff = _now() - timedelta(hours=24)
+    alert_counts = {
+        str(ds_id): int(n)
+        for ds_id, n in (
+            db.query(AlertEvent.dataset_id, func.count(AlertEvent.id))
+            .filter(AlertEvent.dataset_id.in_(ids))
+            .filter(AlertEvent.created_at >= cutoff)
+            .group_by(AlertEvent.dataset_id)
+            .all()
+        )
+    }
 
+    drift = compute_drift_batch(db, ids)
+
+    results: Dict[str, RiskScoreResult] = {}
+    for ds_id in map(str, ids):
+        snapshot = snapshots.get(ds_id)
+        results[ds_id] = _score_dataset(
+            ds_id,
+            row_count=int(snapshot.row_count if snapshot is not None else (row_counts[ds_id] or 0)),
+            insights=insights_by_ds.get(ds_id, []),
+            snapshot=snapshot,
+            column_stats=stats_by_ds.get(ds_id, []),
+            recent_alerts_count=alert_counts.get(ds_id, 0),
+            drift=drift.get(ds_id),
+        )
+        results[ds_id].signal_seq = signal_seqs[ds_id]
+    return results
+
+
+def _score_dataset(
+    dataset_id,
+    *,
+    row_count: int,
+    insights: List[Any],
+    snapshot: Any,
+    column_stats: List[tuple[str, Any]],
+    recent_alerts_count: int,
+    drift: Optional[DriftReport],
+) -> RiskScoreResult:
+    """Score one dataset from its already-loaded signals; no queries."""
     # --- 1) Insight Risk ---
     insight_score = 0
     seen_codes = set()
@@ -148,9 +282,7 @@ def compute_dataset_risk(db: Session, dataset_id) -> Optional[RiskScoreResult]:
 
     # --- 2) Statistical Risk (uses ColumnStatistics) ---
     stat_score = 0
-    for col_id, st in stats_by_col_id.items():
-        col = cols_by_id.get(col_id)
-        col_name = col.name if col else col_id
+    for col_name, st in column_stats:
 
         # outlier_ratio bands
         if st.outlier_ratio is not None:
@@ -250,10 +382,49 @@ def compute_dataset_risk(db: Session, dataset_id) -> Optional[RiskScoreResult]:
             )
         )
 
+    # (c) full-file duplicate rows (exact count stored on the snapshot at ingest)
+    dup_ratio = snapshot.duplicate_row_ratio if snapshot is not None else None
+    if dup_ratio is not None and dup_ratio >= 0.05:
+        w = 5 if dup_ratio >= 0.20 else 3
+        struct_score += w
+        risk_items.append(
+            RiskItem(
+                kind="STRUCT",
+                code="DUPLICATE_ROW_RATIO_HIGH" if dup_ratio >= 0.20 else "DUPLICATE_ROW_RATIO_ELEVATED",
+                weight=w,
+                detail={
+                    "duplicate_rows": int(snapshot.duplicate_row_count or 0),
+                    "duplicate_row_ratio": float(dup_ratio),
+                },
+            )
+        )
+
     struct_score = min(struct_score, MAX_STRUCT_SCORE)
 
+    # --- 5) Distribution Drift (stored histograms / top-k vs previous snapshot) ---
+    drift_score = 0
+    for d in (drift.drifted() if drift is not None else []):
+        w = int(DRIFT_WEIGHTS.get(d.level, 0))
+        drift_score += w
+        risk_items.append(
+            RiskItem(
+                kind="DRIFT",
+                code="DISTRIBUTION_DRIFT_SIGNIFICANT" if d.level == "significant" else "DISTRIBUTION_DRIFT_MODERATE",
+                weight=w,
+                detail={
+                    "column": d.column,
+                    "kind": d.kind,
+                    "psi": d.psi,
+                    "ks": d.ks,
+                    "reference_snapshot_id": drift.reference_snapshot_id,
+                },
+            )
+        )
+
+    drift_score = min(drift_score, MAX_DRIFT_SCORE)
+
     # --- total ---
-    total = insight_score + stat_score + alert_score + struct_score
+    total = insight_score + stat_score + alert_score + struct_score + drift_score
     total = min(int(round(total)), 100)
 
     # top risks = highest weight first
@@ -277,17 +448,35 @@ def compute_dataset_risk(db: Session, dataset_id) -> Optional[RiskScoreResult]:
             "stat_score": int(stat_score),
             "alert_score": int(alert_score),
             "struct_score": int(struct_score),
+            "drift_score": int(drift_score),
         },
         top_risks=top_risks,
     )
 
 
+def get_dataset_risk(db: Session, dataset_id) -> Optional[RiskScoreResult]:
+    """
+    compute_dataset_risk behind the risk cache: a hit costs the signal
+    watermark lookup instead of loading and scoring every signal.
+    """
+    cache = get_risk_cache()
+    watermark = _get_signal_seq(db, dataset_id)
+    cached = cache.get(dataset_id, watermark)
+    if cached is not None:
+        return RiskScoreResult(**cached)
+
+    res = compute_dataset_risk(db, dataset_id)
+    if res is not None:
+        cache.set(dataset_id, watermark, {**asdict(res), "signal_seq": None})
+    return res
+
+
 def compute_dataset_health(db: Session, dataset_id) -> Optional[dict[str, Any]]:
     """
     Health is the business-facing inverse of smoothed risk.
     Returns score + helper fields for UI.
     """
-    risk_result = compute_dataset_risk(db, dataset_id)
+    risk_result = get_dataset_risk(db, dataset_id)
     if risk_result is None:
         return None
 
@@ -344,79 +533,128 @@ def compute_dataset_health(db: Session, dataset_id) -> Optional[dict[str, Any]]:
     }
 
 
-def _risk_spike_cooldown_exists(db: Session, dataset_id) -> bool:
-    cutoff = _now() - timedelta(minutes=RISK_SPIKE_COOLDOWN_MINUTES)
-    q = (
-        db.query(AlertEvent)
-        .filter(AlertEvent.dataset_id == dataset_id)
-        .filter(AlertEvent.created_at >= cutoff)
-        .filter(AlertEvent.title == "Risk spike detected")
-    )
-    return db.query(q.exists()).scalar() is True
+def _breakdown_hash(breakdown) -> str:
+    return hashlib.sha256(_stable_json(breakdown).encode("utf-8")).hexdigest()
 
 
-def _get_latest_signal_timestamp(db: Session, dataset_id):
-    from app.models.alert_event import AlertEvent as SignalAlertEvent
-    from app.models.dataset_insight import DatasetInsight
-    from app.models.ingestion_run import IngestionRun
+def _as_utc(ts: Optional[datetime]) -> Optional[datetime]:
+    if ts is not None and ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts
 
-    latest_run = (
-        db.query(IngestionRun.created_at)
-        .filter(IngestionRun.dataset_id == dataset_id)
-        .order_by(IngestionRun.created_at.desc())
-        .limit(1)
-        .scalar()
+
+def _load_risk_state(db: Session, dataset_id) -> tuple[Optional[DatasetRiskState], Optional[datetime]]:
+    """(tracking state or None, dataset signal watermark) in one query."""
+    row = (
+        db.query(DatasetRiskState, Dataset.last_signal_at)
+        .select_from(Dataset)
+        .outerjoin(DatasetRiskState, DatasetRiskState.dataset_id == Dataset.id)
+        .filter(Dataset.id == dataset_id)
+        .first()
     )
+    return (row[0], row[1]) if row is not None else (None, None)
 
-    latest_insight = (
-        db.query(DatasetInsight.created_at)
-        .filter(DatasetInsight.dataset_id == dataset_id)
-        .order_by(DatasetInsight.created_at.desc())
-        .limit(1)
+
+def _skipped_track(
+    dataset_id,
+    state: DatasetRiskState,
+    breakdown: Dict[str, int],
+    smoothed_score: int,
+    alpha_eff: float,
+) -> dict[str, Any]:
+    return {
+        "dataset_id": str(dataset_id),
+        "risk_score": int(state.risk_score),
+        "risk_level": state.risk_level,
+        "breakdown": breakdown,
+        "created_at": state.tracked_at,
+        "smoothed_score": int(state.smoothed_score) if state.smoothed_score is not None else smoothed_score,
+        "alpha": float(state.alpha) if state.alpha is not None else float(alpha_eff),
+        "alpha_used": float(alpha_eff),
+        "delta_score": float(state.delta_score) if state.delta_score is not None else None,
+        "accel_score": float(state.accel_score) if state.accel_score is not None else None,
+        "skipped": True,
+    }
+
+
+def _get_signal_seq(db: Session, dataset_id) -> Optional[int]:
+    """Count of ingest/insight/alert writes, kept on the dataset row by DB triggers."""
+    return (
+        db.query(Dataset.signal_seq)
+        .filter(Dataset.id == dataset_id)
         .scalar()
     )
 
-    latest_alert = (
-        db.query(SignalAlertEvent.created_at)
-        .filter(SignalAlertEvent.dataset_id == dataset_id)
-        .order_by(SignalAlertEvent.created_at.desc())
-        .limit(1)
-        .scalar()
+
+def _stamp_risk_watermark(db: Session, dataset_id, res: RiskScoreResult) -> None:
+    seq = res.signal_seq if res.signal_seq is not None else Dataset.signal_seq
+    db.query(Dataset).filter(Dataset.id == dataset_id).update(
+        {
+            Dataset.risk_seq: func.greatest(func.coalesce(Dataset.risk_seq, 0), seq),
+            Dataset.last_risk_at: func.now(),
+        },
+        synchronize_session=False,
     )
 
-    return max(filter(None, [latest_run, latest_insight, latest_alert]), default=None)
 
+def select_dirty_datasets(db: Session) -> List[Any]:
+    """
+    Ids of datasets with rows whose signals changed since their last tracked
+    risk (or that were never tracked); one query on ix_datasets_risk_dirty.
+    """
+    rows = (
+        db.query(Dataset.id)
+        .filter(Dataset.row_count > 0)
+        .filter(or_(Dataset.risk_seq.is_(None), Dataset.signal_seq > Dataset.risk_seq))
+        .order_by(Dataset.last_signal_at.asc().nulls_first())
+        .all()
+    )
+    return [r[0] for r in rows]
 
-def track_dataset_risk(db: Session, dataset_id) -> Optional[DatasetRiskHistory | dict[str, Any]]:
-    res = compute_dataset_risk(db, dataset_id)
+
+def track_dataset_risk(
+    db: Session,
+    dataset_id,
+    result: Optional[RiskScoreResult] = None,
+) -> Optional[DatasetRiskHistory | dict[str, Any]]:
+    """
+    Record the current risk; `result` skips recomputing it (e.g. from
+    compute_dataset_risk_batch).
+
+    Everything derived from earlier rows (smoothing baseline, velocity,
+    acceleration, dedup, alert cooldowns) comes from the DatasetRiskState row:
+    one read, then one version-guarded upsert, the history insert, the
+    anomaly-baseline push and any spike/acceleration alert in a single commit.
+    A concurrent track that upserted first wins; the loser records nothing and
+    reports skipped.
+
+    Dataset.risk_seq is stamped with the result's signal_seq, read before the
+    inputs, so signals committed after that read (e.g. while a scheduler batch
+    is being tracked one dataset at a time, or by a writer that started before
+    the read) keep the dataset dirty for the next tick.
+    """
+    res = result if result is not None else compute_dataset_risk(db, dataset_id)
     if res is None:
         return None
 
     raw_score = int(res.dataset_risk_score)
     risk_level = str(res.risk_level)
     breakdown = res.breakdown
+    breakdown_hash = _breakdown_hash(breakdown)
 
-    last = (
-        db.query(DatasetRiskHistory)
-        .filter(DatasetRiskHistory.dataset_id == dataset_id)
-        .order_by(DatasetRiskHistory.created_at.desc())
-        .first()
-    )
+    state, latest_signal_ts = _load_risk_state(db, dataset_id)
+    last_tracked_at = _as_utc(state.tracked_at) if state is not None else None
+    tracked = last_tracked_at is not None and state.risk_score is not None
     now = _now()
 
-    if last and last.smoothed_score is not None:
-        previous_smoothed = int(last.smoothed_score)
+    if tracked and state.smoothed_score is not None:
+        previous_smoothed = int(state.smoothed_score)
     else:
         previous_smoothed = raw_score  # initialize baseline
 
     intervals = 1.0
-    latest_created_at = None
-    if last:
-        latest_created_at = last.created_at
-        if latest_created_at.tzinfo is None:
-            latest_created_at = latest_created_at.replace(tzinfo=timezone.utc)
-
-        dt_seconds = max(0.0, (now - latest_created_at).total_seconds())
+    if tracked:
+        dt_seconds = max(0.0, (now - last_tracked_at).total_seconds())
         intervals = max(1.0, dt_seconds / float(RISK_TRACK_INTERVAL_MINUTES * 60))
 
     alpha_eff = 1.0 - pow((1.0 - float(RISK_EMA_ALPHA)), float(intervals))
@@ -426,24 +664,21 @@ def track_dataset_risk(db: Session, dataset_id) -> Optional[DatasetRiskHistory |
         round(alpha_eff * raw_score + (1.0 - alpha_eff) * previous_smoothed)
     )
 
-    latest_signal_ts = _get_latest_signal_timestamp(db, dataset_id)
-    if last and latest_signal_ts:
-        if latest_signal_ts.tzinfo is None:
-            latest_signal_ts = latest_signal_ts.replace(tzinfo=timezone.utc)
-        if latest_created_at is not None and latest_signal_ts <= latest_created_at:
-            stale_minutes = max(0.0, (now - latest_signal_ts).total_seconds() / 60.0)
-            if stale_minutes >= RISK_STALE_AFTER_MINUTES:
-                decay_factor = pow((1.0 - RISK_DECAY_PER_INTERVAL), intervals)
-                decayed = int(
-                    round(raw_score + (smoothed_score - raw_score) * decay_factor)
-                )
-                smoothed_score = max(raw_score, decayed)
+    latest_signal_ts = _as_utc(latest_signal_ts)
+    if tracked and latest_signal_ts and latest_signal_ts <= last_tracked_at:
+        stale_minutes = max(0.0, (now - latest_signal_ts).total_seconds() / 60.0)
+        if stale_minutes >= RISK_STALE_AFTER_MINUTES:
+            decay_factor = pow((1.0 - RISK_DECAY_PER_INTERVAL), intervals)
+            decayed = int(
+                round(raw_score + (smoothed_score - raw_score) * decay_factor)
+            )
+            smoothed_score = max(raw_score, decayed)
 
-    if last:
-        same_score = int(last.risk_score) == raw_score
-        same_level = (last.risk_level or "") == risk_level
-        same_breakdown = _stable_json(last.breakdown) == _stable_json(breakdown)
-        within_window = latest_created_at >= (
+    if tracked:
+        same_score = int(state.risk_score) == raw_score
+        same_level = (state.risk_level or "") == risk_level
+        same_breakdown = state.breakdown_hash == breakdown_hash
+        within_window = last_tracked_at >= (
             now - timedelta(minutes=RISK_TRACK_DEDUP_WINDOW_MINUTES)
         )
 
@@ -452,94 +687,64 @@ def track_dataset_risk(db: Session, dataset_id) -> Optional[DatasetRiskHistory |
                 "Risk unchanged - skipping history insert",
                 extra={"dataset_id": str(dataset_id)},
             )
-            return {
-                "dataset_id": str(dataset_id),
-                "risk_score": raw_score,
-                "risk_level": risk_level,
-                "breakdown": breakdown,
-                "created_at": last.created_at,
-                "smoothed_score": int(last.smoothed_score) if last.smoothed_score is not None else smoothed_score,
-                "alpha": float(last.alpha) if last.alpha is not None else float(alpha_eff),
-                "alpha_used": float(alpha_eff),
-                "delta_score": float(last.delta_score) if last.delta_score is not None else None,
-                "accel_score": float(last.accel_score) if last.accel_score is not None else None,
-                "skipped": True,
-            }
-
-    # Fetch previous snapshot BEFORE inserting new one
-    prev = last
+            # No new history row, so mark the dataset as tracked directly
+            _stamp_risk_watermark(db, dataset_id, res)
+            db.commit()
+            return _skipped_track(dataset_id, state, breakdown, smoothed_score, alpha_eff)
 
     delta_score = None
     accel_score = None
 
-    if prev and prev.smoothed_score is not None:
-        delta_score = float(smoothed_score) - float(prev.smoothed_score)
-
-        # fetch previous-previous snapshot
-        prev2 = (
-            db.query(DatasetRiskHistory)
-            .filter(DatasetRiskHistory.dataset_id == dataset_id)
-            .order_by(DatasetRiskHistory.created_at.desc())
-            .offset(1)
-            .first()
-        )
+    if tracked and state.smoothed_score is not None:
+        delta_score = float(smoothed_score) - float(state.smoothed_score)
 
-        if (
-            prev2
-            and prev2.smoothed_score is not None
-            and prev.smoothed_score is not None
-        ):
-            prev_velocity = float(prev.smoothed_score) - float(prev2.smoothed_score)
+        if state.prev_smoothed_score is not None:
+            prev_velocity = float(state.smoothed_score) - float(state.prev_smoothed_score)
             accel_score = float(delta_score) - float(prev_velocity)
 
-    # Insert new snapshot
-    snap = DatasetRiskHistory(
-        dataset_id=dataset_id,
-        risk_score=raw_score,
-        risk_level=risk_level,
-        breakdown=breakdown,
-        smoothed_score=smoothed_score,
-        alpha=alpha_eff,
-        delta_score=delta_score,
-        accel_score=accel_score,
-    )
-    db.add(snap)
-    db.commit()
-    db.refresh(snap)
+    cooldown_cutoff = now - timedelta(minutes=RISK_SPIKE_COOLDOWN_MINUTES)
+
+    def _cooling_down(ts: Optional[datetime]) -> bool:
+        ts = _as_utc(ts)
+        return ts is not None and ts >= cooldown_cutoff
+
+    alerts: List[AlertEvent] = []
 
     # --- Risk Spike Detection ---
-    if prev is not None:
-        delta = raw_score - int(prev.risk_score)
-
-        if delta >= RISK_SPIKE_WARNING_THRESHOLD:
-            if not _risk_spike_cooldown_exists(db, dataset_id):
-                severity = "warning"
-                if delta >= RISK_SPIKE_CRITICAL_THRESHOLD:
-                    severity = "critical"
-
-                db.add(
-                    AlertEvent(
-                        dataset_id=dataset_id,
-                        rule_id=None,
-                        severity=severity,
-                        title="Risk spike detected",
-                        message=(
-                            f"Risk score increased from {prev.risk_score} "
-                            f"to {raw_score} (delta={delta})."
-                        ),
-                        payload={
-                            "type": "RISK_SPIKE",
-                            "previous_score": int(prev.risk_score),
-                            "new_score": int(raw_score),
-                            "delta": int(delta),
-                            "previous_level": prev.risk_level,
-                            "new_level": risk_level,
-                        },
-                    )
+    spike_alert = False
+    if tracked:
+        delta = raw_score - int(state.risk_score)
+
+        if delta >= RISK_SPIKE_WARNING_THRESHOLD and not _cooling_down(state.last_spike_alert_at):
+            severity = "warning"
+            if delta >= RISK_SPIKE_CRITICAL_THRESHOLD:
+                severity = "critical"
+
+            spike_alert = True
+            alerts.append(
+                AlertEvent(
+                    dataset_id=dataset_id,
+                    rule_id=None,
+                    severity=severity,
+                    title="Risk spike detected",
+                    message=(
+                        f"Risk score increased from {state.risk_score} "
+                        f"to {raw_score} (delta={delta})."
+                    ),
+                    payload={
+                        "type": "RISK_SPIKE",
+                        "previous_score": int(state.risk_score),
+                        "new_score": int(raw_score),
+                        "delta": int(delta),
+                        "previous_level": state.risk_level,
+                        "new_level": risk_level,
+                    },
                 )
-                db.commit()
+            )
 
     # --- Risk Acceleration Detection ---
+    # Held back by a spike alert (just raised or cooling down) and by its own cooldown.
+    accel_alert = False
     if (
         delta_score is not None
         and accel_score is not None
@@ -547,8 +752,13 @@ def track_dataset_risk(db: Session, dataset_id) -> Optional[DatasetRiskHistory |
         and delta_score >= 3
         and accel_score >= 2
     ):
-        if not _risk_spike_cooldown_exists(db, dataset_id):
-            db.add(
+        if not (
+            spike_alert
+            or _cooling_down(state.last_spike_alert_at)
+            or _cooling_down(state.last_accel_alert_at)
+        ):
+            accel_alert = True
+            alerts.append(
                 AlertEvent(
                     dataset_id=dataset_id,
                     rule_id=None,
@@ -566,7 +776,57 @@ def track_dataset_risk(db: Session, dataset_id) -> Optional[DatasetRiskHistory |
                     },
                 )
             )
-            db.commit()
 
-    return snap
+    # Upsert the state first: it only applies if nobody tracked since our read,
+    # and its row lock serializes concurrent trackers until we commit.
+    version = int(state.version) if state is not None else 0
+    values = {
+        "dataset_id": dataset_id,
+        "version": version + 1,
+        "risk_score": raw_score,
+        "risk_level": risk_level,
+        "breakdown_hash": breakdown_hash,
+        "smoothed_score": smoothed_score,
+        "prev_smoothed_score": state.smoothed_score if tracked else None,
+        "alpha": alpha_eff,
+        "delta_score": delta_score,
+        "accel_score": accel_score,
+        "tracked_at": func.now(),
+        "last_spike_alert_at": func.now() if spike_alert else (state.last_spike_alert_at if state else None),
+        "last_accel_alert_at": func.now() if accel_alert else (state.last_accel_alert_at if state else None),
+    }
+    stmt = pg_insert(DatasetRiskState).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DatasetRiskState.dataset_id],
+        set_={k: stmt.excluded[k] for k in values if k != "dataset_id"},
+        where=DatasetRiskState.version == version,
+    ).returning(DatasetRiskState.version)
+    if db.execute(stmt).scalar() is None:
+        db.rollback()
+        logger.info(
+            "Risk tracked concurrently - skipping history insert",
+            extra={"dataset_id": str(dataset_id)},
+        )
+        state, _ = _load_risk_state(db, dataset_id)
+        return _skipped_track(dataset_id, state, breakdown, smoothed_score, alpha_eff)
 
+    snap = DatasetRiskHistory(
+        dataset_id=dataset_id,
+        risk_score=raw_score,
+        risk_level=risk_level,
+        breakdown=breakdown,
+        smoothed_score=smoothed_score,
+        alpha=alpha_eff,
+        delta_score=delta_score,
+        accel_score=accel_score,
+    )
+    db.add(snap)
+    db.add_all(alerts)
+    record_baseline_point(db, dataset_id, raw_score, metric="risk_score")
+    db.flush()
+    _stamp_risk_watermark(db, dataset_id, res)
+    db.commit()
+    if alerts:
+        invalidate_dataset_risk(dataset_id)
+
+    return snap
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+import math
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy import case, func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.orm import Session
+
+from app.models.dataset_risk_history import DatasetRiskHistory
+from app.models.dataset_risk_rollup import DatasetRiskDaily, DatasetRiskHourly
+
+# Upper bound on points returned by any downsampled history request
+MAX_HISTORY_BUCKETS = 2000
+DOWNSAMPLE_METHODS = ("bucket", "lttb")
+LTTB_METRICS = ("smoothed_score", "risk_score")
+
+
+def _opt_float(v: Any) -> Optional[float]:
+    return float(v) if v is not None else None
+
+
+def as_utc(ts: Optional[datetime]) -> Optional[datetime]:
+    """Aware UTC timestamp; naive query bounds are taken to be UTC."""
+    if ts is None:
+        return None
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+def history_bounds(db: Session, dataset_id) -> tuple[Optional[datetime], Optional[datetime]]:
+    """
+    (oldest, newest) history timestamps, counting rolled-up history; each end
+    comes off the (dataset_id, created_at) index or the daily rollup primary key.
+    """
+    H, D = DatasetRiskHistory, DatasetRiskDaily
+    lo, hi = (
+        db.query(func.min(H.created_at), func.max(H.created_at))
+        .filter(H.dataset_id == dataset_id)
+        .one()
+    )
+    rlo, rhi = (
+        db.query(func.min(D.bucket_start), func.max(D.last_at))
+        .filter(D.dataset_id == dataset_id)
+        .one()
+    )
+    los = [t for t in (lo, rlo) if t is not None]
+    his = [t for t in (hi, rhi) if t is not None]
+    return (min(los) if los else None, max(his) if his else None)
+
+
+def _bucket_width(start: datetime, end: datetime, buckets: int) -> timedelta:
+    """
+    Smallest width giving at most `buckets` buckets, rounded up to whole days
+    or hours once it reaches them.
+    """
+    seconds = max(1.0, (end - start).total_seconds() / max(1, buckets))
+    for unit in (86400, 3600):
+        if seconds >= unit:
+            return timedelta(seconds=math.ceil(seconds / unit) * unit)
+    return timedelta(seconds=math.ceil(seconds))
+
+
+def _bucket_origin(start: datetime, width: timedelta) -> datetime:
+    """
+    date_bin origin: UTC midnight for whole-day widths and the hour for
+    whole-hour widths, like the daily and hourly rollup buckets, so every
+    rollup row falls inside one bucket; `start` itself otherwise.
+    """
+    start = as_utc(start)
+    if width % timedelta(days=1) == timedelta(0):
+        return start.replace(hour=0, minute=0, second=0, microsecond=0)
+    if width % timedelta(hours=1) == timedelta(0):
+        return start.replace(minute=0, second=0, microsecond=0)
+    return start
+
+
+def _raw_rows(dataset_id, start: datetime, end: datetime):
+    """Raw history rows shaped like rollup rows (each row a one-row bucket)."""
+    H = DatasetRiskHistory
+    return (
+        select(
+            H.created_at.label("ts"),
+            literal(1).label("n"),
+            H.risk_score.label("risk_min"),
+            H.risk_score.label("risk_max"),
+            H.risk_score.label("risk_sum"),
+            H.smoothed_score.label("smoothed_min"),
+            H.smoothed_score.label("smoothed_max"),
+            H.smoothed_score.label("smoothed_sum"),
+            case((H.smoothed_score.is_(None), 0), else_=1).label("smoothed_n"),
+            H.created_at.label("last_at"),
+            H.risk_score.label("risk_last"),
+            H.risk_level.label("level_last"),
+            H.smoothed_score.label("smoothed_last"),
+            H.delta_score.label("delta_last"),
+            H.accel_score.label("accel_last"),
+        )
+        .where(H.dataset_id == dataset_id)
+        .where(H.created_at >= start)
+        .where(H.created_at < end)
+    )
+
+
+def _rollup_rows(model, dataset_id, start: datetime, end: datetime):
+    R = model
+    return (
+        select(
+            R.bucket_start.label("ts"),
+            R.row_count.label("n"),
+            R.risk_min,
+            R.risk_max,
+            R.risk_sum,
+            R.smoothed_min,
+            R.smoothed_max,
+            R.smoothed_sum,
+            R.smoothed_count.label("smoothed_n"),
+            R.last_at,
+            R.risk_last,
+            R.risk_level_last.label("level_last"),
+            R.smoothed_last,
+            R.delta_last,
+            R.accel_last,
+        )
+        .where(R.dataset_id == dataset_id)
+        .where(R.bucket_start >= start)
+        .where(R.bucket_start < end)
+    )
+
+
+def bucketed_history(
+    db: Session,
+    dataset_id,
+    start: datetime,
+    end: datetime,
+    buckets: int,
+) -> dict[str, Any]:
+    """
+    History in [start, end) aggregated into about `buckets` fixed-width
+    date_bin buckets: row count, min/max/avg of raw and smoothed scores, and
+    the values of the bucket's last row. Raw rows (an index range scan over the
+    partitions in range) are merged with the hourly rollups, or the daily ones
+    for buckets of a day or more, so ranges past raw retention still chart.
+    Buckets of whole hours/days are aligned to the hour/UTC midnight, so the
+    first one may start before `start` and one extra bucket can appear.
+    """
+    width = _bucket_width(start, end, buckets)
+    origin = _bucket_origin(start, width)
+    rollup = DatasetRiskDaily if width % timedelta(days=1) == timedelta(0) else DatasetRiskHourly
+    src = union_all(
+        _raw_rows(dataset_id, start, end),
+        _rollup_rows(rollup, dataset_id, start, end),
+    ).subquery("src")
+
+    bucket = func.date_bin(literal(width), src.c.ts, literal(origin)).label("bucket")
+
+    def _last(col):
+        return func.array_agg(aggregate_order_by(col, src.c.last_at.desc()), type_=ARRAY(col.type))[1]
+
+    n = func.sum(src.c.n)
+    smoothed_n = func.sum(src.c.smoothed_n)
+    rows = db.execute(
+        select(
+            bucket,
+            n.label("count"),
+            func.min(src.c.risk_min).label("risk_min"),
+            func.max(src.c.risk_max).label("risk_max"),
+            (func.sum(src.c.risk_sum) / func.nullif(n, 0)).label("risk_avg"),
+            func.min(src.c.smoothed_min).label("smoothed_min"),
+            func.max(src.c.smoothed_max).label("smoothed_max"),
+            (func.sum(src.c.smoothed_sum) / func.nullif(smoothed_n, 0)).label("smoothed_avg"),
+            func.max(src.c.last_at).label("last_at"),
+            _last(src.c.risk_last).label("risk_last"),
+            _last(src.c.level_last).label("level_last"),
+            _last(src.c.smoothed_last).label("smoothed_last"),
+            _last(src.c.delta_last).label("delta_last"),
+            _last(src.c.accel_last).label("accel_last"),
+        )
+        .group_by(bucket)
+        .order_by(bucket)
+    ).all()
+
+    return {
+        "method": "bucket",
+        "bucket_seconds": int(width.total_seconds()),
+        "points": [
+            {
+                "bucket_start": r.bucket,
+                "count": int(r.count),
+                "last_at": r.last_at,
+                "risk_score": {
+                    "min": r.risk_min,
+                    "max": r.risk_max,
+                    "avg": _opt_float(r.risk_avg),
+                    "last": r.risk_last,
+                },
+                "smoothed_score": {
+                    "min": r.smoothed_min,
+                    "max": r.smoothed_max,
+                    "avg": _opt_float(r.smoothed_avg),
+                    "last": r.smoothed_last,
+                },
+                "risk_level": r.level_last,
+                "delta_score": _opt_float(r.delta_last),
+                "accel_score": _opt_float(r.accel_last),
+            }
+            for r in rows
+        ],
+    }
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points (first and
+    last always kept) that preserve the visual shape of y over x.
+    """
+    n = int(x.size)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold <= 2:
+        return np.array([0, n - 1], dtype=int)
+
+    # n - 2 interior points split into threshold - 2 buckets
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for b in range(threshold - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # average of the next bucket (or the last point) is the third vertex
+        if b + 2 < threshold - 1:
+            nlo, nhi = edges[b + 1], edges[b + 2]
+            cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        else:
+            cx, cy = x[n - 1], y[n - 1]
+        area = np.abs(
+            (x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[b + 1] = a
+    return selected
+
+
+def lttb_history(
+    db: Session,
+    dataset_id,
+    start: datetime,
+    end: datetime,
+    buckets: int,
+    metric: str = "smoothed_score",
+) -> dict[str, Any]:
+    """
+    Real history rows in [start, end) thinned to at most `buckets` points with
+    LTTB on `metric`. Reads the range once (index range scan), downsamples in NumPy.
+    """
+    H = DatasetRiskHistory
+    rows = (
+        db.query(
+            H.id, H.created_at, H.risk_score, H.risk_level,
+            H.smoothed_score, H.delta_score, H.accel_score,
+        )
+        .filter(H.dataset_id == dataset_id)
+        .filter(H.created_at >= start)
+        .filter(H.created_at < end)
+        .order_by(H.created_at)
+        .all()
+    )
+    if rows:
+        x = np.array([r.created_at.timestamp() for r in rows], dtype="float64")
+        y = np.array(
+            [
+                (getattr(r, metric) if getattr(r, metric) is not None else r.risk_score)
+                for r in rows
+            ],
+            dtype="float64",
+        )
+        keep = lttb_indices(x, y, buckets)
+    else:
+        keep = np.array([], dtype=int)
+
+    return {
+        "method": "lttb",
+        "metric": metric,
+        "source_rows": len(rows),
+        "points": [
+            {
+                "id": str(rows[i].id),
+                "created_at": rows[i].created_at,
+                "risk_score": rows[i].risk_score,
+                "risk_level": rows[i].risk_level,
+                "smoothed_score": rows[i].smoothed_score,
+                "delta_score": _opt_float(rows[i].delta_score),
+                "accel_score": _opt_float(rows[i].accel_score),
+            }
+            for i in keep
+        ],
+    }
@@ -0,0 +1,510 @@
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, field, fields, replace
+from datetime import datetime
+import logging
+import uuid
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy import bindparam, union_all, update
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.logging import setup_logging
+from app.db.session import SessionLocal
+from app.models import AlertEvent, Dataset, DatasetAnomalyBaseline, DatasetInsight, DatasetSnapshot
+from app.models.dataset_risk_history import DatasetRiskHistory
+from app.models.dataset_risk_state import DatasetRiskState
+from app.services import risk_engine as risk
+
+logger = logging.getLogger("insightsentinel.risk_replay")
+
+# Breakdown components in the order they are summed into the raw score
+COMPONENTS: tuple[str, ...] = (
+    "insight_score",
+    "stat_score",
+    "alert_score",
+    "struct_score",
+    "drift_score",
+)
+
+# Datasets padded into one [datasets x rows] matrix; sorted by history length
+# first so padding stays small
+_REPLAY_CHUNK = 256
+
+
+@dataclass(frozen=True)
+class ReplayParams:
+    """
+    Risk tracking constants a replay can vary. Defaults are the live values
+    in risk_engine. History stores only per-component totals, so weights act
+    on components (e.g. insight_score x 1.5), not on individual insight codes.
+    """
+
+    ema_alpha: float = risk.RISK_EMA_ALPHA
+    alpha_min: float = risk.RISK_ALPHA_MIN
+    alpha_max: float = risk.RISK_ALPHA_MAX
+    track_interval_minutes: float = risk.RISK_TRACK_INTERVAL_MINUTES
+    stale_after_minutes: float = risk.RISK_STALE_AFTER_MINUTES
+    decay_per_interval: float = risk.RISK_DECAY_PER_INTERVAL
+    component_weights: dict[str, float] = field(default_factory=dict)
+    component_caps: dict[str, float] = field(
+        default_factory=lambda: {
+            "insight_score": risk.MAX_INSIGHT_SCORE,
+            "stat_score": risk.MAX_STAT_SCORE,
+            "alert_score": risk.MAX_ALERT_SCORE,
+            "struct_score": risk.MAX_STRUCT_SCORE,
+            "drift_score": risk.MAX_DRIFT_SCORE,
+        }
+    )
+
+    @classmethod
+    def with_overrides(cls, overrides: Optional[dict[str, Any]] = None) -> "ReplayParams":
+        """Defaults with the given fields replaced; unknown keys raise ValueError."""
+        params = cls()
+        overrides = {k: v for k, v in (overrides or {}).items() if v is not None}
+        known = {f.name for f in fields(cls)}
+        unknown = set(overrides) - known
+        if unknown:
+            raise ValueError(f"Unknown replay parameters: {sorted(unknown)}")
+        for key in ("component_weights", "component_caps"):
+            if key in overrides:
+                bad = set(overrides[key]) - set(COMPONENTS)
+                if bad:
+                    raise ValueError(f"Unknown breakdown components in {key}: {sorted(bad)}")
+                overrides[key] = {**getattr(params, key), **overrides[key]}
+        return replace(params, **overrides)
+
+
+@dataclass
+class DatasetTimeline:
+    """One dataset's risk history (oldest first) and signal times, as arrays."""
+
+    dataset_id: str
+    history_ids: list[Any]
+    created_at: list[datetime]
+    times: np.ndarray  # epoch seconds per history row
+    components: np.ndarray  # [rows, len(COMPONENTS)] stored breakdown
+    risk_score: np.ndarray
+    risk_level: list[str]
+    smoothed_score: np.ndarray  # NaN where not stored
+    alpha: np.ndarray
+    delta_score: np.ndarray
+    accel_score: np.ndarray
+    signal_times: np.ndarray  # sorted epoch seconds of snapshots, insight updates, alerts
+
+    def __len__(self) -> int:
+        return int(self.times.size)
+
+    @property
+    def resumes(self) -> bool:
+        """
+        The oldest row continues earlier history (it has a velocity, so it was
+        not the first track), e.g. after partition maintenance rolled up and
+        dropped the rows before it. Replay then starts from its stored state.
+        """
+        return len(self) > 0 and not np.isnan(self.smoothed_score[0]) and not np.isnan(self.delta_score[0])
+
+
+@dataclass
+class ReplayResult:
+    timeline: DatasetTimeline
+    risk_score: np.ndarray
+    risk_level: list[str]
+    smoothed_score: np.ndarray
+    alpha: np.ndarray
+    delta_score: np.ndarray  # NaN on the first row
+    accel_score: np.ndarray  # NaN on the first two rows
+
+    def changed(self) -> np.ndarray:
+        """Rows whose replayed values differ from what is stored."""
+        t = self.timeline
+
+        def _differs(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+            both_nan = np.isnan(a) & np.isnan(b)
+            return ~both_nan & ~(np.abs(a - b) <= 1e-9)
+
+        return (
+            (self.risk_score != t.risk_score)
+            | (np.asarray(self.risk_level) != np.asarray(t.risk_level))
+            | _differs(self.smoothed_score, t.smoothed_score)
+            | _differs(self.alpha, t.alpha)
+            | _differs(self.delta_score, t.delta_score)
+            | _differs(self.accel_score, t.accel_score)
+        )
+
+    def to_dict(self, include_series: bool = True) -> dict[str, Any]:
+        t = self.timeline
+        changed = self.changed()
+        diff = np.abs(self.smoothed_score - np.nan_to_num(t.smoothed_score, nan=self.smoothed_score))
+        out: dict[str, Any] = {
+            "dataset_id": t.dataset_id,
+            "rows": len(t),
+            "changed_rows": int(changed.sum()),
+            "max_abs_smoothed_diff": float(diff.max()) if diff.size else 0.0,
+        }
+        if include_series:
+            out["series"] = [
+                {
+                    "id": str(t.history_ids[i]),
+                    "created_at": t.created_at[i],
+                    "changed": bool(changed[i]),
+                    "stored": _row(t.risk_score, t.risk_level, t.smoothed_score, t.alpha, t.delta_score, t.accel_score, i),
+                    "replayed": _row(
+                        self.risk_score, self.risk_level, self.smoothed_score,
+                        self.alpha, self.delta_score, self.accel_score, i,
+                    ),
+                }
+                for i in range(len(t))
+            ]
+        return out
+
+
+def _opt(x: float) -> Optional[float]:
+    return None if np.isnan(x) else float(x)
+
+
+def _row(score, level, smoothed, alpha, delta, accel, i: int) -> dict[str, Any]:
+    return {
+        "risk_score": int(score[i]),
+        "risk_level": level[i],
+        "smoothed_score": None if np.isnan(smoothed[i]) else int(smoothed[i]),
+        "alpha_used": _opt(alpha[i]),
+        "delta_score": _opt(delta[i]),
+        "accel_score": _opt(accel[i]),
+    }
+
+
+def _float(v: Any) -> float:
+    return np.nan if v is None else float(v)
+
+
+def load_timelines(db: Session, dataset_ids) -> list[DatasetTimeline]:
+    """Risk history and signal timelines for many datasets in two queries."""
+    ids = list(dict.fromkeys(dataset_ids))
+    if not ids:
+        return []
+
+    H = DatasetRiskHistory
+    history = (
+        db.query(
+            H.id, H.dataset_id, H.created_at, H.risk_score, H.risk_level, H.breakdown,
+            H.smoothed_score, H.alpha, H.delta_score, H.accel_score,
+        )
+        .filter(H.dataset_id.in_(ids))
+        .order_by(H.dataset_id, H.created_at, H.id)
+        .all()
+    )
+
+    # Same writes that move datasets.last_signal_at. Insight updates only
+    # survive as each row's latest updated_at, so older ones are not replayed.
+    signals = union_all(
+        db.query(DatasetSnapshot.dataset_id, DatasetSnapshot.created_at.label("ts"))
+        .filter(DatasetSnapshot.dataset_id.in_(ids))
+        .statement,
+        db.query(DatasetInsight.dataset_id, DatasetInsight.updated_at.label("ts"))
+        .filter(DatasetInsight.dataset_id.in_(ids))
+        .statement,
+        db.query(AlertEvent.dataset_id, AlertEvent.created_at.label("ts"))
+        .filter(AlertEvent.dataset_id.in_(ids))
+        .statement,
+    ).subquery()
+    signal_times: dict[str, list[float]] = {}
+    for ds_id, ts in db.query(signals.c.dataset_id, signals.c.ts).order_by(signals.c.ts):
+        signal_times.setdefault(str(ds_id), []).append(ts.timestamp())
+
+    rows_by_ds: dict[str, list[Any]] = {}
+    for r in history:
+        rows_by_ds.setdefault(str(r.dataset_id), []).append(r)
+
+    timelines: list[DatasetTimeline] = []
+    for ds_id, rows in rows_by_ds.items():
+        timelines.append(
+            DatasetTimeline(
+                dataset_id=ds_id,
+                history_ids=[r.id for r in rows],
+                created_at=[r.created_at for r in rows],
+                times=np.array([r.created_at.timestamp() for r in rows], dtype="float64"),
+                components=np.array(
+                    [[float((r.breakdown or {}).get(c) or 0) for c in COMPONENTS] for r in rows],
+                    dtype="float64",
+                ).reshape(len(rows), len(COMPONENTS)),
+                risk_score=np.array([r.risk_score for r in rows], dtype="float64"),
+                risk_level=[r.risk_level for r in rows],
+                smoothed_score=np.array([_float(r.smoothed_score) for r in rows], dtype="float64"),
+                alpha=np.array([_float(r.alpha) for r in rows], dtype="float64"),
+                delta_score=np.array([_float(r.delta_score) for r in rows], dtype="float64"),
+                accel_score=np.array([_float(r.accel_score) for r in rows], dtype="float64"),
+                signal_times=np.array(signal_times.get(ds_id, []), dtype="float64"),
+            )
+        )
+    return timelines
+
+
+def _risk_levels(scores: np.ndarray) -> np.ndarray:
+    return np.select(
+        [scores >= 80, scores >= 50, scores >= 20],
+        ["critical", "high", "moderate"],
+        default="low",
+    )
+
+
+def _replay_chunk(timelines: list[DatasetTimeline], params: ReplayParams) -> list[ReplayResult]:
+    """
+    track_dataset_risk's arithmetic over a [datasets x rows] matrix. Everything
+    but the smoothing recurrence is computed for all rows at once; the
+    recurrence (rounded to an int each step, as stored) advances one column
+    at a time for every dataset together. Timelines that resume earlier
+    history keep the first row's stored smoothed score, alpha, velocity and
+    acceleration as the starting state instead of restarting from raw.
+    """
+    D = len(timelines)
+    T = max(len(t) for t in timelines)
+    valid = np.zeros((D, T), dtype=bool)
+    times = np.zeros((D, T))
+    comps = np.zeros((D, T, len(COMPONENTS)))
+    last_signal = np.full((D, T), np.nan)
+    for d, t in enumerate(timelines):
+        n = len(t)
+        valid[d, :n] = True
+        times[d, :n] = t.times
+        times[d, n:] = t.times[-1]
+        comps[d, :n] = t.components
+        if t.signal_times.size:
+            # latest signal at or before each track
+            pos = np.searchsorted(t.signal_times, t.times, side="right") - 1
+            last_signal[d, :n] = np.where(pos >= 0, t.signal_times[np.maximum(pos, 0)], np.nan)
+
+    weights = np.array([float(params.component_weights.get(c, 1.0)) for c in COMPONENTS])
+    caps = np.array([float(params.component_caps[c]) for c in COMPONENTS])
+    raw = np.minimum(np.rint(np.minimum(comps * weights, caps).sum(axis=2)), 100.0)
+
+    intervals = np.ones((D, T))
+    intervals[:, 1:] = np.maximum(
+        1.0, np.diff(times, axis=1) / float(params.track_interval_minutes * 60)
+    )
+    alpha = 1.0 - np.power(1.0 - float(params.ema_alpha), intervals)
+    alpha = np.clip(alpha, params.alpha_min, params.alpha_max)
+
+    # Decay applies when no signal arrived since the previous track and the
+    # latest one is older than stale_after_minutes.
+    prev_times = np.concatenate([times[:, :1], times[:, :-1]], axis=1)
+    with np.errstate(invalid="ignore"):
+        decays = (
+            (np.arange(T) > 0)
+            & ~np.isnan(last_signal)
+            & (last_signal <= prev_times)
+            & ((times - last_signal) / 60.0 >= float(params.stale_after_minutes))
+        )
+    decay_factor = np.power(1.0 - float(params.decay_per_interval), intervals)
+
+    resumes = np.array([t.resumes for t in timelines])
+    first = {
+        name: np.array([getattr(t, name)[0] for t in timelines])
+        for name in ("smoothed_score", "alpha", "delta_score", "accel_score")
+    }
+    alpha[:, 0] = np.where(resumes & ~np.isnan(first["alpha"]), first["alpha"], alpha[:, 0])
+
+    smoothed = np.empty((D, T))
+    smoothed[:, 0] = np.where(resumes, first["smoothed_score"], raw[:, 0])
+    for i in range(1, T):
+        prev = smoothed[:, i - 1]
+        s = np.rint(alpha[:, i] * raw[:, i] + (1.0 - alpha[:, i]) * prev)
+        decayed = np.rint(raw[:, i] + (s - raw[:, i]) * decay_factor[:, i])
+        smoothed[:, i] = np.where(decays[:, i], np.maximum(raw[:, i], decayed), s)
+
+    delta = np.full((D, T), np.nan)
+    delta[:, 0] = np.where(resumes, first["delta_score"], np.nan)
+    delta[:, 1:] = np.diff(smoothed, axis=1)
+    accel = np.full((D, T), np.nan)
+    accel[:, 0] = np.where(resumes, first["accel_score"], np.nan)
+    accel[:, 1:] = np.diff(delta, axis=1)
+
+    levels = _risk_levels(raw)
+    results: list[ReplayResult] = []
+    for d, t in enumerate(timelines):
+        n = len(t)
+        results.append(
+            ReplayResult(
+                timeline=t,
+                risk_score=raw[d, :n],
+                risk_level=[str(x) for x in levels[d, :n]],
+                smoothed_score=smoothed[d, :n],
+                alpha=alpha[d, :n],
+                delta_score=delta[d, :n],
+                accel_score=accel[d, :n],
+            )
+        )
+    return results
+
+
+def replay_timelines(
+    timelines: list[DatasetTimeline],
+    params: Optional[ReplayParams] = None,
+) -> list[ReplayResult]:
+    """Recompute raw, smoothed, delta and acceleration series; input order is kept."""
+    params = params or ReplayParams()
+    order = sorted(range(len(timelines)), key=lambda i: len(timelines[i]))
+    results: dict[int, ReplayResult] = {}
+    nonempty = [i for i in order if len(timelines[i]) > 0]
+    for start in range(0, len(nonempty), _REPLAY_CHUNK):
+        chunk = nonempty[start : start + _REPLAY_CHUNK]
+        for i, res in zip(chunk, _replay_chunk([timelines[i] for i in chunk], params)):
+            results[i] = res
+    return [results[i] for i in range(len(timelines)) if i in results]
+
+
+def replay_dataset_risk(
+    db: Session,
+    dataset_id,
+    params: Optional[ReplayParams] = None,
+) -> Optional[ReplayResult]:
+    """Dry run for one dataset: replayed series next to the stored ones, nothing written."""
+    timelines = load_timelines(db, [dataset_id])
+    if not timelines:
+        return None
+    return replay_timelines(timelines, params)[0]
+
+
+def _prev_smoothed(res: ReplayResult) -> Optional[int]:
+    """Smoothed score one track before the last, for the state row."""
+    if len(res.timeline) > 1:
+        return int(res.smoothed_score[-2])
+    if not np.isnan(res.delta_score[0]):
+        return int(res.smoothed_score[0] - res.delta_score[0])
+    return None
+
+
+def _write_results(db: Session, results: list[ReplayResult]) -> int:
+    """Rewrite changed history rows and re-seed each dataset's tracking state."""
+    history_rows: list[dict[str, Any]] = []
+    for res in results:
+        for i in np.flatnonzero(res.changed()):
+            history_rows.append(
+                {
+                    "b_id": res.timeline.history_ids[i],
+                    "b_created_at": res.timeline.created_at[i],
+                    "b_risk_score": int(res.risk_score[i]),
+                    "b_risk_level": res.risk_level[i],
+                    "b_smoothed_score": int(res.smoothed_score[i]),
+                    "b_alpha": float(res.alpha[i]),
+                    "b_delta_score": _opt(res.delta_score[i]),
+                    "b_accel_score": _opt(res.accel_score[i]),
+                }
+            )
+    if history_rows:
+        H = DatasetRiskHistory.__table__
+        db.execute(
+            update(H)
+            .where(H.c.id == bindparam("b_id"))
+            .where(H.c.created_at == bindparam("b_created_at"))  # prunes to one partition
+            .values(
+                risk_score=bindparam("b_risk_score"),
+                risk_level=bindparam("b_risk_level"),
+                smoothed_score=bindparam("b_smoothed_score"),
+                alpha=bindparam("b_alpha"),
+                delta_score=bindparam("b_delta_score"),
+                accel_score=bindparam("b_accel_score"),
+            ),
+            history_rows,
+        )
+
+    state_rows = [
+        {
+            "b_dataset_id": uuid.UUID(res.timeline.dataset_id),
+            "b_risk_score": int(res.risk_score[-1]),
+            "b_risk_level": res.risk_level[-1],
+            "b_smoothed_score": int(res.smoothed_score[-1]),
+            "b_prev_smoothed_score": _prev_smoothed(res),
+            "b_alpha": float(res.alpha[-1]),
+            "b_delta_score": _opt(res.delta_score[-1]),
+            "b_accel_score": _opt(res.accel_score[-1]),
+        }
+        for res in results
+        if res.changed().any()
+    ]
+    if state_rows:
+        S = DatasetRiskState.__table__
+        # version bump: a track that read the old state loses its upsert
+        db.execute(
+            update(S)
+            .where(S.c.dataset_id == bindparam("b_dataset_id"))
+            .values(
+                version=S.c.version + 1,
+                risk_score=bindparam("b_risk_score"),
+                risk_level=bindparam("b_risk_level"),
+                smoothed_score=bindparam("b_smoothed_score"),
+                prev_smoothed_score=bindparam("b_prev_smoothed_score"),
+                alpha=bindparam("b_alpha"),
+                delta_score=bindparam("b_delta_score"),
+                accel_score=bindparam("b_accel_score"),
+            ),
+            state_rows,
+        )
+
+    # Anomaly baselines hold the old risk scores; dropped rows reseed from history
+    rescored = [
+        uuid.UUID(res.timeline.dataset_id)
+        for res in results
+        if (res.risk_score != res.timeline.risk_score).any()
+    ]
+    if rescored:
+        db.query(DatasetAnomalyBaseline).filter(
+            DatasetAnomalyBaseline.dataset_id.in_(rescored)
+        ).delete(synchronize_session=False)
+    return len(history_rows)
+
+
+def backfill_risk_history(
+    db: Session,
+    dataset_ids=None,
+    params: Optional[ReplayParams] = None,
+    dry_run: bool = False,
+) -> dict[str, int]:
+    """
+    Replay stored history for the given datasets (default: all) and rewrite the
+    rows that differ, one committed batch of risk_batch_size datasets at a time.
+    """
+    params = params or ReplayParams()
+    if dataset_ids is None:
+        dataset_ids = [r[0] for r in db.query(Dataset.id).order_by(Dataset.id).all()]
+    dataset_ids = list(dataset_ids)
+    batch_size = max(1, int(get_settings().risk_batch_size))
+
+    totals = {"datasets": 0, "rows": 0, "changed_rows": 0}
+    for start in range(0, len(dataset_ids), batch_size):
+        results = replay_timelines(load_timelines(db, dataset_ids[start : start + batch_size]), params)
+        totals["datasets"] += len(results)
+        totals["rows"] += sum(len(r.timeline) for r in results)
+        if dry_run:
+            totals["changed_rows"] += sum(int(r.changed().sum()) for r in results)
+            db.rollback()
+            continue
+        totals["changed_rows"] += _write_results(db, results)
+        db.commit()
+        logger.info(
+            "Risk history backfill batch written",
+            extra={"datasets_done": start + len(results), **totals},
+        )
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay and rewrite stored risk history.")
+    parser.add_argument("--dataset-id", action="append", dest="dataset_ids", help="repeatable; default all")
+    parser.add_argument("--dry-run", action="store_true", help="count changed rows without writing")
+    args = parser.parse_args()
+
+    setup_logging(get_settings().log_level)
+    db: Session = SessionLocal()
+    try:
+        totals = backfill_risk_history(db, args.dataset_ids, dry_run=args.dry_run)
+    finally:
+        db.close()
+    logger.info("Risk history backfill finished", extra={"dry_run": args.dry_run, **totals})
+
+
+if __name__ == "__main__":
+    main()
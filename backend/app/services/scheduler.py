@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
 import logging
 import time
 
@@ -8,16 +9,20 @@ from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
 from app.db.session import SessionLocal
-from app.models.dataset import Dataset
-from app.models.dataset_risk_history import DatasetRiskHistory
 from app.services.alert_engine import evaluate_dataset_rules
+from app.services.partition_maintenance import run_partition_maintenance
 from app.services.pg_lock import advisory_unlock, try_advisory_lock
-from app.services.risk_engine import _get_latest_signal_timestamp, track_dataset_risk
+from app.services.risk_engine import (
+    compute_dataset_risk_batch,
+    select_dirty_datasets,
+    track_dataset_risk,
+)
 
 logger = logging.getLogger("insightsentinel.scheduler")
 
 _scheduler: BackgroundScheduler | None = None
 LOCK_KEY = "insightsentinel:scheduler:v1"
+PARTITION_LOCK_KEY = "insightsentinel:partitions:v1"
 
 
 def _scheduler_job():
@@ -26,10 +31,9 @@ def _scheduler_job():
     logger.info("Scheduler tick started")
 
     db: Session = SessionLocal()
-    total_datasets = 0
+    due: list = []
     processed = 0
     failures = 0
-    skipped_no_change = 0
     alerts_created_total = 0
     risk_tracked_total = 0
 
@@ -40,40 +44,48 @@ def _scheduler_job():
 
         logger.info("Scheduler leader lock acquired.")
 
-        datasets = db.query(Dataset).all()
-        total_datasets = len(datasets)
-
-        for ds in datasets:
+        # Unchanged datasets never leave the database: one indexed query.
+        due = select_dirty_datasets(db)
+
+        batch_size = max(1, int(settings.risk_batch_size))
+        for i in range(0, len(due), batch_size):
+            batch = []
+            for dataset_id in due[i : i + batch_size]:
+                try:
+                    processed += 1
+                    summary = evaluate_dataset_rules(db, dataset_id)
+                    alerts_created_total += int(summary.created_events)
+                    batch.append(dataset_id)
+                except Exception as e:
+                    failures += 1
+                    logger.exception(
+                        "Scheduler dataset failure",
+                        extra={"dataset_id": str(dataset_id), "error": str(e)},
+                    )
+
+            # Scored after rule evaluation so new alerts count towards alert pressure.
             try:
-                if not ds.row_count or ds.row_count == 0:
-                    continue
-
-                latest_signal = _get_latest_signal_timestamp(db, ds.id)
-                latest_risk = (
-                    db.query(DatasetRiskHistory.created_at)
-                    .filter(DatasetRiskHistory.dataset_id == ds.id)
-                    .order_by(DatasetRiskHistory.created_at.desc())
-                    .limit(1)
-                    .scalar()
-                )
-                if latest_risk and (latest_signal is None or latest_signal <= latest_risk):
-                    skipped_no_change += 1
-                    logger.info("Skipping dataset (no change)", extra={"dataset_id": str(ds.id)})
-                    continue
-
-                processed += 1
-                summary = evaluate_dataset_rules(db, ds.id)
-                alerts_created_total += int(summary.created_events)
-
-                risk = track_dataset_risk(db, ds.id)
-                if risk and not (isinstance(risk, dict) and risk.get("skipped") is True):
-                    risk_tracked_total += 1
+                results = compute_dataset_risk_batch(db, batch)
             except Exception as e:
-                failures += 1
-                logger.exception(
-                    "Scheduler dataset failure",
-                    extra={"dataset_id": str(ds.id), "error": str(e)},
-                )
+                failures += len(batch)
+                logger.exception("Scheduler risk batch failure", extra={"error": str(e)})
+                db.rollback()
+                continue
+
+            for dataset_id in batch:
+                try:
+                    res = results.get(str(dataset_id))
+                    if res is None:
+                        continue
+                    risk = track_dataset_risk(db, dataset_id, result=res)
+                    if risk and not (isinstance(risk, dict) and risk.get("skipped") is True):
+                        risk_tracked_total += 1
+                except Exception as e:
+                    failures += 1
+                    logger.exception(
+                        "Scheduler dataset failure",
+                        extra={"dataset_id": str(dataset_id), "error": str(e)},
+                    )
     finally:
         try:
             advisory_unlock(db, LOCK_KEY)
@@ -85,9 +97,8 @@ def _scheduler_job():
     logger.info(
         "Scheduler tick finished",
         extra={
-            "datasets_total": total_datasets,
+            "datasets_dirty": len(due),
             "datasets_processed": processed,
-            "datasets_skipped_no_change": skipped_no_change,
             "failures": failures,
             "alerts_created_total": alerts_created_total,
             "risk_tracked_total": risk_tracked_total,
@@ -96,6 +107,30 @@ def _scheduler_job():
     )
 
 
+def _partition_maintenance_job():
+    start = time.time()
+    db: Session = SessionLocal()
+    summary: dict = {}
+    try:
+        if not try_advisory_lock(db, PARTITION_LOCK_KEY):
+            logger.info("Partition maintenance lock not acquired - skipping.")
+            return
+        summary = run_partition_maintenance(db)
+    except Exception as e:
+        logger.exception("Partition maintenance failure", extra={"error": str(e)})
+    finally:
+        try:
+            advisory_unlock(db, PARTITION_LOCK_KEY)
+        except Exception:
+            pass
+        db.close()
+
+    logger.info(
+        "Partition maintenance finished",
+        extra={**summary, "duration_ms": round((time.time() - start) * 1000, 2)},
+    )
+
+
 def start_scheduler():
     global _scheduler
     settings = get_settings()
@@ -111,6 +146,13 @@ def start_scheduler():
     interval = settings.scheduler_interval_minutes
     _scheduler = BackgroundScheduler()
     _scheduler.add_job(_scheduler_job, "interval", minutes=interval)
+    # Also runs once at startup so next month's partitions exist before they are needed
+    _scheduler.add_job(
+        _partition_maintenance_job,
+        "interval",
+        hours=max(1, settings.partition_maintenance_interval_hours),
+        next_run_time=datetime.now(timezone.utc),
+    )
     _scheduler.start()
 
     logger.info(f"Scheduler started (interval={interval} minutes)")
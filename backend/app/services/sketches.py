@@ -0,0 +1,476 @@
+from __future__ import annotations
+
+import math
+import struct
+import zlib
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+from app.core.config import get_settings
+
+_HLL_VERSION = 1
+_HLL_MIN_P = 4
+_HLL_MAX_P = 18
+
+_KLL_VERSION = 1
+_KLL_C = 2.0 / 3.0
+
+_ROW_HASHES_VERSION = 1
+
+
+# Integral floats up to 2**53 are exact, so they hash like the equal integer
+_EXACT_FLOAT_INT = 2.0 ** 53
+# Mixed into the hashes of non-integral floats so their bit patterns cannot
+# collide with the int64 bit patterns of integers
+_FLOAT_HASH_SALT = np.uint64(0x9E3779B97F4A7C15)
+
+
+def hash_numeric(values: np.ndarray) -> np.ndarray:
+    """
+    Vectorized 64-bit hashes of a 1-D numeric array without missing values.
+
+    Integers are hashed through their own 64-bit value (never via float64, which
+    rounds above 2**53). Floats holding an integral value up to 2**53 hash like
+    that integer, so a chunk parsed as int64 and one parsed as float64 agree;
+    other floats hash their float64 bits.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == "i":
+        return pd.util.hash_array(values.astype("int64", copy=False), categorize=False)
+    if values.dtype.kind == "u":
+        return pd.util.hash_array(values.astype("uint64", copy=False), categorize=False)
+
+    f = values.astype("float64", copy=False)
+    integral = (np.abs(f) <= _EXACT_FLOAT_INT) & (np.floor(f) == f)
+    if integral.all():
+        return pd.util.hash_array(f.astype("int64"), categorize=False)
+    out = pd.util.hash_array(f, categorize=False) ^ _FLOAT_HASH_SALT
+    if integral.any():
+        out[integral] = pd.util.hash_array(f[integral].astype("int64"), categorize=False)
+    return out
+
+
+def _numeric_values(s: pd.Series) -> np.ndarray:
+    # Nullable extension dtypes (Int64, Float64, ...) expose their numpy dtype
+    return s.to_numpy(dtype=getattr(s.dtype, "numpy_dtype", None))
+
+
+def hash_series(s: pd.Series) -> np.ndarray:
+    """
+    Vectorized 64-bit hashes of the non-null values of a series.
+
+    Numeric values go through hash_numeric, so the same number hashes
+    identically whether a chunk was parsed as int64 or float64.
+    """
+    x = s.dropna()
+    if x.empty:
+        return np.empty(0, dtype="uint64")
+    if is_numeric_dtype(x.dtype) and not is_bool_dtype(x.dtype):
+        return hash_numeric(_numeric_values(x))
+    return pd.util.hash_array(x.to_numpy(), categorize=False)
+
+
+def hash_text_series(s: pd.Series) -> np.ndarray:
+    """
+    hash_series for a column that is text across chunks: values are taken in
+    their string form, and text that parses as a number hashes like that number
+    through hash_numeric. "123" in a text chunk and 123 in a chunk parsed as
+    int64 then count as one distinct value, as they do in a single read.
+    """
+    x = s.dropna()
+    if x.empty:
+        return np.empty(0, dtype="uint64")
+    if is_numeric_dtype(x.dtype) and not is_bool_dtype(x.dtype):
+        return hash_numeric(_numeric_values(x))
+
+    text = x.astype(str)
+    num = pd.to_numeric(text, errors="coerce").to_numpy()
+    parsed = ~pd.isna(num)
+    out = np.empty(len(text), dtype="uint64")
+    if not parsed.all():
+        out[~parsed] = pd.util.hash_array(text.to_numpy()[~parsed], categorize=False)
+    if parsed.any():
+        values = num[parsed]
+        out[parsed] = hash_numeric(values)
+        if values.dtype.kind == "f":
+            # Parsed through float64 (the chunk had text); re-parse integers
+            # above 2**53 on their own so they keep their exact value
+            big = np.flatnonzero(parsed)[np.abs(values) >= _EXACT_FLOAT_INT]
+            if big.size:
+                exact = pd.to_numeric(text.iloc[big], errors="coerce").to_numpy()
+                if exact.dtype.kind in "iu":
+                    out[big] = hash_numeric(exact)
+    return out
+
+
+def hash_rows(df: pd.DataFrame) -> np.ndarray:
+    """
+    Vectorized 64-bit hash per row (index excluded). Numeric columns are hashed
+    per value with hash_numeric (missing values to a fixed hash), so large
+    integer keys stay distinct and int64/float64 chunks hash alike.
+    """
+    frame = df.set_axis(range(df.shape[1]), axis=1)
+    numeric = [
+        i for i, dtype in enumerate(frame.dtypes)
+        if is_numeric_dtype(dtype) and not is_bool_dtype(dtype)
+    ]
+    if numeric:
+        frame = frame.copy()
+        for i in numeric:
+            col = frame[i]
+            hashed = np.zeros(len(col), dtype="uint64")
+            mask = col.notna().to_numpy()
+            hashed[mask] = hash_numeric(_numeric_values(col[mask]))
+            frame[i] = hashed
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def unique_row_hashes(row_hash_parts: list[np.ndarray]) -> np.ndarray:
+    """
+    Distinct row hashes across parts (optionally pre-deduplicated per part);
+    rows beyond the first occurrence are the row count minus their size.
+    """
+    if not row_hash_parts:
+        return np.empty(0, dtype="uint64")
+    return pd.unique(np.concatenate(row_hash_parts))
+
+
+def pack_row_hashes(h: np.ndarray) -> Optional[bytes]:
+    """
+    Unique row hashes as a compact payload (sorted, delta-encoded, compressed)
+    so a later append can count duplicates across uploads exactly. None past
+    Settings.distinct_exact_limit, or in approx distinct mode.
+    """
+    settings = get_settings()
+    mode = (settings.distinct_count_mode or "auto").strip().lower()
+    if mode == "approx" or (mode != "exact" and h.size > int(settings.distinct_exact_limit)):
+        return None
+    ordered = np.sort(h.astype(np.uint64, copy=False))
+    deltas = np.diff(ordered, prepend=np.uint64(0))
+    return bytes([_ROW_HASHES_VERSION]) + zlib.compress(deltas.astype("<u8").tobytes())
+
+
+def unpack_row_hashes(data: bytes) -> np.ndarray:
+    if len(data) < 1 or data[0] != _ROW_HASHES_VERSION:
+        raise ValueError("Unsupported row hash payload")
+    deltas = np.frombuffer(zlib.decompress(data[1:]), dtype="<u8")
+    return np.cumsum(deltas, dtype=np.uint64)
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """Bit length of each uint64 (0 for 0), exact for the full 64-bit range."""
+    hi = (x >> np.uint64(32)).astype(np.float64)
+    lo = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    # frexp(v) returns exponent e with v = m * 2**e, 0.5 <= m < 1, i.e. e == bit length.
+    _, e_hi = np.frexp(hi)
+    _, e_lo = np.frexp(lo)
+    return np.where(hi > 0, 32 + e_hi, e_lo).astype(np.int64)
+
+
+def hll_precision_for_error(rel_error: float) -> int:
+    """Register-count exponent p so that 1.04 / sqrt(2**p) <= rel_error."""
+    rel_error = float(rel_error)
+    if not math.isfinite(rel_error) or rel_error <= 0:
+        return _HLL_MAX_P
+    p = math.ceil(math.log2((1.04 / rel_error) ** 2))
+    return max(_HLL_MIN_P, min(_HLL_MAX_P, p))
+
+
+class HyperLogLog:
+    """
+    Mergeable HyperLogLog cardinality sketch over 64-bit hashes.
+
+    Registers are a uint8 array of length 2**p; merging two sketches of the
+    same precision is an element-wise max, so chunk/partition sketches can be
+    combined after the fact.
+    """
+
+    def __init__(self, p: int, registers: Optional[np.ndarray] = None):
+        if not (_HLL_MIN_P <= int(p) <= _HLL_MAX_P):
+            raise ValueError(f"HyperLogLog precision must be in [{_HLL_MIN_P}, {_HLL_MAX_P}]")
+        self.p = int(p)
+        self.m = 1 << self.p
+        if registers is None:
+            registers = np.zeros(self.m, dtype=np.uint8)
+        self.registers = registers
+
+    def add_hashes(self, h: np.ndarray) -> None:
+        if h.size == 0:
+            return
+        h = h.astype(np.uint64, copy=False)
+        tail_bits = 64 - self.p
+        idx = (h >> np.uint64(tail_bits)).astype(np.int64)
+        tail = h & np.uint64((1 << tail_bits) - 1)
+        rank = (tail_bits - _bit_length(tail) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.p != self.p:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        m = float(self.m)
+        if self.m >= 128:
+            alpha = 0.7213 / (1.0 + 1.079 / m)
+        elif self.m == 64:
+            alpha = 0.709
+        elif self.m == 32:
+            alpha = 0.697
+        else:
+            alpha = 0.673
+
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros > 0:
+            # Small-range correction: linear counting.
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+    def to_bytes(self) -> bytes:
+        return bytes([_HLL_VERSION, self.p]) + zlib.compress(self.registers.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        if len(data) < 2 or data[0] != _HLL_VERSION:
+            raise ValueError("Unsupported HyperLogLog payload")
+        p = int(data[1])
+        registers = np.frombuffer(zlib.decompress(data[2:]), dtype=np.uint8).copy()
+        if registers.size != (1 << p):
+            raise ValueError("Corrupt HyperLogLog payload")
+        return cls(p, registers)
+
+
+class DistinctCounter:
+    """
+    Distinct-value counter that stays exact up to `exact_limit` distinct hashes
+    and then degrades to its HyperLogLog estimate. The HLL sketch is always
+    maintained so it can be persisted and merged later.
+    """
+
+    def __init__(self, p: int, exact_limit: Optional[int]):
+        self.hll = HyperLogLog(p)
+        self.exact_limit = exact_limit
+        self._exact: Optional[np.ndarray] = (
+            np.empty(0, dtype="uint64") if exact_limit is None or exact_limit > 0 else None
+        )
+
+    @property
+    def is_approximate(self) -> bool:
+        return self._exact is None
+
+    @property
+    def count(self) -> int:
+        if self._exact is not None:
+            return int(self._exact.size)
+        return self.hll.estimate()
+
+    def add_hashes(self, h: np.ndarray) -> None:
+        if h.size == 0:
+            return
+        self.hll.add_hashes(h)
+        if self._exact is None:
+            return
+        self._exact = pd.unique(np.concatenate([self._exact, h]))
+        if self.exact_limit is not None and self._exact.size > self.exact_limit:
+            self._exact = None
+
+    def add_series(self, s: pd.Series) -> None:
+        self.add_hashes(hash_series(s))
+
+    def merge_hll(self, other: HyperLogLog) -> None:
+        """
+        Fold in a persisted sketch. Its values are only known as registers, so
+        the exact set is dropped and the count becomes the HLL estimate.
+        """
+        self.hll.merge(other)
+        self._exact = None
+
+
+def new_distinct_counter() -> DistinctCounter:
+    """DistinctCounter configured from Settings.distinct_count_mode / error bound."""
+    settings = get_settings()
+    mode = (settings.distinct_count_mode or "auto").strip().lower()
+    p = hll_precision_for_error(settings.distinct_approx_error)
+    if mode == "exact":
+        return DistinctCounter(p, exact_limit=None)
+    if mode == "approx":
+        return DistinctCounter(p, exact_limit=0)
+    return DistinctCounter(p, exact_limit=max(0, int(settings.distinct_exact_limit)))
+
+
+class KLLSketch:
+    """
+    Mergeable KLL quantile sketch over float values.
+
+    Level h holds items of weight 2**h. When a level exceeds its capacity it is
+    sorted and every other item (random offset) is promoted to the level above,
+    so memory stays O(k) while rank error stays around 1/k. Until the first
+    compaction the sketch holds every value and quantiles are exact.
+    """
+
+    def __init__(self, k: int = 400, seed: int = 0):
+        self.k = max(8, int(k))
+        self.n = 0
+        self.levels: list[np.ndarray] = [np.empty(0, dtype="float64")]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(2, int(math.ceil(self.k * (_KLL_C ** depth))))
+
+    def _compress(self) -> None:
+        changed = True
+        while changed:
+            changed = False
+            for h in range(len(self.levels)):
+                lv = self.levels[h]
+                if lv.size <= self._capacity(h):
+                    continue
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype="float64"))
+                lv = np.sort(lv)
+                # An odd leftover stays at this level so total weight is conserved.
+                if lv.size % 2:
+                    keep, body = lv[-1:], lv[:-1]
+                else:
+                    keep, body = lv[:0], lv
+                offset = int(self._rng.integers(0, 2))
+                self.levels[h] = keep
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], body[offset::2]])
+                changed = True
+
+    def update(self, x: np.ndarray) -> None:
+        x = np.asarray(x, dtype="float64").ravel()
+        x = x[np.isfinite(x)]
+        if x.size == 0:
+            return
+        self.n += int(x.size)
+        self.levels[0] = np.concatenate([self.levels[0], x])
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype="float64"))
+        for h, lv in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], lv])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted(self) -> tuple[np.ndarray, np.ndarray]:
+        vals = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(lv.size, float(1 << h)) for h, lv in enumerate(self.levels)]
+        )
+        order = np.argsort(vals, kind="stable")
+        return vals[order], np.cumsum(weights[order])
+
+    @property
+    def is_exact(self) -> bool:
+        return len(self.levels) == 1
+
+    def quantiles(self, qs) -> np.ndarray:
+        qs = np.asarray(qs, dtype="float64")
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        if self.is_exact:
+            # Every value is still held: same linear interpolation as pandas.
+            return np.quantile(self.levels[0], qs)
+        vals, cum = self._weighted()
+        idx = np.searchsorted(cum, qs * cum[-1], side="left")
+        return vals[np.clip(idx, 0, vals.size - 1)]
+
+    def rank(self, x: float, inclusive: bool = False) -> float:
+        """Estimated number of values < x (or <= x when inclusive)."""
+        if self.n == 0:
+            return 0.0
+        vals, cum = self._weighted()
+        idx = int(np.searchsorted(vals, x, side="right" if inclusive else "left"))
+        return float(cum[idx - 1]) if idx > 0 else 0.0
+
+    def histogram(self, edges: np.ndarray) -> np.ndarray:
+        """
+        Estimated counts per bin for ascending `edges`, with np.histogram's
+        convention: bins are half-open except the last, which includes its edge.
+        """
+        edges = np.asarray(edges, dtype="float64")
+        if self.n == 0:
+            return np.zeros(max(edges.size - 1, 0))
+        vals, cum = self._weighted()
+        cum = np.concatenate([[0.0], cum])
+        pos = np.searchsorted(vals, edges, side="left")
+        pos[-1] = np.searchsorted(vals, edges[-1], side="right")
+        return np.diff(cum[pos])
+
+    def to_bytes(self) -> bytes:
+        parts = [struct.pack("<BHQH", _KLL_VERSION, self.k, self.n, len(self.levels))]
+        for lv in self.levels:
+            parts.append(struct.pack("<I", lv.size))
+            parts.append(lv.astype("<f8").tobytes())
+        return zlib.compress(b"".join(parts))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "KLLSketch":
+        raw = zlib.decompress(data)
+        version, k, n, n_levels = struct.unpack_from("<BHQH", raw, 0)
+        if version != _KLL_VERSION:
+            raise ValueError("Unsupported KLL payload")
+        sk = cls(k)
+        sk.n = int(n)
+        sk.levels = []
+        off = struct.calcsize("<BHQH")
+        for _ in range(n_levels):
+            (size,) = struct.unpack_from("<I", raw, off)
+            off += 4
+            sk.levels.append(np.frombuffer(raw, dtype="<f8", count=size, offset=off).astype("float64"))
+            off += 8 * size
+        return sk
+
+
+def new_quantile_sketch() -> KLLSketch:
+    return KLLSketch(k=get_settings().quantile_sketch_k)
+
+
+class FrequentItems:
+    """
+    Mergeable Misra-Gries heavy-hitters summary over string values.
+
+    Holds at most `capacity` counters; when a merge exceeds it, every counter
+    is decreased by the (capacity+1)-th largest count and non-positive ones are
+    dropped. Counts are exact while the distinct values fit and otherwise
+    underestimate by at most `error` (total / (capacity + 1)).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self.counts: dict[str, int] = {}
+        self.total = 0
+        self.error = 0
+
+    def update(self, s: pd.Series) -> None:
+        vc = s.dropna().astype(str).value_counts(sort=False)
+        if vc.empty:
+            return
+        self.merge_counts(dict(zip(vc.index, vc.to_numpy(dtype="int64").tolist())), int(vc.sum()))
+
+    def merge_counts(self, counts: dict[str, int], total: int, error: int = 0) -> None:
+        for k, c in counts.items():
+            self.counts[k] = self.counts.get(k, 0) + int(c)
+        self.total += int(total)
+        self.error += int(error)
+        if len(self.counts) > self.capacity:
+            cut = sorted(self.counts.values(), reverse=True)[self.capacity]
+            self.counts = {k: c - cut for k, c in self.counts.items() if c > cut}
+            self.error += cut
+
+    def top(self, k: int) -> list[tuple[str, int]]:
+        return sorted(self.counts.items(), key=lambda kv: (-kv[1], kv[0]))[: max(0, int(k))]
+
+
+def new_frequent_items() -> FrequentItems:
+    return FrequentItems(capacity=10 * max(1, get_settings().top_k_values))
@@ -20,6 +20,20 @@ def get_latest_snapshot(db: Session, dataset_id) -> DatasetSnapshot | None:
     )
 
 
+def get_latest_snapshots(db: Session, dataset_ids) -> dict[str, DatasetSnapshot]:
+    """Latest snapshot per dataset (keyed by dataset id as string), in one DISTINCT ON query."""
+    if not dataset_ids:
+        return {}
+    rows = (
+        db.query(DatasetSnapshot)
+        .filter(DatasetSnapshot.dataset_id.in_(list(dataset_ids)))
+        .distinct(DatasetSnapshot.dataset_id)
+        .order_by(DatasetSnapshot.dataset_id, DatasetSnapshot.created_at.desc())
+        .all()
+    )
+    return {str(s.dataset_id): s for s in rows}
+
+
 def get_latest_snapshot_profile_context(
     db: Session, dataset_id
 ) -> tuple[DatasetSnapshot | None, dict[str, Any], dict[str, Any]]:
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+# Same patterns the preview-based checks in insights_engine used, applied with
+# Series.str.match so every value of a column is classified in one pass.
+_NUM_PATTERN = r"^[\s\+\-]?(?:\d+\.?\d*|\.\d+)(?:[eE][\+\-]?\d+)?\s*$"
+_NUM_STRIP_PATTERN = r"[,%€$£]"
+# First character of any value that could be a number or a date
+_CANDIDATE_PATTERN = r"[\d\+\-\.,%€$£]"
+
+# (family, pattern) in priority order; the first match wins.
+DATE_FAMILIES: tuple[tuple[str, str], ...] = (
+    ("ISO", r"^\s*\d{4}-\d{2}-\d{2}(\s+\d{2}:\d{2}(:\d{2})?)?\s*$"),  # 2026-01-02 12:30(:45)
+    ("EU_SLASH", r"^\s*\d{2}/\d{2}/\d{4}\s*$"),  # 31/12/2026
+    ("US_DASH", r"^\s*\d{2}-\d{2}-\d{4}\s*$"),  # 12-31-2026
+)
+# Values outside the families above that still parse as ISO 8601
+ISO_LIKE_FAMILY = "ISO_LIKE"
+
+# Candidate formats tried in order on the values not parsed yet (ISO first),
+# each with a cheap necessary-condition pattern: to_datetime is slow on
+# unparseable strings, so obvious non-candidates never reach it.
+_DATE_FORMATS: tuple[tuple[str, str], ...] = (
+    ("ISO8601", r"\d{4}"),
+    ("%d/%m/%Y", r"\d{1,2}/"),
+    ("%m-%d-%Y", r"\d{1,2}-"),
+)
+
+
+@dataclass
+class TypeSignals:
+    """
+    Additive type-inference counts for one text column.
+
+    Counts (not ratios) are kept so chunk/snapshot signals merge exactly;
+    ratios are derived against `text_count`, the non-blank values seen.
+    """
+
+    text_count: int = 0
+    numeric_count: int = 0
+    date_count: int = 0
+    future_date_count: int = 0
+    date_families: dict[str, int] = field(default_factory=dict)
+
+    def merge(self, other: "TypeSignals") -> "TypeSignals":
+        self.text_count += other.text_count
+        self.numeric_count += other.numeric_count
+        self.date_count += other.date_count
+        self.future_date_count += other.future_date_count
+        for fam, c in other.date_families.items():
+            self.date_families[fam] = self.date_families.get(fam, 0) + int(c)
+        return self
+
+    @property
+    def numeric_ratio(self) -> Optional[float]:
+        return self.numeric_count / self.text_count if self.text_count else None
+
+    @property
+    def date_ratio(self) -> Optional[float]:
+        return self.date_count / self.text_count if self.text_count else None
+
+    @classmethod
+    def from_column(cls, col: Any) -> Optional["TypeSignals"]:
+        """Signals persisted on a SnapshotColumn, or None if it has none."""
+        if col.text_value_count is None:
+            return None
+        return cls(
+            text_count=int(col.text_value_count),
+            numeric_count=int(col.numeric_parse_count or 0),
+            date_count=int(col.date_parse_count or 0),
+            future_date_count=int(col.future_date_count or 0),
+            date_families={k: int(v) for k, v in (col.date_format_counts or {}).items()},
+        )
+
+
+def signal_columns(signals: Optional[TypeSignals]) -> dict[str, Any]:
+    """SnapshotColumn field values; every key is always present (bulk INSERT)."""
+    if signals is None:
+        return {
+            "text_value_count": None,
+            "numeric_parse_count": None,
+            "numeric_parse_ratio": None,
+            "date_parse_count": None,
+            "date_parse_ratio": None,
+            "future_date_count": None,
+            "date_format_counts": None,
+        }
+    return {
+        "text_value_count": signals.text_count,
+        "numeric_parse_count": signals.numeric_count,
+        "numeric_parse_ratio": signals.numeric_ratio,
+        "date_parse_count": signals.date_count,
+        "date_parse_ratio": signals.date_ratio,
+        "future_date_count": signals.future_date_count,
+        "date_format_counts": dict(signals.date_families),
+    }
+
+
+def is_text_dtype(dtype: Any) -> bool:
+    return not is_numeric_dtype(dtype) and not pd.api.types.is_datetime64_any_dtype(dtype)
+
+
+def _as_strings(values: pd.Series) -> pd.Series:
+    """
+    Values as strings. Arrow-backed when pyarrow is installed, so the .str
+    kernels below run as native regex kernels instead of per-value Python.
+    """
+    try:
+        return values.astype("string[pyarrow]")
+    except ImportError:
+        return values.astype("object").map(str)
+
+
+def _match(s: pd.Series, pattern: str) -> np.ndarray:
+    return s.str.match(pattern).fillna(False).to_numpy(dtype=bool)
+
+
+def _parse_dates(s: pd.Series) -> tuple[pd.Series, np.ndarray]:
+    """
+    UTC timestamps for the values any candidate format parses (NaT elsewhere),
+    plus the mask of values parsed by the ISO 8601 pass.
+    """
+    parsed = pd.Series(pd.NaT, index=s.index, dtype="datetime64[ns, UTC]")
+    iso_ok = np.zeros(s.size, dtype=bool)
+    for fmt, candidate in _DATE_FORMATS:
+        todo = parsed.isna().to_numpy()
+        todo[todo] = _match(s[todo], candidate)
+        if not todo.any():
+            continue
+        # Out-of-range dates coerce to NaT like any other unparseable value.
+        got = pd.to_datetime(s[todo], format=fmt, errors="coerce", utc=True)
+        parsed[todo] = got
+        if fmt == "ISO8601":
+            iso_ok = parsed.notna().to_numpy()
+    return parsed, iso_ok
+
+
+def text_signals(s: pd.Series, now: Optional[datetime] = None) -> TypeSignals:
+    """
+    Numeric/date parse counts over every non-blank value of a text column.
+
+    Numbers: currency/percent/thousands separators stripped, then the numeric
+    pattern plus `pd.to_numeric(errors="coerce")` (finite values only).
+    Dates: ISO 8601, then dd/mm/yyyy, then mm-dd-yyyy via `pd.to_datetime`.
+    Families: first matching pattern in DATE_FAMILIES, else ISO_LIKE if the
+    value parses as ISO 8601. Numeric/bool series (chunks parsed before a
+    column turned to text) are counted without string conversion.
+    """
+    now = now or datetime.now(timezone.utc)
+    values = s.dropna()
+    if values.empty:
+        return TypeSignals()
+    if is_bool_dtype(values.dtype):
+        return TypeSignals(text_count=int(values.size))
+    if is_numeric_dtype(values.dtype):
+        # e.g. a numeric CSV chunk of a column that turns to text later on
+        finite = int(np.isfinite(values.to_numpy(dtype="float64")).sum())
+        return TypeSignals(text_count=int(values.size), numeric_count=finite)
+
+    values = _as_strings(values).str.strip()
+    # Classify each distinct value once and weight it by its frequency.
+    freq = values[values != ""].value_counts(sort=False)
+    n = int(freq.sum())
+    if n == 0:
+        return TypeSignals()
+    uniq = freq.index.to_series(index=range(len(freq)))
+    weights = freq.to_numpy(dtype="int64")
+
+    # Neither a number nor a date can start with anything else; free text and
+    # identifiers drop out here after a single pass.
+    cand = _match(uniq, _CANDIDATE_PATTERN)
+
+    cleaned = uniq[cand].str.replace(_NUM_STRIP_PATTERN, "", regex=True)
+    cleaned = cleaned[_match(cleaned, _NUM_PATTERN)]
+    numbers = pd.to_numeric(cleaned, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    is_number = np.zeros(uniq.size, dtype=bool)
+    is_number[cleaned.index[np.isfinite(numbers)]] = True
+
+    # Bare numbers match no date family and aren't treated as dates ("2026").
+    cand &= ~is_number
+    dates = pd.Series(pd.NaT, index=uniq.index, dtype="datetime64[ns, UTC]")
+    iso_ok = np.zeros(uniq.size, dtype=bool)
+    if cand.any():
+        dates[cand], iso_ok[cand] = _parse_dates(uniq[cand])
+    parsed = dates.notna().to_numpy()
+    future = (dates > pd.Timestamp(now.replace(microsecond=0))).to_numpy()
+
+    families: dict[str, int] = {}
+    unmatched = cand.copy()
+    for fam, pattern in DATE_FAMILIES:
+        if not unmatched.any():
+            break
+        hit = np.zeros(uniq.size, dtype=bool)
+        hit[unmatched] = _match(uniq[unmatched], pattern)
+        c = int(weights[hit].sum())
+        if c:
+            families[fam] = c
+        unmatched &= ~hit
+    iso_like = int(weights[unmatched & iso_ok].sum())
+    if iso_like:
+        families[ISO_LIKE_FAMILY] = iso_like
+
+    return TypeSignals(
+        text_count=n,
+        numeric_count=int(weights[is_number].sum()),
+        date_count=int(weights[parsed].sum()),
+        future_date_count=int(weights[future].sum()),
+        date_families=families,
+    )
@@ -0,0 +1,42 @@
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models import Dataset, User
+
+
+@pytest.fixture
+def db():
+    """
+    Session on the configured (migrated) Postgres inside a transaction that is
+    rolled back afterwards; commits only release a savepoint. Skips without a
+    reachable database.
+    """
+    engine = create_engine(get_settings().postgres_dsn, connect_args={"connect_timeout": 3})
+    try:
+        conn = engine.connect()
+    except OperationalError as e:
+        engine.dispose()
+        pytest.skip(f"Postgres unavailable: {e.orig}")
+    trans = conn.begin()
+    session = Session(bind=conn, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        trans.rollback()
+        conn.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def dataset(db) -> Dataset:
+    user = User(email=f"{uuid.uuid4().hex}@example.com", password_hash="x")
+    ds = Dataset(name="test", owner=user, row_count=0, column_count=0)
+    db.add_all([user, ds])
+    db.flush()
+    return ds
@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pyarrow as pa
+
+from app.services.arrow_profiler import profile_table
+
+
+def test_decimal_and_tz_timestamp_columns_keep_their_dtypes():
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    table = pa.table(
+        {
+            "amount": pa.array([Decimal("1.25"), Decimal("2.50"), None], pa.decimal128(10, 2)),
+            "at": pa.array([start, start + timedelta(hours=1), None], pa.timestamp("us", tz="UTC")),
+        }
+    )
+    amount, at = profile_table(table)
+
+    assert amount["dtype"] == "float64"
+    assert amount["stats"]["mean"] == 1.875
+    assert amount["distinct_count"] == 2
+    assert amount["type_signals"] is None
+
+    assert at["dtype"] == "datetime64[us, UTC]"
+    assert at["stats"] is None
+    assert at["null_count"] == 1
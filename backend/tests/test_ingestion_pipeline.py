@@ -0,0 +1,71 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.ingestion_pipeline import (
+    _profile_accumulators,
+    create_snapshot,
+    merge_previous_snapshot,
+    parse_csv_upload,
+    persist_column_profiles,
+)
+from app.services.profiling_engine import PERCENTILES
+
+
+def _parse(df: pd.DataFrame):
+    data = df.to_csv(index=False).encode()
+    return parse_csv_upload(io.BytesIO(data), len(data), streaming=True)
+
+
+def _rank(values: np.ndarray, q: float) -> float:
+    return float(np.searchsorted(np.sort(values), q, side="right")) / values.size
+
+
+def test_append_matches_single_pass_profile_of_concatenated_csv(db, dataset):
+    rng = np.random.default_rng(7)
+    n = 4000
+    full = pd.DataFrame(
+        {
+            "x": rng.lognormal(0.0, 1.0, n),
+            "id": rng.integers(0, 1500, n),
+            "cat": rng.choice(["a", "b", "c", "d", "e"], n, p=[0.4, 0.3, 0.15, 0.1, 0.05]),
+        }
+    )
+    full.loc[rng.random(n) < 0.05, "x"] = np.nan
+    full.iloc[3500:3600] = full.iloc[100:200].to_numpy()  # duplicates across the boundary
+    part_a, part_b = full.iloc[:2500], full.iloc[2500:]
+
+    parsed_a = _parse(part_a)
+    snapshot = create_snapshot(db, dataset, parsed_a, "a.csv")
+    persist_column_profiles(db, snapshot, parsed_a)
+    db.flush()
+
+    appended = _parse(part_b)
+    merge_previous_snapshot(db, dataset, appended)
+    single = _parse(full)
+
+    assert appended.row_count == single.row_count == n
+    assert appended.duplicate_row_count == single.duplicate_row_count >= 100
+
+    merged_cols = {p["name"]: p for p in _profile_accumulators(appended.streamed.columns)}
+    single_cols = {p["name"]: p for p in _profile_accumulators(single.streamed.columns)}
+    for name in ("x", "id", "cat"):
+        merged, expected = merged_cols[name], single_cols[name]
+        assert merged["dtype"] == expected["dtype"]
+        assert merged["null_count"] == expected["null_count"]
+        # HLL merge is a register-wise max: identical to one sketch over all rows
+        assert merged["distinct_sketch"] == expected["distinct_sketch"]
+        assert merged["distinct_count"] == pytest.approx(expected["distinct_count"], rel=0.03)
+
+    for name in ("x", "id"):
+        merged, expected = merged_cols[name]["stats"], single_cols[name]["stats"]
+        assert merged["value_count"] == expected["value_count"]
+        for key in ("mean", "std", "min", "max", "skewness", "kurtosis"):
+            assert merged[key] == pytest.approx(expected[key], rel=1e-9)
+        values = full[name].dropna().to_numpy(dtype="float64")
+        for key, q in PERCENTILES.items():
+            assert _rank(values, merged[key]) == pytest.approx(q, abs=0.02)
+
+    assert merged_cols["cat"]["top_values"] == single_cols["cat"]["top_values"] is not None
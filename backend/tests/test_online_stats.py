@@ -0,0 +1,25 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from app.services.online_stats import profile_csv_stream
+
+
+def _csv(df: pd.DataFrame) -> io.BytesIO:
+    return io.BytesIO(df.to_csv(index=False).encode())
+
+
+def test_distinct_count_of_column_widened_to_text_matches_single_read():
+    ids = np.arange(300, dtype="int64") + 1234567890123456789
+    # First chunks parse as int64, the last as text repeating the same values
+    values = [str(v) for v in ids] + [str(v) for v in ids[:98]] + ["unknown"] * 2
+    df = pd.DataFrame({"id": values, "small": [str(i % 50) for i in range(300)] + ["x"] * 100})
+
+    profile = profile_csv_stream(_csv(df), chunk_rows=100, preview_rows=0)
+    single = pd.read_csv(_csv(df), dtype=str)
+
+    by_name = {c.name: c for c in profile.columns}
+    assert by_name["id"].dtype == "object"
+    assert by_name["id"].distinct_count == single["id"].nunique() == 301
+    assert by_name["small"].distinct_count == single["small"].nunique() == 51
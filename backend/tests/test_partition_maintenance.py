@@ -0,0 +1,146 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.models.dataset_risk_history import DatasetRiskHistory
+from app.models.dataset_risk_rollup import DatasetRiskDaily, DatasetRiskHourly
+from app.services import partition_maintenance as pm
+
+UTC = timezone.utc
+
+
+@pytest.mark.parametrize(
+    "d, n, expected",
+    [
+        (date(2026, 1, 31), 0, date(2026, 1, 1)),
+        (date(2026, 1, 31), 1, date(2026, 2, 1)),
+        (date(2026, 12, 15), 1, date(2027, 1, 1)),
+        (date(2026, 1, 1), -1, date(2025, 12, 1)),
+        (date(2026, 11, 1), 14, date(2028, 1, 1)),
+        (date(2026, 3, 1), -15, date(2024, 12, 1)),
+    ],
+)
+def test_add_months_crosses_year_boundaries(d, n, expected):
+    assert pm.add_months(d, n) == expected
+
+
+@pytest.mark.parametrize(
+    "cutoff, expected",
+    [
+        # Dec 2025 ends exactly at the cutoff
+        (datetime(2026, 1, 1, tzinfo=UTC), ["t_p202511", "t_p202512"]),
+        (datetime(2025, 12, 31, 23, 59, tzinfo=UTC), ["t_p202511"]),
+        # 00:30 in UTC+1 is still Dec 31 in UTC
+        (datetime(2026, 1, 1, 0, 30, tzinfo=timezone(timedelta(hours=1))), ["t_p202511"]),
+        (datetime(2025, 12, 1, tzinfo=UTC), ["t_p202511"]),
+        (datetime(2025, 11, 30, tzinfo=UTC), []),
+    ],
+)
+def test_expired_partitions_at_month_and_year_boundaries(monkeypatch, cutoff, expected):
+    parts = {
+        "t_p202601": date(2026, 1, 1),
+        "t_p202511": date(2025, 11, 1),
+        "t_p202512": date(2025, 12, 1),
+        "t_p202602": date(2026, 2, 1),
+    }
+    monkeypatch.setattr(pm, "list_partitions", lambda db, table: parts)
+    assert pm.expired_partitions(None, "t", cutoff) == expected
+
+
+def _history(dataset, at: datetime, risk: int, smoothed=None, level="low") -> DatasetRiskHistory:
+    return DatasetRiskHistory(
+        dataset_id=dataset.id,
+        risk_score=risk,
+        risk_level=level,
+        breakdown={},
+        smoothed_score=smoothed,
+        delta_score=float(risk),
+        created_at=at,
+    )
+
+
+def _roll_default(db, rows) -> int:
+    """One maintenance step: fold the DEFAULT partition into the rollups, then expire it."""
+    db.add_all(rows)
+    db.flush()
+    relation = f"{pm.RISK_HISTORY_TABLE}_default"
+    count = pm.rollup_history(db, relation)
+    db.execute(text(f"DELETE FROM {relation}"))
+    return count
+
+
+def test_rollup_history_merges_into_existing_bucket(db, dataset):
+    db.execute(text(f"DELETE FROM {pm.RISK_HISTORY_TABLE}_default"))
+    at = datetime(2001, 3, 4, 10, tzinfo=UTC)  # before any monthly partition: lands in DEFAULT
+
+    assert _roll_default(db, [
+        _history(dataset, at + timedelta(minutes=5), 30, smoothed=28),
+        _history(dataset, at + timedelta(minutes=40), 50, smoothed=35, level="moderate"),
+    ]) == 2
+    assert _roll_default(db, [
+        _history(dataset, at + timedelta(minutes=20), 10),
+        _history(dataset, at + timedelta(minutes=55), 70, smoothed=44, level="high"),
+    ]) == 2
+    # Older than the bucket's latest row: counted, but "last" values stay
+    assert _roll_default(db, [_history(dataset, at + timedelta(minutes=30), 20, smoothed=30)]) == 1
+
+    for model, bucket in ((DatasetRiskHourly, at), (DatasetRiskDaily, at.replace(hour=0))):
+        (row,) = db.query(model).filter(model.dataset_id == dataset.id).all()
+        assert row.bucket_start == bucket
+        assert row.row_count == 5
+        assert (row.risk_min, row.risk_max, row.risk_sum) == (10, 70, 180)
+        assert (row.smoothed_min, row.smoothed_max, row.smoothed_sum, row.smoothed_count) == (28, 44, 137, 4)
+        assert row.last_at == at + timedelta(minutes=55)
+        assert (row.risk_last, row.risk_level_last, row.smoothed_last, row.delta_last) == (70, "high", 44, 70.0)
+
+
+def test_ensure_partitions_moves_default_rows_into_new_partition(db, dataset):
+    existing = pm.list_partitions(db, pm.RISK_HISTORY_TABLE)
+    newest = max(existing.values()) if existing else pm.month_start(datetime.now(UTC).date())
+    target = pm.add_months(newest, 2)
+    at = datetime(target.year, target.month, 1, 12, tzinfo=UTC)
+    db.add(_history(dataset, at, 40))
+    db.flush()
+
+    created = pm.ensure_partitions(db, pm.RISK_HISTORY_TABLE, target)
+
+    assert created[-1] == pm.partition_name(pm.RISK_HISTORY_TABLE, target)
+    assert len(created) == (2 if existing else 3)
+    located = db.execute(
+        text(f"SELECT tableoid::regclass::text FROM {pm.RISK_HISTORY_TABLE} WHERE dataset_id = :d"),
+        {"d": dataset.id},
+    ).scalars().all()
+    assert located == [created[-1]]
+
+
+def test_partition_maintenance_rolls_up_and_drops_expired_history(db, dataset):
+    days = int(get_settings().risk_history_raw_retention_days)
+    if days <= 0:
+        pytest.skip("raw risk history is kept forever")
+    oldest = min(pm.list_partitions(db, pm.RISK_HISTORY_TABLE).values())
+    partition = pm.partition_name(pm.RISK_HISTORY_TABLE, oldest)
+    at = datetime(oldest.year, oldest.month, 2, tzinfo=UTC)
+    db.add(_history(dataset, at, 60, smoothed=55))
+    db.flush()
+
+    # Only the oldest month ends before the retention cutoff
+    end = pm.add_months(oldest, 1)
+    now = datetime(end.year, end.month, end.day, 1, tzinfo=UTC) + timedelta(days=days)
+    # DEFAULT rows older than the same month boundary are rolled up as well
+    rows = db.execute(
+        text(
+            f"SELECT (SELECT count(*) FROM {partition}) + (SELECT count(*) FROM "
+            f"{pm.RISK_HISTORY_TABLE}_default WHERE created_at < :end)"
+        ),
+        {"end": datetime(end.year, end.month, 1, tzinfo=UTC)},
+    ).scalar()
+    summary = pm.run_partition_maintenance(db, now=now)
+
+    assert partition in summary["dropped"]
+    assert pm.partition_name(pm.RISK_HISTORY_TABLE, pm.add_months(oldest, 1)) not in summary["dropped"]
+    assert summary["rolled_up_rows"] == rows
+    assert partition not in pm.list_partitions(db, pm.RISK_HISTORY_TABLE)
+    daily = db.query(DatasetRiskDaily).filter(DatasetRiskDaily.dataset_id == dataset.id).one()
+    assert (daily.row_count, daily.risk_last, daily.smoothed_last) == (1, 60, 55)
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from app.services.profiling_engine import profile_frame
+from app.services.sketches import hash_rows, hash_series
+
+# Snowflake-style IDs: consecutive values above 2**53 that float64 cannot tell apart
+BIG_IDS = np.arange(1000, dtype="int64") + 1234567890123456789
+
+
+def test_hash_series_keeps_big_int64_distinct():
+    assert len(np.unique(hash_series(pd.Series(BIG_IDS)))) == 1000
+
+
+def test_hash_series_int_and_float_chunks_agree():
+    ints = hash_series(pd.Series([1, 2, 3, None], dtype="Int64"))
+    floats = hash_series(pd.Series([1.0, 2.0, 3.0, np.nan]))
+    assert (ints == floats).all()
+
+
+def test_hash_series_non_integral_float_differs_from_its_bit_pattern():
+    half = np.array([0.5])
+    assert hash_series(pd.Series(half))[0] != hash_series(pd.Series(half.view("int64")))[0]
+
+
+def test_profile_frame_distinct_count_of_big_ids():
+    (profile,) = profile_frame(pd.DataFrame({"id": BIG_IDS}))
+    assert profile["distinct_count"] == 1000
+
+
+def test_hash_rows_keeps_big_int64_keys_distinct():
+    df = pd.DataFrame({"id": BIG_IDS, "name": ["x"] * 1000})
+    assert len(np.unique(hash_rows(df))) == 1000
+
+
+def test_hash_rows_int_and_float_chunks_agree():
+    ints = pd.DataFrame({"a": pd.array([1, None, 3], dtype="Int64"), "b": ["x", "y", "z"]})
+    floats = pd.DataFrame({"a": [1.0, np.nan, 3.0], "b": ["x", "y", "z"]})
+    assert (hash_rows(ints) == hash_rows(floats)).all()